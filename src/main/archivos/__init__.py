@@ -4,3 +4,6 @@ Paquete de archivos.
 
 from .archivos import *
 from .backups import *
+from .backups_incrementales import *
+from .contenido import *
+from .indice_archivos import *
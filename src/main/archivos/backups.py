@@ -2,37 +2,133 @@
 Módulo para algoritmos de backup.
 """
 
+from contextlib import closing
 from datetime import datetime
+from os import replace
+from pathlib import Path
+from sqlite3 import connect
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import TYPE_CHECKING, NamedTuple, Optional
 from zipfile import ZIP_DEFLATED, ZipFile
 
-from ..db import DEFAULT_DB
+from ..db import database
 from ..db.atajos import get_backup_path, get_limite_backup_db
-from .archivos import (borrar_archivo, lista_nombre_archivos, partir_ruta,
-                       unir_ruta)
+from .archivos import borrar_archivo, lista_nombre_archivos, partir_ruta, unir_ruta
 
+if TYPE_CHECKING:
 
-def hacer_backup_db() -> bool:
+    from os import PathLike
+
+
+FORMATO_BACKUP_DB: str = r"db_%Y-%m-%d_%H-%M-%S.zip"
+PAGINAS_POR_PASO_BACKUP: int = 256
+"""
+Páginas de la DB que se copian de una vez. Entre paso y paso, otras
+conexiones pueden seguir escribiendo.
+"""
+
+
+class InfoBackup(NamedTuple):
+    """
+    Resultado de un backup.
+    """
+
+    ruta: str
+    tamanio: int # en bytes
+    duracion: float # en segundos
+    borrados: tuple[str, ...]
+
+
+def fecha_de_backup(nombre: str, formato: str=FORMATO_BACKUP_DB) -> Optional[datetime]:
+    """
+    Lee la fecha de un backup a partir de su nombre, o devuelve
+    `None` si el nombre no tiene el formato esperado.
+    """
+
+    try:
+        return datetime.strptime(nombre, formato)
+    except ValueError:
+        return None
+
+
+def backups_por_fecha(carpeta: "PathLike", formato: str=FORMATO_BACKUP_DB) -> list[str]:
+    """
+    Devuelve los nombres de los backups de la carpeta, del más viejo
+    al más nuevo, ignorando los archivos que no son backups.
+    """
+
+    fechados = []
+
+    for nombre in lista_nombre_archivos(carpeta):
+        fecha = fecha_de_backup(nombre, formato)
+        if fecha is not None:
+            fechados.append((fecha, nombre))
+
+    return [nombre for _, nombre in sorted(fechados)]
+
+
+def aplicar_retencion(carpeta: "PathLike",
+                      limite: int,
+                      formato: str=FORMATO_BACKUP_DB) -> tuple[str, ...]:
+    """
+    Borra los backups más viejos hasta que queden a lo sumo 'limite'.
+    Devuelve los nombres de los borrados.
+    """
+
+    backups = backups_por_fecha(carpeta, formato)
+    sobrantes = tuple(backups[:max(len(backups) - limite, 0)])
+
+    for nombre in sobrantes:
+        borrar_archivo(unir_ruta(carpeta, nombre), ignorar_excepciones=True)
+
+    return sobrantes
+
+
+def instantanea_db(destino: "PathLike", origen: Optional["PathLike"]=None) -> None:
     """
-    Realiza la compresión de una copia de la DB,
-    y la almacena.
+    Copia la DB a 'destino' con la API de backup de sqlite, que
+    devuelve un estado consistente aunque se esté escribiendo en ella.
+    """
+
+    with (closing(connect(origen or database.DEFAULT_DB)) as con_origen,
+          closing(connect(destino)) as con_destino):
+        con_origen.backup(con_destino, pages=PAGINAS_POR_PASO_BACKUP)
 
-    Devuelve 'True' si todavía no se alcanzó el límite,
-    sino elimina el más viejo y devuelve 'False'.
+
+def hacer_backup_db() -> InfoBackup:
+    """
+    Saca una instantánea de la DB, la comprime y la almacena, y después
+    borra los backups más viejos que se pasen del límite.
+
+    Es bloqueante, así que se debería correr fuera del loop de eventos.
     """
 
-    db_backup_path = f"{get_backup_path()}/db"
-    lista_dir = lista_nombre_archivos(db_backup_path)
-    res = True
+    inicio = perf_counter()
+    db_backup_path = Path(f"{get_backup_path()}/db")
+    db_backup_path.mkdir(parents=True, exist_ok=True)
+
+    ruta_zip = db_backup_path / datetime.now().strftime(FORMATO_BACKUP_DB)
+    ruta_temp = ruta_zip.with_name(f".{ruta_zip.name}.tmp")
 
-    if len(lista_dir) >= get_limite_backup_db():
-        borrar_archivo(unir_ruta(db_backup_path, min(lista_dir)))
-        res = False
+    try:
+        with TemporaryDirectory() as dir_temp:
+            instantanea = Path(dir_temp) / partir_ruta(database.DEFAULT_DB)[1]
+            instantanea_db(instantanea)
 
-    nombre = f"db_{datetime.now().strftime(r'%Y-%m-%d_%H-%M-%S')}.zip"
+            with ZipFile(file=ruta_temp,
+                         mode='w',
+                         compression=ZIP_DEFLATED) as zf:
+                zf.write(filename=instantanea, arcname=instantanea.name)
 
-    with ZipFile(file=unir_ruta(db_backup_path, nombre),
-                 mode='w',
-                 compression=ZIP_DEFLATED) as zf:
-        zf.write(filename=DEFAULT_DB, arcname=partir_ruta(DEFAULT_DB)[1])
+        replace(ruta_temp, ruta_zip)
+    except BaseException:
+        # Un zip a medio escribir no sirve, y nadie más lo borraría
+        ruta_temp.unlink(missing_ok=True)
+        raise
+    borrados = aplicar_retencion(db_backup_path, get_limite_backup_db())
 
-    return res
\ No newline at end of file
+    return InfoBackup(ruta=ruta_zip.as_posix(),
+                      tamanio=ruta_zip.stat().st_size,
+                      duracion=perf_counter() - inicio,
+                      borrados=borrados)
@@ -0,0 +1,326 @@
+"""
+Módulo para los backups incrementales de carpetas de archivos.
+
+Las carpetas de imágenes y sonidos pesan mucho más que la DB, y casi
+no cambian de un día a otro. Cada backup guarda una instantánea: un
+manifiesto con el tamaño, la fecha de modificación y el hash de cada
+archivo, y la lista de bloques que lo forman. Los bloques se guardan
+una sola vez según su hash, así que un archivo que no cambió (o que
+está repetido) no vuelve a ocupar lugar. Los archivos con el mismo
+tamaño y fecha que en la instantánea anterior ni siquiera se leen.
+
+Las funciones son bloqueantes y no tocan la DB, para poder correrlas
+en otro proceso.
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime
+from hashlib import sha256
+from json import dump, load
+from os import replace, walk
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING, NamedTuple, Optional
+from zlib import compress, decompress
+
+from .backups import aplicar_retencion, backups_por_fecha
+
+if TYPE_CHECKING:
+
+    from os import PathLike
+
+
+FORMATO_INSTANTANEA: str = r"%Y-%m-%d_%H-%M-%S.json"
+TAMANIO_BLOQUE_BACKUP: int = 1 << 20 # 1 MB
+NIVEL_COMPRESION: int = 6
+
+# Marcas al principio de cada bloque guardado
+BLOQUE_COMPRIMIDO: bytes = b"z"
+BLOQUE_CRUDO: bytes = b"r"
+
+
+class ResumenBackup(NamedTuple):
+    """
+    Lo que se hizo en un backup incremental.
+    """
+
+    instantanea: str
+    archivos: int
+    cambiados: int
+    bytes_leidos: int
+    bloques_nuevos: int
+    bytes_escritos: int
+    duracion: float # en segundos
+    borradas: tuple[str, ...]
+
+
+def _ruta_bloque(almacen: Path, hash_bloque: str) -> Path:
+    """
+    Devuelve dónde se guarda un bloque, repartidos en subcarpetas
+    para no tener miles de archivos en una sola.
+    """
+
+    return almacen / "bloques" / hash_bloque[:2] / hash_bloque
+
+
+def _escribir_atomico(ruta: Path, datos: bytes) -> None:
+    """
+    Escribe un archivo de manera que nunca quede a medio escribir.
+    """
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta_temp = ruta.with_name(f".{ruta.name}.tmp")
+    ruta_temp.write_bytes(datos)
+    replace(ruta_temp, ruta)
+
+
+def _guardar_bloque(almacen: Path, bloque: bytes) -> tuple[str, int]:
+    """
+    Guarda un bloque si no estaba ya guardado. Devuelve su hash y
+    cuántos bytes se escribieron.
+    """
+
+    hash_bloque = sha256(bloque).hexdigest()
+    ruta = _ruta_bloque(almacen, hash_bloque)
+
+    if ruta.exists():
+        return hash_bloque, 0
+
+    comprimido = compress(bloque, NIVEL_COMPRESION)
+    # Las imágenes y los audios ya vienen comprimidos, y muchas veces no se achican
+    datos = (BLOQUE_COMPRIMIDO + comprimido if len(comprimido) < len(bloque)
+             else BLOQUE_CRUDO + bloque)
+    _escribir_atomico(ruta, datos)
+
+    return hash_bloque, len(datos)
+
+
+def _leer_bloque(almacen: Path, hash_bloque: str) -> bytes:
+    """
+    Lee un bloque guardado, verificando que no esté corrupto.
+    """
+
+    datos = _ruta_bloque(almacen, hash_bloque).read_bytes()
+    bloque = (decompress(datos[1:]) if datos[:1] == BLOQUE_COMPRIMIDO else datos[1:])
+
+    if sha256(bloque).hexdigest() != hash_bloque:
+        raise ValueError(f"El bloque {hash_bloque} está corrupto.")
+
+    return bloque
+
+
+def _archivos_de(raiz: Path) -> list[Path]:
+    """
+    Recorre la carpeta y devuelve sus archivos, sin los ocultos ni
+    los temporales.
+    """
+
+    archivos = []
+
+    for carpeta, subcarpetas, nombres in walk(raiz):
+        subcarpetas[:] = [sub for sub in subcarpetas if not sub.startswith(".")]
+        archivos.extend(Path(carpeta) / nombre for nombre in nombres
+                        if not nombre.startswith("."))
+
+    return archivos
+
+
+def listar_instantaneas(almacen: "PathLike") -> list[str]:
+    """
+    Devuelve los nombres de las instantáneas de un almacén, de la
+    más vieja a la más nueva.
+    """
+
+    carpeta = Path(almacen) / "instantaneas"
+
+    if not carpeta.exists():
+        return []
+
+    return backups_por_fecha(carpeta, FORMATO_INSTANTANEA)
+
+
+def cargar_manifiesto(almacen: "PathLike", instantanea: Optional[str]=None) -> dict:
+    """
+    Carga el manifiesto de una instantánea, o de la última si no se
+    especifica. Si no hay ninguna, devuelve un manifiesto vacío.
+    """
+
+    if instantanea is None:
+        instantaneas = listar_instantaneas(almacen)
+        if not instantaneas:
+            return {"archivos": {}}
+        instantanea = instantaneas[-1]
+
+    with open(Path(almacen) / "instantaneas" / instantanea, encoding="utf-8") as arch:
+        return load(arch)
+
+
+def _podar_bloques(almacen: Path) -> None:
+    """
+    Borra los bloques que ya no usa ninguna instantánea.
+    """
+
+    usados = set()
+
+    for instantanea in listar_instantaneas(almacen):
+        for entrada in cargar_manifiesto(almacen, instantanea)["archivos"].values():
+            usados.update(entrada["bloques"])
+
+    for ruta in (almacen / "bloques").glob("*/*"):
+        if ruta.name not in usados:
+            ruta.unlink(missing_ok=True)
+
+
+def hacer_backup_incremental(raiz: "PathLike",
+                             almacen: "PathLike",
+                             limite: Optional[int]=None) -> ResumenBackup:
+    """
+    Guarda una nueva instantánea de 'raiz' en 'almacen', leyendo sólo
+    los archivos que cambiaron desde la anterior. Si se pasa 'limite',
+    después borra las instantáneas más viejas y los bloques que sólo
+    usaban esas.
+    """
+
+    inicio = perf_counter()
+    raiz = Path(raiz)
+    almacen = Path(almacen)
+    anteriores = cargar_manifiesto(almacen)["archivos"]
+
+    archivos = {}
+    cambiados = bytes_leidos = bloques_nuevos = bytes_escritos = 0
+
+    for ruta in _archivos_de(raiz):
+        clave = ruta.relative_to(raiz).as_posix()
+        stat = ruta.stat()
+        anterior = anteriores.get(clave)
+
+        if (anterior is not None
+            and anterior["tamanio"] == stat.st_size
+            and anterior["mtime_ns"] == stat.st_mtime_ns):
+            archivos[clave] = anterior
+            continue
+
+        hasheador = sha256()
+        bloques = []
+
+        with open(ruta, "rb") as arch:
+            while bloque := arch.read(TAMANIO_BLOQUE_BACKUP):
+                hasheador.update(bloque)
+                hash_bloque, escritos = _guardar_bloque(almacen, bloque)
+                bloques.append(hash_bloque)
+                bytes_leidos += len(bloque)
+                bloques_nuevos += bool(escritos)
+                bytes_escritos += escritos
+
+        archivos[clave] = {"tamanio": stat.st_size,
+                           "mtime_ns": stat.st_mtime_ns,
+                           "hash": hasheador.hexdigest(),
+                           "bloques": bloques}
+        cambiados += 1
+
+    fecha = datetime.now()
+    nombre = fecha.strftime(FORMATO_INSTANTANEA)
+    ruta_manifiesto = almacen / "instantaneas" / nombre
+    ruta_manifiesto.parent.mkdir(parents=True, exist_ok=True)
+    ruta_temp = ruta_manifiesto.with_name(f".{nombre}.tmp")
+
+    # El manifiesto va al final: si se corta antes, sólo quedan bloques sueltos
+    with open(ruta_temp, "w", encoding="utf-8") as arch:
+        dump({"raiz": raiz.as_posix(), "fecha": fecha.isoformat(), "archivos": archivos}, arch)
+    replace(ruta_temp, ruta_manifiesto)
+
+    borradas = ()
+    if limite is not None:
+        borradas = aplicar_retencion(ruta_manifiesto.parent, limite, FORMATO_INSTANTANEA)
+        if borradas:
+            _podar_bloques(almacen)
+
+    return ResumenBackup(instantanea=nombre,
+                         archivos=len(archivos),
+                         cambiados=cambiados,
+                         bytes_leidos=bytes_leidos,
+                         bloques_nuevos=bloques_nuevos,
+                         bytes_escritos=bytes_escritos,
+                         duracion=perf_counter() - inicio,
+                         borradas=borradas)
+
+
+def restaurar_instantanea(almacen: "PathLike",
+                          destino: "PathLike",
+                          instantanea: Optional[str]=None,
+                          prefijo: str="") -> int:
+    """
+    Reconstruye en 'destino' los archivos de una instantánea (la última
+    si no se especifica), o sólo los que están bajo 'prefijo'. Verifica
+    el hash de cada archivo, y devuelve cuántos se restauraron.
+    """
+
+    almacen = Path(almacen)
+    destino = Path(destino)
+    restaurados = 0
+
+    for clave, entrada in cargar_manifiesto(almacen, instantanea)["archivos"].items():
+        if not clave.startswith(prefijo):
+            continue
+
+        ruta = destino / clave
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta_temp = ruta.with_name(f".{ruta.name}.tmp")
+        hasheador = sha256()
+
+        with open(ruta_temp, "wb") as arch:
+            for hash_bloque in entrada["bloques"]:
+                bloque = _leer_bloque(almacen, hash_bloque)
+                hasheador.update(bloque)
+                arch.write(bloque)
+
+        if hasheador.hexdigest() != entrada["hash"]:
+            ruta_temp.unlink()
+            raise ValueError(f"El archivo {clave!r} no coincide con su hash.")
+
+        replace(ruta_temp, ruta)
+        restaurados += 1
+
+    return restaurados
+
+
+def linea_de_comandos(args: Optional[list[str]]=None) -> None:
+    """
+    Herramienta de línea de comandos para ver y restaurar backups.
+
+    ***Ejemplo:***
+    ```sh
+    python -m src.main.archivos.backups_incrementales listar backup/archivos/sonidos
+    python -m src.main.archivos.backups_incrementales restaurar backup/archivos/sonidos sounds_restaurados
+    ```
+    """
+
+    parser = ArgumentParser(description="Backups incrementales de BotShot.")
+    subparsers = parser.add_subparsers(dest="accion", required=True)
+
+    listar = subparsers.add_parser("listar", help="Lista las instantáneas de un almacén.")
+    listar.add_argument("almacen")
+
+    restaurar = subparsers.add_parser("restaurar", help="Restaura una instantánea.")
+    restaurar.add_argument("almacen")
+    restaurar.add_argument("destino")
+    restaurar.add_argument("--instantanea", default=None)
+    restaurar.add_argument("--prefijo", default="")
+
+    opciones = parser.parse_args(args)
+
+    if opciones.accion == "listar":
+        for nombre in listar_instantaneas(opciones.almacen):
+            archivos = cargar_manifiesto(opciones.almacen, nombre)["archivos"]
+            print(f"{nombre}\t{len(archivos)} archivos")
+    else:
+        restaurados = restaurar_instantanea(opciones.almacen,
+                                            opciones.destino,
+                                            opciones.instantanea,
+                                            opciones.prefijo)
+        print(f"Se restauraron {restaurados} archivos en {opciones.destino!r}.")
+
+
+if __name__ == "__main__":
+
+    linea_de_comandos()
@@ -0,0 +1,252 @@
+"""
+Módulo para guardar archivos según su contenido, sin repetirlos.
+
+Mientras se guarda un archivo se le calcula el hash, y con un índice
+de hash a ruta se sabe si ese mismo contenido ya estaba guardado.
+"""
+
+from asyncio import to_thread
+from hashlib import sha256
+from os import link, replace
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, BinaryIO, Optional
+from uuid import uuid4
+
+from ..db import transaccion
+from ..db.atajos import (borrar_contenido, get_rutas_con_contenido, get_rutas_por_hash,
+                         registrar_contenido)
+from ..enums import EstadoGuardado
+from .archivos import borrar_archivo, buscar_archivos, repite_nombre
+
+if TYPE_CHECKING:
+
+    from hashlib import _Hash
+    from os import PathLike
+
+    from aiohttp import ClientSession
+
+
+TAMANIO_BLOQUE_GUARDADO: int = 65536 # 64 KB
+TAMANIO_LOTE_ESCRITURA: int = 1048576 # 1 MB
+"""
+Cuánto se junta antes de mandar a escribir al disco, para no pasar a
+otro hilo por cada bloque descargado.
+"""
+TAMANIO_LOTE_INDEXADO: int = 100
+"""
+Cuántos archivos existentes se registran por transacción al indexarlos.
+"""
+
+_candado_ubicar: Lock = Lock()
+"""
+Candado para ubicar los archivos de a uno: entre elegir un nombre libre
+y ocuparlo no puede entrar otro guardado, ni buscar las mismas copias.
+"""
+
+
+async def bloques_de_url(sesion: "ClientSession",
+                         url: str,
+                         tamanio_bloque: int=TAMANIO_BLOQUE_GUARDADO) -> AsyncIterator[bytes]:
+    """
+    Descarga un archivo de a bloques, sin tenerlo entero en memoria.
+    """
+
+    async with sesion.get(url) as resp:
+        resp.raise_for_status()
+
+        async for bloque in resp.content.iter_chunked(tamanio_bloque):
+            yield bloque
+
+
+def _ruta_temporal(ruta: Path) -> Path:
+    """
+    Devuelve una ruta temporal en la misma carpeta que 'ruta', para
+    que después moverla a su lugar sea atómico.
+    """
+
+    return ruta.with_name(f".{ruta.name}.{uuid4().hex}.tmp")
+
+
+def _volcar(arch: BinaryIO, hasheador: "_Hash", lote: bytearray) -> None:
+    """
+    Escribe un lote en el archivo y lo suma al hash. Está pensada para
+    correr en otro hilo, y así hacer las dos cosas de un solo viaje.
+    """
+
+    hasheador.update(lote)
+    arch.write(lote)
+
+
+async def _escribir_hasheando(bloques: AsyncIterable[bytes],
+                              ruta_temp: Path,
+                              tamanio_maximo: Optional[int]=None) -> str:
+    """
+    Escribe los bloques en el archivo mientras calcula su hash, de a
+    lotes de 'TAMANIO_LOTE_ESCRITURA' bytes.
+    Devuelve el hash del contenido.
+    """
+
+    hasheador = sha256()
+    escritos = 0
+    lote = bytearray()
+    arch = await to_thread(open, ruta_temp, "wb")
+
+    try:
+        async for bloque in bloques:
+            escritos += len(bloque)
+            if tamanio_maximo is not None and escritos > tamanio_maximo:
+                raise ValueError(f"El archivo supera los {tamanio_maximo} bytes permitidos.")
+
+            lote += bloque
+            if len(lote) >= TAMANIO_LOTE_ESCRITURA:
+                lote, lleno = bytearray(), lote
+                await to_thread(_volcar, arch, hasheador, lleno)
+
+        if lote:
+            await to_thread(_volcar, arch, hasheador, lote)
+    finally:
+        await to_thread(arch.close)
+
+    return hasheador.hexdigest()
+
+
+def _copias_existentes(hash_contenido: str) -> list[Path]:
+    """
+    Busca las rutas guardadas con ese contenido, olvidando las de
+    archivos que ya no existen.
+    """
+
+    copias = []
+    perdidas = []
+
+    for ruta in get_rutas_por_hash(hash_contenido):
+        (copias if Path(ruta).exists() else perdidas).append(Path(ruta))
+
+    if perdidas:
+        with transaccion():
+            for ruta in perdidas:
+                borrar_contenido(ruta.as_posix())
+
+    return copias
+
+
+def _ubicar(ruta_temp: Path, ruta: Path, hash_contenido: str) -> tuple[str, EstadoGuardado]:
+    """
+    Decide qué hacer con el archivo ya descargado: si el contenido ya
+    estaba en la misma carpeta se descarta, si estaba en otra se hace
+    un enlace duro a ese, y si no se mueve a su lugar.
+    """
+
+    with _candado_ubicar:
+        copias = _copias_existentes(hash_contenido)
+
+        for copia in copias:
+            if copia.parent.resolve() == ruta.parent.resolve():
+                borrar_archivo(ruta_temp, ignorar_excepciones=True)
+                return copia.as_posix(), EstadoGuardado.REPETIDO
+
+        ruta_final = repite_nombre(ruta)
+
+        for copia in copias:
+            try:
+                link(copia, ruta_final)
+            except OSError:
+                # Otro sistema de archivos, o no se permiten enlaces
+                continue
+
+            borrar_archivo(ruta_temp, ignorar_excepciones=True)
+            registrar_contenido(hash_contenido, ruta_final)
+            return ruta_final, EstadoGuardado.ENLAZADO
+
+        replace(ruta_temp, ruta_final)
+        registrar_contenido(hash_contenido, ruta_final)
+        return ruta_final, EstadoGuardado.NUEVO
+
+
+async def guardar_contenido(bloques: AsyncIterable[bytes],
+                            ruta: "PathLike",
+                            *,
+                            tamanio_maximo: Optional[int]=None) -> tuple[str, EstadoGuardado]:
+    """
+    Guarda un archivo que llega de a bloques en 'ruta', a menos que
+    su contenido ya estuviera guardado.
+
+    Devuelve la ruta donde quedó el contenido, que puede ser otra si
+    el nombre estaba ocupado o si ya había una copia en la carpeta, y
+    qué se hizo con él.
+
+    Levanta 'ValueError' si se pasa de 'tamanio_maximo' bytes, en cuyo
+    caso no queda nada escrito.
+    """
+
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta_temp = _ruta_temporal(ruta)
+
+    try:
+        hash_contenido = await _escribir_hasheando(bloques, ruta_temp, tamanio_maximo)
+        return await to_thread(_ubicar, ruta_temp, ruta, hash_contenido)
+    except BaseException:
+        borrar_archivo(ruta_temp, ignorar_excepciones=True)
+        raise
+
+
+def olvidar_contenido(ruta: "PathLike") -> None:
+    """
+    Saca un archivo del índice de contenidos, por ejemplo
+    porque se va a borrar.
+    """
+
+    borrar_contenido(Path(ruta).as_posix())
+
+
+def _hash_de_archivo(ruta: Path) -> str:
+    """
+    Calcula el hash del contenido de un archivo ya guardado, leyéndolo
+    de a lotes de 'TAMANIO_LOTE_ESCRITURA' bytes.
+    """
+
+    hasheador = sha256()
+
+    with open(ruta, "rb") as arch:
+        while lote := arch.read(TAMANIO_LOTE_ESCRITURA):
+            hasheador.update(lote)
+
+    return hasheador.hexdigest()
+
+
+def indexar_existentes(*raices: "PathLike") -> int:
+    """
+    Registra el hash de los archivos de 'raices' que no estén en el
+    índice de contenidos, como los guardados antes de que existiera,
+    para que los nuevos también se comparen contra ellos.
+    Devuelve cuántos archivos se registraron.
+
+    Es bloqueante, así que se debería correr fuera del loop de eventos.
+    """
+
+    registradas = get_rutas_con_contenido()
+    pendientes = [ruta for raiz in raices
+                  for ruta in buscar_archivos(nombre_ruta=raiz, ignorar_patrones=(".*",))
+                  if ruta not in registradas]
+
+    registrados = 0
+
+    for inicio in range(0, len(pendientes), TAMANIO_LOTE_INDEXADO):
+        hashes = []
+
+        for ruta in pendientes[inicio:inicio + TAMANIO_LOTE_INDEXADO]:
+            try:
+                hashes.append((_hash_de_archivo(Path(ruta)), ruta))
+            except OSError:
+                # Se borró o no se puede leer, ya se registrará si se vuelve a guardar
+                continue
+
+        with transaccion():
+            for hash_contenido, ruta in hashes:
+                registrar_contenido(hash_contenido, ruta)
+
+        registrados += len(hashes)
+
+    return registrados
@@ -0,0 +1,253 @@
+"""
+Módulo para el índice en memoria de los archivos de una carpeta.
+
+Sirve para autocompletar rutas sin tocar el sistema de archivos en
+cada tecla: el índice se arma una vez, y se vuelve a armar sólo cuando
+cambia alguna de las carpetas.
+"""
+
+from asyncio import create_task, sleep, to_thread
+from heapq import nsmallest
+from os import scandir
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+from .archivos import buscar_archivos
+
+if TYPE_CHECKING:
+
+    from asyncio import Task
+    from os import PathLike
+
+    from ..logger import BotLogger
+
+
+INTERVALO_VIGILANCIA: float = 30 # en segundos
+
+
+class EntradaArchivo(NamedTuple):
+    """
+    Un archivo indexado, con sus nombres ya pasados a minúsculas.
+    """
+
+    ruta: str
+    nombre: str
+    nombre_min: str
+    ruta_min: str # a partir de la raíz del índice
+
+
+def _subsecuencia(consulta: str, texto: str) -> Optional[int]:
+    """
+    Verifica si las letras de la consulta aparecen en orden en el
+    texto, aunque sea salteadas. Devuelve cuántas letras se saltearon,
+    o `None` si no aparecen.
+    """
+
+    salteadas = 0
+    pos = 0
+
+    for car in consulta:
+        encontrado = texto.find(car, pos)
+        if encontrado == -1:
+            return None
+
+        salteadas += encontrado - pos
+        pos = encontrado + 1
+
+    return salteadas
+
+
+def _puntaje(consulta: str, entrada: EntradaArchivo) -> Optional[tuple[int, int, int]]:
+    """
+    Puntúa qué tan bien coincide un archivo con la consulta, siendo
+    menor mejor; o `None` si no coincide.
+    """
+
+    posicion = entrada.nombre_min.find(consulta)
+
+    if posicion == 0:
+        return 0, 0, len(entrada.nombre)
+
+    if posicion > 0:
+        return 1, posicion, len(entrada.nombre)
+
+    if consulta in entrada.ruta_min:
+        return 2, 0, len(entrada.ruta)
+
+    salteadas = _subsecuencia(consulta, entrada.nombre_min)
+    if salteadas is not None:
+        return 3, salteadas, len(entrada.nombre)
+
+    return None
+
+
+def mtimes_carpetas(raiz: Path) -> dict[str, int]:
+    """
+    Anota cuándo se modificó cada carpeta bajo 'raiz', que cambia
+    cada vez que se agrega, se quita o se renombra algo adentro.
+    """
+
+    mtimes = {}
+    pendientes = [raiz]
+
+    while pendientes:
+        carpeta = pendientes.pop()
+
+        try:
+            mtimes[carpeta.as_posix()] = carpeta.stat().st_mtime_ns
+            with scandir(carpeta) as hijos:
+                pendientes.extend(Path(hijo.path) for hijo in hijos
+                                  if hijo.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
+
+    return mtimes
+
+
+class IndiceArchivos:
+    """
+    Índice en memoria de los archivos bajo una carpeta.
+
+    Buscar nunca toca el disco. Un vigilante en segundo plano revisa
+    cada tanto si cambió alguna carpeta y, si es así, rearma el índice;
+    y los cambios que hace el propio bot se avisan con 'agregar' y 'quitar'.
+    """
+
+    def __init__(self,
+                 raiz: "PathLike",
+                 *,
+                 intervalo: float=INTERVALO_VIGILANCIA,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'IndiceArchivos'.
+        """
+
+        self.raiz: str = Path(raiz).as_posix()
+        self.intervalo: float = intervalo
+        self.log: Optional["BotLogger"] = log
+
+        self._entradas: dict[str, EntradaArchivo] = {}
+        self._mtimes: dict[str, int] = {}
+        self._tarea: Optional["Task"] = None
+
+
+    def __len__(self) -> int:
+        """
+        Cuenta la cantidad de archivos indexados.
+        """
+
+        return len(self._entradas)
+
+
+    def _entrada(self, ruta: "PathLike") -> EntradaArchivo:
+        """
+        Arma la entrada de un archivo. La ruta se busca a partir de la
+        raíz, para que no coincida con las carpetas de más arriba.
+        """
+
+        ruta = Path(ruta)
+        relativa = ruta.relative_to(self.raiz) if ruta.is_relative_to(self.raiz) else ruta
+
+        return EntradaArchivo(ruta.as_posix(),
+                              ruta.name,
+                              ruta.name.lower(),
+                              relativa.as_posix().lower())
+
+
+    def cargar(self) -> None:
+        """
+        Recorre la carpeta y arma el índice desde cero.
+        Es bloqueante, así que se debería correr fuera del loop de eventos.
+        """
+
+        raiz = Path(self.raiz)
+        mtimes = mtimes_carpetas(raiz)
+        rutas = (buscar_archivos(nombre_ruta=raiz, ignorar_patrones=(".*",))
+                 if raiz.exists() else [])
+
+        self._entradas = {entrada.ruta: entrada for entrada in map(self._entrada, rutas)}
+        self._mtimes = mtimes
+
+
+    def agregar(self, ruta: "PathLike") -> None:
+        """
+        Registra un archivo nuevo.
+        """
+
+        entrada = self._entrada(ruta)
+        self._entradas[entrada.ruta] = entrada
+
+
+    def quitar(self, ruta: "PathLike") -> bool:
+        """
+        Quita un archivo del índice.
+        Devuelve `True` si estaba indexado.
+        """
+
+        return self._entradas.pop(Path(ruta).as_posix(), None) is not None
+
+
+    def buscar(self,
+               consulta: str,
+               bajo: Optional["PathLike"]=None,
+               limite: int=25) -> list[str]:
+        """
+        Devuelve las rutas de los mejores 'limite' archivos que coinciden
+        con la consulta. Si se pasa 'bajo', sólo se buscan los archivos
+        dentro de esa carpeta.
+
+        Primero van los nombres que empiezan con la consulta, después los
+        que la contienen, después las rutas que la contienen, y al final
+        los nombres que tienen sus letras en orden.
+        """
+
+        consulta = consulta.strip().lower()
+        prefijo = None if bajo is None else f"{Path(bajo).as_posix()}/"
+        puntuadas = []
+
+        for entrada in self._entradas.values():
+            if prefijo is not None and not entrada.ruta.startswith(prefijo):
+                continue
+
+            puntaje = _puntaje(consulta, entrada) if consulta else (0, 0, 0)
+            if puntaje is not None:
+                puntuadas.append((puntaje, entrada.ruta))
+
+        return [ruta for _, ruta in nsmallest(limite, puntuadas)]
+
+
+    def iniciar(self) -> None:
+        """
+        Empieza a vigilar la carpeta en segundo plano.
+        """
+
+        if self._tarea is None:
+            self._tarea = create_task(self._vigilar())
+
+
+    async def _vigilar(self) -> None:
+        """
+        Rearma el índice cada vez que cambia alguna carpeta.
+        """
+
+        while True:
+            await sleep(self.intervalo)
+
+            try:
+                mtimes = await to_thread(mtimes_carpetas, Path(self.raiz))
+                if mtimes != self._mtimes:
+                    await to_thread(self.cargar)
+            except Exception as err: # pylint: disable=broad-except
+                if self.log is not None:
+                    self.log.error(f"[ARCHIVOS] Falló la vigilancia de {self.raiz!r}: {err!r}")
+
+
+    def cerrar(self) -> None:
+        """
+        Deja de vigilar la carpeta.
+        """
+
+        tarea, self._tarea = self._tarea, None
+
+        if tarea is not None:
+            tarea.cancel()
@@ -0,0 +1,14 @@
+"""
+Paquete de audio.
+"""
+
+from .cola_audio import *
+from .pool_ffmpeg import *
+from .cache_opus import *
+from .transcodificacion import *
+from .sondeo import *
+from .validacion import *
+from .bienvenidas import *
+from .agrupador_ingresos import *
+from .streaming import *
+from .sesiones_voz import *
@@ -0,0 +1,94 @@
+"""
+Módulo para agrupar los ingresos a canales de voz que llegan en ráfaga.
+"""
+
+from asyncio import create_task, sleep
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional, TypeAlias
+
+if TYPE_CHECKING:
+
+    from asyncio import Task
+
+    from discord import Guild, Member
+
+    from ..logger import BotLogger
+
+
+AlVencer: TypeAlias = Callable[["Guild", list["Member"]], Awaitable[None]]
+
+VENTANA_INGRESOS: float = 1.5 # en segundos
+MAX_BIENVENIDAS_POR_RAFAGA: int = 3
+
+
+class AgrupadorIngresos:
+    """
+    Junta los ingresos de cada guild dentro de una ventana de tiempo,
+    y los entrega todos juntos cuando esta se cierra.
+
+    La ventana empieza con el primer ingreso y no se alarga con los
+    siguientes, así que la bienvenida nunca se demora más que eso.
+    """
+
+    def __init__(self,
+                 al_vencer: AlVencer,
+                 *,
+                 ventana: float=VENTANA_INGRESOS,
+                 max_por_rafaga: int=MAX_BIENVENIDAS_POR_RAFAGA,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'AgrupadorIngresos'.
+
+        'al_vencer' recibe el guild y los miembros que ingresaron durante
+        la ventana, sin repetir y en orden de llegada.
+        """
+
+        self.al_vencer: AlVencer = al_vencer
+        self.ventana: float = ventana
+        self.max_por_rafaga: int = max_por_rafaga
+        self.log: Optional["BotLogger"] = log
+
+        self._pendientes: dict[int, dict[int, "Member"]] = {}
+        self._tareas: dict[int, "Task"] = {}
+
+
+    def registrar(self, guild: "Guild", miembro: "Member") -> None:
+        """
+        Anota el ingreso de un miembro, abriendo una ventana para el
+        guild si no había una abierta.
+        """
+
+        self._pendientes.setdefault(guild.id, {})[miembro.id] = miembro
+
+        if guild.id not in self._tareas:
+            self._tareas[guild.id] = create_task(self._esperar(guild))
+
+
+    async def _esperar(self, guild: "Guild") -> None:
+        """
+        Espera a que se cierre la ventana y entrega los ingresos. Si la
+        entrega falla se anota en el log, porque nadie espera a esta tarea.
+        """
+
+        try:
+            await sleep(self.ventana)
+        finally:
+            self._tareas.pop(guild.id, None)
+            miembros = list(self._pendientes.pop(guild.id, {}).values())
+
+        try:
+            await self.al_vencer(guild, miembros[:self.max_por_rafaga])
+        except Exception as err: # pylint: disable=broad-except
+            if self.log is not None:
+                self.log.error(f"[AUDIO] Fallaron las bienvenidas en {guild.id}: {err!r}")
+
+
+    def cancelar(self) -> None:
+        """
+        Cancela todas las ventanas abiertas, descartando sus ingresos.
+        """
+
+        for tarea in self._tareas.values():
+            tarea.cancel()
+
+        self._tareas.clear()
+        self._pendientes.clear()
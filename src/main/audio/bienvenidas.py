@@ -0,0 +1,117 @@
+"""
+Módulo para el registro de sonidos de bienvenida.
+"""
+
+from pathlib import Path
+from random import choice
+from typing import TYPE_CHECKING, Optional
+
+from ..archivos import buscar_archivos, existe, lista_nombre_carpetas
+
+if TYPE_CHECKING:
+
+    from os import PathLike
+
+
+CARPETA_GENERICA: str = "generico"
+
+
+class RegistroBienvenidas:
+    """
+    Índice en memoria de los sonidos de bienvenida, por id de miembro.
+
+    Se carga una sola vez recorriendo la carpeta de bienvenidas, y después
+    se mantiene al día con 'agregar' y 'quitar', así que elegir el sonido
+    de alguien que se une a un canal no toca el sistema de archivos.
+    """
+
+    def __init__(self, ruta_bienvenidas: "PathLike") -> None:
+        """
+        Inicializa una instancia de 'RegistroBienvenidas'.
+        """
+
+        self.ruta: Path = Path(ruta_bienvenidas)
+        self._por_miembro: dict[int, list[str]] = {}
+        self._genericos: list[str] = []
+
+
+    def cargar(self) -> None:
+        """
+        Recorre la carpeta de bienvenidas y arma el índice desde cero.
+        """
+
+        por_miembro = {}
+        genericos = []
+
+        if existe(self.ruta):
+            for carpeta in lista_nombre_carpetas(self.ruta):
+                sonidos = buscar_archivos(nombre_ruta=self.ruta / carpeta)
+
+                if carpeta == CARPETA_GENERICA:
+                    genericos = sonidos
+                elif carpeta.isdigit() and sonidos:
+                    por_miembro[int(carpeta)] = sonidos
+
+        self._por_miembro = por_miembro
+        self._genericos = genericos
+
+
+    def __len__(self) -> int:
+        """
+        Cuenta la cantidad de sonidos registrados, genéricos incluidos.
+        """
+
+        return (len(self._genericos)
+                + sum(len(sonidos) for sonidos in self._por_miembro.values()))
+
+
+    def sonidos_de(self, id_miembro: int) -> tuple[str, ...]:
+        """
+        Devuelve los sonidos propios de un miembro.
+        """
+
+        return tuple(self._por_miembro.get(id_miembro, ()))
+
+
+    def sonido_para(self, id_miembro: int) -> Optional[str]:
+        """
+        Elige un sonido al azar para un miembro. Si no tiene ninguno
+        propio, elige uno genérico; y si tampoco hay, devuelve `None`.
+        """
+
+        opciones = self._por_miembro.get(id_miembro) or self._genericos
+        return choice(opciones) if opciones else None
+
+
+    def agregar(self, id_miembro: int, ruta: "PathLike") -> None:
+        """
+        Registra un sonido nuevo para un miembro.
+        """
+
+        sonidos = self._por_miembro.setdefault(id_miembro, [])
+        ruta = Path(ruta).as_posix()
+
+        if ruta not in sonidos:
+            sonidos.append(ruta)
+
+
+    def quitar(self, ruta: "PathLike") -> bool:
+        """
+        Quita un sonido del registro, sea de un miembro o genérico.
+        Devuelve `True` si estaba registrado.
+        """
+
+        ruta = Path(ruta).as_posix()
+
+        if ruta in self._genericos:
+            self._genericos.remove(ruta)
+            return True
+
+        for id_miembro, sonidos in self._por_miembro.items():
+            if ruta in sonidos:
+                sonidos.remove(ruta)
+                if not sonidos:
+                    del self._por_miembro[id_miembro]
+                return True
+
+        return False
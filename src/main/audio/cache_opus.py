@@ -0,0 +1,313 @@
+"""
+Módulo para el caché de sonidos ya codificados en Opus.
+
+Los sonidos cortos se transcodifican una única vez a un archivo Ogg/Opus
+en disco, y sus paquetes se guardan en memoria, de forma que reproducirlos
+no requiera lanzar FFmpeg ni volver a codificar el audio.
+"""
+
+from asyncio import Task, create_task, to_thread
+from collections import OrderedDict
+from hashlib import sha1
+from os import replace
+from pathlib import Path
+from subprocess import DEVNULL, PIPE, CalledProcessError, run
+from typing import IO, TYPE_CHECKING, Iterable, Optional, TypeAlias
+
+from discord import AudioSource, FFmpegPCMAudio
+from discord.oggparse import OggError, OggStream
+
+from ..archivos import existe, partir_ruta
+from ..db.atajos import get_sonido_opus
+from .cola_audio import Pista
+from .pool_ffmpeg import PoolFFmpeg
+
+if TYPE_CHECKING:
+
+    from os import PathLike
+
+    from ..logger import BotLogger
+
+
+PaquetesOpus: TypeAlias = tuple[bytes, ...]
+
+MAX_BYTES_CACHE: int = 33554432 # 32 MB
+"""
+Cantidad máxima de bytes de paquetes Opus a mantener en memoria.
+"""
+
+MAX_BYTES_ENTRADA: int = 1048576 # 1 MB
+"""
+Tamaño máximo de un sonido para guardarlo en memoria. Los más
+grandes se leen directamente del archivo Ogg en disco.
+"""
+
+BITRATE_OPUS: int = 96 # en kbps
+
+
+def transcodificar_a_opus(ruta_origen: "PathLike",
+                          ruta_destino: "PathLike",
+                          filtros: Optional[str]=None) -> None:
+    """
+    Transcodifica un archivo de audio a Ogg/Opus a 48 kHz estéreo,
+    con paquetes de 20 ms, listos para mandar a discord.
+
+    Se escribe primero en un archivo temporal, de manera que nunca
+    quede un archivo a medio escribir en 'ruta_destino'.
+    """
+
+    ruta_temp = f"{ruta_destino}.tmp"
+    args = ["ffmpeg", "-y", "-i", str(ruta_origen), "-vn", "-map_metadata", "-1"]
+
+    if filtros is not None:
+        args.extend(("-af", filtros))
+
+    args.extend(("-c:a", "libopus",
+                 "-b:a", f"{BITRATE_OPUS}k",
+                 "-frame_duration", "20",
+                 "-ar", "48000",
+                 "-ac", "2",
+                 "-f", "opus",
+                 "-loglevel", "warning",
+                 ruta_temp))
+
+    Path(ruta_destino).parent.mkdir(parents=True, exist_ok=True)
+    run(args, stdin=DEVNULL, stdout=DEVNULL, stderr=PIPE, check=True)
+    replace(ruta_temp, ruta_destino)
+
+
+def leer_paquetes_opus(archivo: IO[bytes]) -> Iterable[bytes]:
+    """
+    Lee los paquetes de audio de un stream Ogg/Opus, salteando
+    los paquetes de encabezado.
+    """
+
+    for paquete in OggStream(archivo).iter_packets():
+        if paquete.startswith((b"OpusHead", b"OpusTags")):
+            continue
+
+        yield paquete
+
+
+class FuenteOpusCacheada(AudioSource):
+    """
+    Fuente de audio que entrega paquetes Opus ya codificados.
+    """
+
+    def __init__(self,
+                 paquetes: Iterable[bytes],
+                 archivo: Optional[IO[bytes]]=None) -> None:
+        """
+        Inicializa una instancia de 'FuenteOpusCacheada'.
+
+        Si los paquetes se leen de un archivo, 'archivo' se cierra
+        al liberar la fuente.
+        """
+
+        self._paquetes = iter(paquetes)
+        self._archivo: Optional[IO[bytes]] = archivo
+
+
+    def read(self) -> bytes:
+        """
+        Devuelve el siguiente paquete, o `b''` si ya no hay más.
+        """
+
+        try:
+            return next(self._paquetes, b"")
+        except OggError:
+            return b""
+
+
+    def is_opus(self) -> bool:
+        """
+        Los paquetes ya están en Opus, por lo que discord no
+        los vuelve a codificar.
+        """
+
+        return True
+
+
+    def cleanup(self) -> None:
+        """
+        Cierra el archivo de origen, si es que había uno.
+        """
+
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+
+class CacheOpus:
+    """
+    Caché de sonidos transcodificados a Opus, en disco y con un LRU
+    acotado en memoria.
+    """
+
+    def __init__(self,
+                 directorio: "PathLike",
+                 *,
+                 max_bytes: int=MAX_BYTES_CACHE,
+                 max_bytes_entrada: int=MAX_BYTES_ENTRADA,
+                 pool_ffmpeg: Optional[PoolFFmpeg]=None,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'CacheOpus'.
+
+        Si se pasa 'pool_ffmpeg', los sonidos que no se puedan cachear se
+        reproducen con un proceso del pool.
+        """
+
+        self.directorio: Path = Path(directorio)
+        self.max_bytes: int = max_bytes
+        self.max_bytes_entrada: int = max_bytes_entrada
+        self.pool_ffmpeg: Optional[PoolFFmpeg] = pool_ffmpeg
+        self.log: Optional["BotLogger"] = log
+
+        self._memoria: OrderedDict[str, PaquetesOpus] = OrderedDict()
+        self._bytes_en_memoria: int = 0
+        self._en_proceso: dict[str, Task] = {}
+
+
+    @property
+    def bytes_en_memoria(self) -> int:
+        """
+        Devuelve cuántos bytes de paquetes hay en memoria.
+        """
+
+        return self._bytes_en_memoria
+
+
+    def ruta_cacheada(self, ruta: "PathLike") -> Path:
+        """
+        Devuelve la ruta del archivo Ogg que corresponde a un sonido.
+
+        La clave depende del tamaño y la fecha de modificación, así que
+        si el sonido original cambia se vuelve a transcodificar.
+        """
+
+        path = Path(ruta)
+        stat = path.stat()
+        clave = sha1(f"{path.resolve().as_posix()}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+        return self.directorio / f"{clave.hexdigest()}.ogg"
+
+
+    async def pista(self, ruta: "PathLike", titulo: Optional[str]=None) -> Pista:
+        """
+        Devuelve una pista para el sonido en 'ruta', reproducida desde
+        el caché. Si no se puede transcodificar, se vuelve a usar FFmpeg
+        directamente sobre el archivo original.
+        """
+
+        titulo = titulo or partir_ruta(ruta)[1]
+
+        try:
+            ruta_ogg = await self.asegurar(ruta)
+        except (OSError, CalledProcessError) as err:
+            if self.log is not None:
+                self.log.warning(f"[CACHE] No se pudo cachear {ruta!r}: {err!r}")
+            if self.pool_ffmpeg is not None:
+                return Pista(titulo, lambda: self.pool_ffmpeg.fuente(ruta))
+            return Pista(titulo, lambda: FFmpegPCMAudio(str(ruta)))
+
+        paquetes = self._memoria.get(ruta_ogg.name)
+
+        if paquetes is None and ruta_ogg.stat().st_size <= self.max_bytes_entrada:
+            paquetes = await to_thread(self._cargar_paquetes, ruta_ogg)
+            self._guardar_en_memoria(ruta_ogg.name, paquetes)
+
+        if paquetes is None:
+            return Pista(titulo, lambda: self._fuente_desde_disco(ruta_ogg))
+
+        if ruta_ogg.name in self._memoria:
+            self._memoria.move_to_end(ruta_ogg.name)
+
+        return Pista(titulo, lambda: FuenteOpusCacheada(paquetes))
+
+
+    async def asegurar(self, ruta: "PathLike") -> Path:
+        """
+        Se asegura de que el sonido esté transcodificado en disco, y
+        devuelve la ruta al archivo Ogg.
+
+        Si varios pedidos llegan a la vez por el mismo sonido, se
+        transcodifica una sola vez.
+        """
+
+        ruta_ogg = await to_thread(self._buscar_transcodificado, ruta)
+
+        if ruta_ogg.name in self._memoria or ruta_ogg.exists():
+            return ruta_ogg
+
+        tarea = self._en_proceso.get(ruta_ogg.name)
+        if tarea is None:
+            tarea = create_task(to_thread(transcodificar_a_opus, ruta, ruta_ogg))
+            self._en_proceso[ruta_ogg.name] = tarea
+            tarea.add_done_callback(lambda _t: self._en_proceso.pop(ruta_ogg.name, None))
+
+        await tarea
+        return ruta_ogg
+
+
+    def _buscar_transcodificado(self, ruta: "PathLike") -> Path:
+        """
+        Devuelve la versión ya normalizada del sonido si se subió por
+        BotShot, o la ruta que le corresponde en el caché si no.
+        """
+
+        ruta_opus = get_sonido_opus(Path(ruta).as_posix())
+
+        if ruta_opus is not None and existe(ruta_opus):
+            return Path(ruta_opus)
+
+        return self.ruta_cacheada(ruta)
+
+
+    def vaciar_memoria(self) -> None:
+        """
+        Descarta todos los paquetes guardados en memoria.
+        """
+
+        self._memoria.clear()
+        self._bytes_en_memoria = 0
+
+
+    @staticmethod
+    def _cargar_paquetes(ruta_ogg: Path) -> PaquetesOpus:
+        """
+        Lee todos los paquetes de un archivo Ogg/Opus.
+        """
+
+        with open(ruta_ogg, "rb") as arch:
+            return tuple(leer_paquetes_opus(arch))
+
+
+    @staticmethod
+    def _fuente_desde_disco(ruta_ogg: Path) -> FuenteOpusCacheada:
+        """
+        Crea una fuente que va leyendo los paquetes del archivo
+        a medida que se reproducen.
+        """
+
+        arch = open(ruta_ogg, "rb") # pylint: disable=consider-using-with
+        return FuenteOpusCacheada(leer_paquetes_opus(arch), archivo=arch)
+
+
+    def _guardar_en_memoria(self, clave: str, paquetes: PaquetesOpus) -> None:
+        """
+        Guarda los paquetes en memoria, desalojando los usados menos
+        recientemente hasta respetar el límite.
+        """
+
+        tamanio = sum(len(paquete) for paquete in paquetes)
+
+        if clave in self._memoria or tamanio > self.max_bytes:
+            return
+
+        self._memoria[clave] = paquetes
+        self._bytes_en_memoria += tamanio
+
+        while self._bytes_en_memoria > self.max_bytes:
+            _, desalojados = self._memoria.popitem(last=False)
+            self._bytes_en_memoria -= sum(len(paquete) for paquete in desalojados)
@@ -0,0 +1,394 @@
+"""
+Módulo para la cola de reproducción de audio de cada guild.
+"""
+
+from asyncio import create_task, ensure_future, get_running_loop
+from collections import deque
+from functools import partial
+from inspect import isawaitable
+from typing import (TYPE_CHECKING, Awaitable, Callable, Optional, TypeAlias,
+                    Union)
+
+from ..enums import ModoBucle
+
+if TYPE_CHECKING:
+
+    from asyncio import AbstractEventLoop, Future, Task
+
+    from discord import AudioSource, Guild, VoiceClient
+
+    from ..logger import BotLogger
+
+
+CreadorFuente: TypeAlias = Callable[[], Union["AudioSource", Awaitable["AudioSource"]]]
+
+
+def _liberar_fuente(precarga: "Future[AudioSource]") -> None:
+    """
+    Libera la fuente de una precarga que ya no se va a usar.
+    """
+
+    if not precarga.cancelled() and precarga.exception() is None:
+        precarga.result().cleanup()
+
+
+class Pista:
+    """
+    Una pista de audio encolada, que sabe cómo crear
+    su propia fuente de audio.
+    """
+
+    def __init__(self, titulo: str, creador_fuente: CreadorFuente) -> None:
+        """
+        Inicializa una instancia de 'Pista'.
+
+        'creador_fuente' se llama cada vez que la pista necesita
+        una fuente nueva, ya que una fuente de audio no se puede
+        reproducir dos veces. Puede devolver la fuente directamente
+        o un awaitable, si para crearla hay que esperar algo.
+        """
+
+        self.titulo: str = titulo
+        self._creador_fuente: CreadorFuente = creador_fuente
+        self._precarga: Optional["Future[AudioSource]"] = None
+
+
+    @property
+    def precargada(self) -> bool:
+        """
+        Verifica si la pista ya tiene una fuente lista o en camino.
+        """
+
+        return self._precarga is not None
+
+
+    def precargar(self) -> None:
+        """
+        Empieza a crear la fuente de antemano, de manera que el proceso
+        de FFmpeg ya esté decodificando para cuando la pista deba sonar.
+        """
+
+        if self._precarga is None:
+            self._precarga = ensure_future(self._crear_fuente())
+
+
+    async def _crear_fuente(self) -> "AudioSource":
+        """
+        Crea una fuente nueva, esperándola si hace falta.
+        """
+
+        fuente = self._creador_fuente()
+
+        if isawaitable(fuente):
+            fuente = await fuente
+
+        return fuente
+
+
+    async def tomar_fuente(self) -> "AudioSource":
+        """
+        Devuelve la fuente precargada (o una nueva si no había), y
+        la desliga de la pista.
+        """
+
+        self.precargar()
+        precarga, self._precarga = self._precarga, None
+        return await precarga
+
+
+    def descartar(self) -> None:
+        """
+        Libera la fuente precargada, si es que había una.
+        """
+
+        precarga, self._precarga = self._precarga, None
+
+        if precarga is not None:
+            precarga.cancel()
+            precarga.add_done_callback(_liberar_fuente)
+
+
+class ColaAudio:
+    """
+    Cola de reproducción de un guild.
+
+    Cuando una pista termina, el callback 'after' del cliente de voz
+    arranca la siguiente, que ya fue precargada mientras sonaba la
+    anterior.
+    """
+
+    def __init__(self,
+                 guild: "Guild",
+                 log: Optional["BotLogger"]=None,
+                 loop: Optional["AbstractEventLoop"]=None) -> None:
+        """
+        Inicializa una instancia de 'ColaAudio'.
+        """
+
+        self.guild: "Guild" = guild
+        self.log: Optional["BotLogger"] = log
+        self.modo_bucle: ModoBucle = ModoBucle.DESACTIVADO
+        self.actual: Optional[Pista] = None
+
+        self._loop: "AbstractEventLoop" = loop or get_running_loop()
+        self._pendientes: deque[Pista] = deque()
+        self._generacion: int = 0
+        self._saltando: bool = False
+        self._preparando: bool = False
+        self._tareas: set["Task"] = set()
+
+
+    @property
+    def cliente_voz(self) -> Optional["VoiceClient"]:
+        """
+        Devuelve el cliente de voz actual del guild.
+        """
+
+        return self.guild.voice_client
+
+
+    @property
+    def ocupada(self) -> bool:
+        """
+        Verifica si hay alguna pista sonando.
+        """
+
+        return self.actual is not None
+
+
+    def __len__(self) -> int:
+        """
+        Cuenta la cantidad de pistas pendientes.
+        """
+
+        return len(self._pendientes)
+
+
+    def encolar(self, pista: Pista) -> int:
+        """
+        Agrega una pista al final de la cola.
+
+        Devuelve la posición en la que quedó la pista, siendo `0`
+        si empezó a sonar inmediatamente.
+        """
+
+        self._pendientes.append(pista)
+
+        if not self.ocupada:
+            self._reproducir_siguiente()
+            return 0
+
+        self._precargar_siguiente()
+        return len(self._pendientes)
+
+
+    def interrumpir(self, pista: Pista) -> None:
+        """
+        Reproduce una pista inmediatamente, cortando la que esté
+        sonando. El resto de la cola se mantiene.
+        """
+
+        self._pendientes.appendleft(pista)
+
+        if self.ocupada:
+            self.saltar()
+        else:
+            self._reproducir_siguiente()
+
+
+    def saltar(self) -> Optional[Pista]:
+        """
+        Salta la pista actual, si es que hay una.
+        Devuelve la pista saltada.
+        """
+
+        saltada = self.actual
+
+        if saltada is None:
+            return None
+
+        self._saltando = True
+
+        if self._preparando:
+            # Todavía no empezó a sonar, así que no va a haber callback
+            self._reproducir_siguiente()
+        elif self.cliente_voz is not None:
+            # El callback 'after' se encarga de pasar a la siguiente
+            self.cliente_voz.stop()
+
+        return saltada
+
+
+    def limpiar(self) -> int:
+        """
+        Vacía las pistas pendientes, sin tocar la actual.
+        Devuelve la cantidad de pistas quitadas.
+        """
+
+        cantidad = len(self._pendientes)
+
+        while self._pendientes:
+            self._pendientes.pop().descartar()
+
+        return cantidad
+
+
+    def detener(self) -> None:
+        """
+        Vacía la cola y corta la pista actual.
+        """
+
+        self.limpiar()
+        actual, self.actual = self.actual, None
+        self._generacion += 1
+        self._preparando = False
+
+        if actual is not None:
+            actual.descartar()
+
+        if self.cliente_voz is not None:
+            self.cliente_voz.stop()
+
+
+    def listar(self) -> list[str]:
+        """
+        Devuelve los títulos de las pistas pendientes, en orden.
+        """
+
+        return [pista.titulo for pista in self._pendientes]
+
+
+    def _proxima_pista(self) -> Optional[Pista]:
+        """
+        Devuelve la pista que sonaría después de la actual,
+        sin sacarla de la cola.
+        """
+
+        if self.modo_bucle == ModoBucle.PISTA and self.actual is not None:
+            return self.actual
+
+        if self._pendientes:
+            return self._pendientes[0]
+
+        if self.modo_bucle == ModoBucle.COLA:
+            return self.actual
+
+        return None
+
+
+    def _precargar_siguiente(self) -> None:
+        """
+        Precarga la fuente de la próxima pista a sonar.
+        """
+
+        proxima = self._proxima_pista()
+
+        if proxima is not None:
+            proxima.precargar()
+
+
+    def _sacar_siguiente(self) -> Optional[Pista]:
+        """
+        Saca de la cola la siguiente pista a reproducir, teniendo
+        en cuenta el modo de bucle.
+        """
+
+        terminada = self.actual
+        saltando, self._saltando = self._saltando, False
+
+        if terminada is not None:
+            if self.modo_bucle == ModoBucle.PISTA and not saltando:
+                return terminada
+
+            if self.modo_bucle == ModoBucle.COLA:
+                self._pendientes.append(terminada)
+            else:
+                terminada.descartar()
+
+        return self._pendientes.popleft() if self._pendientes else None
+
+
+    def _reproducir_siguiente(self) -> None:
+        """
+        Reproduce la siguiente pista de la cola, si hay una.
+        """
+
+        pista = self._sacar_siguiente()
+        self.actual = pista
+        self._generacion += 1
+
+        if pista is None:
+            self._preparando = False
+            return
+
+        self._preparando = True
+        tarea = create_task(self._reproducir(pista, self._generacion))
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+
+    async def _reproducir(self, pista: Pista, generacion: int) -> None:
+        """
+        Espera la fuente de la pista y la reproduce, a menos que
+        mientras tanto la cola haya cambiado de pista.
+        """
+
+        try:
+            fuente = await pista.tomar_fuente()
+        except Exception as err: # pylint: disable=broad-except
+            if self.log is not None:
+                self.log.error(f"[AUDIO] No se pudo preparar {pista.titulo!r}: {err!r}")
+
+            if generacion == self._generacion:
+                # No se repite ni se reencola una pista rota
+                self.actual = None
+                self._reproducir_siguiente()
+            return
+
+        if generacion != self._generacion:
+            fuente.cleanup()
+            return
+
+        reservar = getattr(fuente, "reservar", None)
+        if reservar is not None:
+            # Las fuentes del pool de FFmpeg ocupan lugar recién al sonar
+            await reservar()
+
+            if generacion != self._generacion:
+                fuente.cleanup()
+                return
+
+        self._preparando = False
+        cl_voz = self.cliente_voz
+
+        if cl_voz is None or not cl_voz.is_connected():
+            fuente.cleanup()
+            self.detener()
+            return
+
+        cl_voz.play(fuente, after=partial(self._al_terminar, generacion))
+        self._precargar_siguiente()
+
+
+    def _al_terminar(self, generacion: int, error: Optional[Exception]) -> None:
+        """
+        Callback del reproductor de discord. Corre en el hilo
+        del reproductor, así que se delega al loop de eventos.
+        """
+
+        if error is not None and self.log is not None:
+            self.log.error(f"[AUDIO] Error reproduciendo en {self.guild.name!r}: {error!r}")
+
+        self._loop.call_soon_threadsafe(self._pista_terminada, generacion)
+
+
+    def _pista_terminada(self, generacion: int) -> None:
+        """
+        Pasa a la siguiente pista, a menos que el aviso sea de una
+        reproducción vieja que ya fue reemplazada.
+        """
+
+        if generacion != self._generacion:
+            return
+
+        self._reproducir_siguiente()
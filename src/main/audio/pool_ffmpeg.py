@@ -0,0 +1,435 @@
+"""
+Módulo para el pool de procesos de FFmpeg precalentados.
+
+Lanzar un proceso nuevo es lo que más tarda al reproducir un sonido
+corto, así que se mantienen algunos procesos ya lanzados, esperando
+su entrada por un pipe. Además se acota cuántos pueden estar
+reproduciendo a la vez, para que una ráfaga de pedidos no ponga a
+decodificar decenas de procesos.
+"""
+
+from asyncio import (CancelledError, Semaphore, create_task, ensure_future,
+                     get_running_loop, shield, to_thread)
+from collections import deque
+from os import PathLike, fspath
+from subprocess import DEVNULL, PIPE, Popen, TimeoutExpired
+from threading import Thread
+from typing import (TYPE_CHECKING, Awaitable, Callable, Iterable, Iterator,
+                    Optional, TypeAlias, Union)
+
+from discord import AudioSource
+from discord.opus import Encoder as OpusEncoder
+
+if TYPE_CHECKING:
+
+    from asyncio import AbstractEventLoop, Future, Task
+
+    from ..logger import BotLogger
+
+
+EntradaFFmpeg: TypeAlias = Union[PathLike, str, bytes, Iterable[bytes]]
+
+TAMANIO_BLOQUE: int = 65536 # 64 KB
+
+ARGS_SALIDA_FFMPEG: tuple[str, ...] = ("-f", "s16le",
+                                       "-ar", "48000",
+                                       "-ac", "2",
+                                       "-loglevel", "warning",
+                                       "pipe:1")
+"""
+Argumentos de salida de todos los procesos: PCM en stdout, igual que
+'discord.FFmpegPCMAudio'.
+"""
+
+ARGS_FFMPEG: tuple[str, ...] = ("ffmpeg", "-i", "pipe:0", *ARGS_SALIDA_FFMPEG)
+"""
+Argumentos de los procesos precalentados, que leen su entrada de stdin.
+"""
+
+
+def _bloques(entrada: Union[bytes, Iterable[bytes]]) -> Iterator[bytes]:
+    """
+    Parte una entrada en bloques de bytes para mandar a FFmpeg.
+    """
+
+    if isinstance(entrada, bytes):
+        vista = memoryview(entrada)
+        for inicio in range(0, len(vista), TAMANIO_BLOQUE):
+            yield vista[inicio:inicio + TAMANIO_BLOQUE]
+
+    else:
+        yield from entrada
+
+
+def _matar(proceso: Popen) -> None:
+    """
+    Mata un proceso y espera a que termine.
+    """
+
+    proceso.kill()
+    try:
+        proceso.wait(timeout=5)
+    except TimeoutExpired:
+        pass
+
+
+def _matar_lanzado(lanzamiento: "Future[Popen]") -> None:
+    """
+    Mata el proceso de un lanzamiento que ya nadie va a usar.
+    """
+
+    if not lanzamiento.cancelled() and lanzamiento.exception() is None:
+        _matar(lanzamiento.result())
+
+
+class FuenteFFmpegPrecalentada(AudioSource):
+    """
+    Fuente de audio que usa un proceso de FFmpeg tomado del pool.
+
+    Mientras no suena no ocupa lugar en el pool: antes de reproducirla
+    hay que esperar 'reservar', como hace la cola de audio.
+    """
+
+    def __init__(self,
+                 proceso: Popen,
+                 entrada: Optional[EntradaFFmpeg]=None,
+                 *,
+                 al_cerrar: Optional[Callable[[], None]]=None,
+                 tomar_lugar: Optional[Callable[[], Awaitable[None]]]=None,
+                 devolver_lugar: Optional[Callable[[], None]]=None) -> None:
+        """
+        Inicializa una instancia de 'FuenteFFmpegPrecalentada'.
+
+        Si hay 'entrada', un hilo aparte se la va escribiendo al proceso,
+        que ya estaba lanzado de antemano; si no, el proceso lee solo.
+        """
+
+        self._proceso: Optional[Popen] = proceso
+        self._al_cerrar: Optional[Callable[[], None]] = al_cerrar
+        self._tomar_lugar: Optional[Callable[[], Awaitable[None]]] = tomar_lugar
+        self._devolver_lugar: Optional[Callable[[], None]] = devolver_lugar
+        self._con_lugar: bool = False
+
+        if entrada is not None:
+            Thread(target=self._escribir,
+                   args=(entrada,),
+                   daemon=True,
+                   name=f"ffmpeg-pool-escritor:{id(self):#x}").start()
+
+
+    def _escribir(self, entrada: Union[bytes, Iterable[bytes]]) -> None:
+        """
+        Escribe la entrada en el stdin del proceso, y lo cierra al
+        terminar para que FFmpeg procese lo que le quede.
+        """
+
+        proceso = self._proceso
+        if proceso is None:
+            return
+
+        try:
+            for bloque in _bloques(entrada):
+                if self._proceso is None:
+                    return
+                proceso.stdin.write(bloque)
+
+            proceso.stdin.close()
+        except (OSError, ValueError):
+            # El proceso ya se cerró, no hay a quién escribirle
+            return
+
+
+    async def reservar(self) -> None:
+        """
+        Espera un lugar entre los procesos que reproducen a la vez. Se
+        llama justo antes de empezar a sonar, para que las fuentes
+        precargadas no ocupen lugar mientras esperan su turno.
+        """
+
+        if self._con_lugar or self._tomar_lugar is None or self._proceso is None:
+            return
+
+        await self._tomar_lugar()
+        self._con_lugar = True
+
+        if self._proceso is None:
+            # Se liberó mientras esperaba
+            self._soltar_lugar()
+
+
+    def _soltar_lugar(self) -> None:
+        """
+        Devuelve el lugar en el pool, si es que tenía uno.
+        """
+
+        con_lugar, self._con_lugar = self._con_lugar, False
+
+        if con_lugar and self._devolver_lugar is not None:
+            self._devolver_lugar()
+
+
+    def read(self) -> bytes:
+        """
+        Lee un frame de 20 ms de PCM, o `b''` si se terminó el audio.
+        """
+
+        if self._proceso is None:
+            return b""
+
+        ret = self._proceso.stdout.read(OpusEncoder.FRAME_SIZE)
+        if len(ret) != OpusEncoder.FRAME_SIZE:
+            return b""
+
+        return ret
+
+
+    def is_opus(self) -> bool:
+        """
+        La salida es PCM, así que discord la tiene que codificar.
+        """
+
+        return False
+
+
+    def cleanup(self) -> None:
+        """
+        Mata el proceso y le devuelve su lugar al pool.
+        """
+
+        proceso, self._proceso = self._proceso, None
+
+        if proceso is None:
+            return
+
+        _matar(proceso)
+
+        for pipe in (proceso.stdin, proceso.stdout):
+            try:
+                if pipe is not None:
+                    pipe.close()
+            except OSError:
+                pass
+
+        if self._al_cerrar is not None:
+            self._al_cerrar()
+
+        self._soltar_lugar()
+
+
+class PoolFFmpeg:
+    """
+    Pool de procesos de FFmpeg precalentados, con un máximo de
+    procesos reproduciendo a la vez.
+    """
+
+    def __init__(self,
+                 precalentados: int=2,
+                 max_procesos: int=8,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'PoolFFmpeg'.
+
+        Con 'precalentados' en `0` no se lanza ningún proceso de antemano,
+        pero se sigue respetando el máximo de 'max_procesos'.
+        """
+
+        self.precalentados: int = precalentados
+        self.max_procesos: int = max_procesos
+        self.log: Optional["BotLogger"] = log
+
+        self._libres: deque[Popen] = deque()
+        self._lanzando: int = 0
+        self._en_uso: int = 0
+        self._cerrado: bool = False
+        self._semaforo: Semaphore = Semaphore(max_procesos)
+        self._loop: Optional["AbstractEventLoop"] = None
+        self._tareas: set["Task"] = set()
+        self._lanzamientos: set["Future[Popen]"] = set()
+
+
+    @property
+    def en_uso(self) -> int:
+        """
+        Cantidad de procesos reproduciendo en este momento.
+        """
+
+        return self._en_uso
+
+
+    @property
+    def libres(self) -> int:
+        """
+        Cantidad de procesos precalentados esperando.
+        """
+
+        return len(self._libres)
+
+
+    @staticmethod
+    def _lanzar(ruta: Optional[str]=None) -> Popen:
+        """
+        Lanza un proceso nuevo. Sin 'ruta' queda esperando su entrada
+        por stdin; con una, lee el archivo directamente.
+        """
+
+        if ruta is None:
+            return Popen(ARGS_FFMPEG, stdin=PIPE, stdout=PIPE, stderr=DEVNULL)
+
+        return Popen(("ffmpeg", "-i", ruta, *ARGS_SALIDA_FFMPEG),
+                     stdin=DEVNULL,
+                     stdout=PIPE,
+                     stderr=DEVNULL)
+
+
+    async def _lanzar_en_hilo(self, ruta: Optional[str]=None) -> Popen:
+        """
+        Lanza un proceso en otro hilo. Si se cancela la espera, o si se
+        cierra el pool mientras tanto, el proceso se mata apenas termina
+        de lanzarse, en vez de quedar perdido.
+        """
+
+        lanzamiento = ensure_future(to_thread(self._lanzar, ruta))
+        self._lanzamientos.add(lanzamiento)
+        lanzamiento.add_done_callback(self._lanzamientos.discard)
+
+        try:
+            proceso = await shield(lanzamiento)
+        except CancelledError:
+            lanzamiento.add_done_callback(_matar_lanzado)
+            raise
+
+        if self._cerrado:
+            await to_thread(_matar, proceso)
+            raise RuntimeError("El pool de FFmpeg ya se cerró.")
+
+        return proceso
+
+
+    async def iniciar(self) -> None:
+        """
+        Lanza los procesos precalentados iniciales.
+        """
+
+        self._loop = get_running_loop()
+        self._reponer()
+
+
+    async def fuente(self,
+                     entrada: EntradaFFmpeg,
+                     al_cerrar: Optional[Callable[[], None]]=None) -> FuenteFFmpegPrecalentada:
+        """
+        Devuelve una fuente de audio para la entrada, que puede ser una
+        ruta, los bytes del archivo, o un iterable de bloques de bytes.
+
+        Las rutas se le pasan a FFmpeg tal cual, en un proceso propio,
+        porque formatos como MP4 pueden necesitar saltar al final del
+        archivo; lo demás se le escribe a un proceso precalentado.
+
+        'al_cerrar' se llama cuando se libera la fuente, desde el hilo
+        que sea, por ejemplo para cortar la descarga que la alimenta.
+
+        La fuente no ocupa lugar en el pool hasta que se la 'reserva'
+        para reproducirla.
+        """
+
+        self._loop = get_running_loop()
+
+        if isinstance(entrada, (str, PathLike)):
+            proceso = await self._lanzar_en_hilo(fspath(entrada))
+            entrada = None
+        else:
+            proceso = await self._tomar_proceso()
+            self._reponer()
+
+        return FuenteFFmpegPrecalentada(proceso,
+                                        entrada,
+                                        al_cerrar=al_cerrar,
+                                        tomar_lugar=self._tomar_lugar,
+                                        devolver_lugar=self._liberar)
+
+
+    async def _tomar_proceso(self) -> Popen:
+        """
+        Toma un proceso precalentado que siga vivo, o lanza uno nuevo
+        si no queda ninguno.
+        """
+
+        while self._libres:
+            proceso = self._libres.popleft()
+            if proceso.poll() is None:
+                return proceso
+
+        return await self._lanzar_en_hilo()
+
+
+    async def _tomar_lugar(self) -> None:
+        """
+        Espera a que haya lugar para un proceso más reproduciendo.
+        """
+
+        await self._semaforo.acquire()
+        self._en_uso += 1
+
+
+    def _reponer(self) -> None:
+        """
+        Lanza en segundo plano los procesos que falten para volver
+        a tener los precalentados pedidos.
+        """
+
+        while not self._cerrado and len(self._libres) + self._lanzando < self.precalentados:
+            self._lanzando += 1
+            tarea = create_task(self._precalentar())
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+
+
+    async def _precalentar(self) -> None:
+        """
+        Lanza un proceso y lo deja esperando en el pool.
+        """
+
+        try:
+            self._libres.append(await self._lanzar_en_hilo())
+        except (OSError, RuntimeError) as err:
+            if self.log is not None and not self._cerrado:
+                self.log.warning(f"[FFMPEG] No se pudo precalentar un proceso: {err!r}")
+        finally:
+            self._lanzando -= 1
+
+
+    def _liberar(self) -> None:
+        """
+        Devuelve un lugar al pool. Se puede llamar desde cualquier hilo,
+        como el del reproductor de discord.
+        """
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._devolver_lugar)
+
+
+    def _devolver_lugar(self) -> None:
+        """
+        Libera el lugar de un proceso que terminó.
+        """
+
+        self._en_uso -= 1
+        self._semaforo.release()
+
+
+    def cerrar(self) -> None:
+        """
+        Mata los procesos precalentados que estén esperando, y los que
+        se estén lanzando apenas terminen de lanzarse.
+        """
+
+        self._cerrado = True
+
+        for tarea in self._tareas:
+            tarea.cancel()
+
+        for lanzamiento in self._lanzamientos:
+            lanzamiento.add_done_callback(_matar_lanzado)
+
+        while self._libres:
+            _matar(self._libres.popleft())
@@ -0,0 +1,223 @@
+"""
+Módulo para el manejo de las conexiones de voz de cada guild.
+"""
+
+from asyncio import create_task, sleep
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+
+    from asyncio import Task
+
+    from discord import Client, Guild, VoiceChannel, VoiceClient
+
+    from ..logger import BotLogger
+
+
+VENTANA_INACTIVIDAD: float = 600 # en segundos
+INTERVALO_REVISION: float = 30 # en segundos
+
+
+class GestorVoz:
+    """
+    Maneja las conexiones de voz del bot.
+
+    Cambiar de canal dentro de un mismo guild siempre mueve la conexión
+    existente en vez de cortarla y abrir otra, y las conexiones que pasan
+    demasiado tiempo sin reproducir nada se cierran solas, liberando sus
+    sockets y codificadores.
+    """
+
+    def __init__(self,
+                 cliente: "Client",
+                 *,
+                 ventana_inactividad: float=VENTANA_INACTIVIDAD,
+                 intervalo: float=INTERVALO_REVISION,
+                 al_desconectar: Optional[Callable[["Guild"], None]]=None,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'GestorVoz'.
+
+        'al_desconectar' se llama antes de cerrar una conexión, por
+        ejemplo para vaciar la cola de reproducción del guild.
+        """
+
+        self.cliente: "Client" = cliente
+        self.ventana_inactividad: float = ventana_inactividad
+        self.intervalo: float = intervalo
+        self.al_desconectar: Optional[Callable[["Guild"], None]] = al_desconectar
+        self.log: Optional["BotLogger"] = log
+
+        self._ultima_actividad: dict[int, float] = {}
+        self._tarea: Optional["Task"] = None
+
+
+    @property
+    def conexiones(self) -> int:
+        """
+        Cantidad de conexiones de voz abiertas.
+        """
+
+        return len(self.cliente.voice_clients)
+
+
+    @property
+    def reproduciendo(self) -> int:
+        """
+        Cantidad de conexiones que están reproduciendo algo.
+        """
+
+        return sum(1 for cl_voz in self.cliente.voice_clients if cl_voz.is_playing())
+
+
+    def estadisticas(self) -> dict[str, int]:
+        """
+        Resume el estado de las conexiones, para saber cuánta
+        capacidad se está usando.
+        """
+
+        conexiones = self.conexiones
+        reproduciendo = self.reproduciendo
+
+        return {"conexiones": conexiones,
+                "reproduciendo": reproduciendo,
+                "inactivas": conexiones - reproduciendo}
+
+
+    def registrar_actividad(self, guild: "Guild") -> None:
+        """
+        Anota que la conexión del guild se está usando ahora.
+        """
+
+        self._ultima_actividad[guild.id] = monotonic()
+
+
+    def inactivo_hace(self, guild: "Guild") -> float:
+        """
+        Devuelve hace cuántos segundos que la conexión del guild
+        no se usa, o `0` si no se tiene registro.
+        """
+
+        ultima = self._ultima_actividad.get(guild.id)
+        return 0.0 if ultima is None else monotonic() - ultima
+
+
+    async def conectar(self, canal: "VoiceChannel") -> "VoiceClient":
+        """
+        Conecta al canal de voz. Si ya había una conexión en el guild,
+        la mueve a ese canal.
+        """
+
+        cl_voz = canal.guild.voice_client
+
+        if cl_voz is not None and cl_voz.is_connected():
+            if cl_voz.channel != canal:
+                await cl_voz.move_to(canal)
+
+        else:
+            if cl_voz is not None:
+                # Quedó una conexión a medias, que no sirve para moverse
+                await cl_voz.disconnect(force=True)
+
+            cl_voz = await canal.connect()
+
+        self.registrar_actividad(canal.guild)
+        return cl_voz
+
+
+    async def desconectar(self, guild: "Guild") -> bool:
+        """
+        Cierra la conexión de voz del guild.
+        Devuelve `True` si había una conexión.
+        """
+
+        self._ultima_actividad.pop(guild.id, None)
+        cl_voz = guild.voice_client
+
+        if cl_voz is None:
+            return False
+
+        if self.al_desconectar is not None:
+            self.al_desconectar(guild)
+
+        await cl_voz.disconnect()
+        return True
+
+
+    async def desconectar_todos(self) -> int:
+        """
+        Cierra todas las conexiones de voz.
+        Devuelve la cantidad de conexiones cerradas.
+        """
+
+        cantidad = 0
+
+        for cl_voz in list(self.cliente.voice_clients):
+            cantidad += await self.desconectar(cl_voz.guild)
+
+        return cantidad
+
+
+    async def revisar(self) -> int:
+        """
+        Cierra las conexiones que superaron la ventana de inactividad.
+        Una conexión en pausa cuenta como inactiva.
+
+        Devuelve la cantidad de conexiones cerradas.
+        """
+
+        ahora = monotonic()
+        cerradas = 0
+
+        for cl_voz in list(self.cliente.voice_clients):
+            guild = cl_voz.guild
+
+            if cl_voz.is_playing():
+                self._ultima_actividad[guild.id] = ahora
+                continue
+
+            ultima = self._ultima_actividad.setdefault(guild.id, ahora)
+
+            if ahora - ultima >= self.ventana_inactividad:
+                if self.log is not None:
+                    self.log.info(f"[VOZ] Desconectando de {guild.name!r} por inactividad.")
+
+                cerradas += await self.desconectar(guild)
+
+        return cerradas
+
+
+    def iniciar(self) -> None:
+        """
+        Empieza a revisar periódicamente las conexiones inactivas.
+        """
+
+        if self._tarea is None:
+            self._tarea = create_task(self._vigilar())
+
+
+    async def _vigilar(self) -> None:
+        """
+        Revisa las conexiones cada tanto, hasta que se cancele.
+        """
+
+        while True:
+            await sleep(self.intervalo)
+
+            try:
+                await self.revisar()
+            except Exception as err: # pylint: disable=broad-except
+                if self.log is not None:
+                    self.log.error(f"[VOZ] Falló la revisión de conexiones: {err!r}")
+
+
+    def cerrar(self) -> None:
+        """
+        Deja de revisar las conexiones.
+        """
+
+        tarea, self._tarea = self._tarea, None
+
+        if tarea is not None:
+            tarea.cancel()
@@ -0,0 +1,258 @@
+"""
+Módulo para sondear archivos de audio con ffprobe.
+
+Antes de decodificar cualquier audio que venga de afuera, se averigua
+cuánto pesa y cuánto dura, de manera que los archivos que no cumplen con
+los límites se rechacen sin gastar un proceso de FFmpeg en ellos.
+"""
+
+from asyncio import (Semaphore, create_subprocess_exec, get_running_loop, shield,
+                     to_thread, wait_for)
+from collections import OrderedDict
+from hashlib import sha256
+from json import JSONDecodeError, loads
+from subprocess import DEVNULL, PIPE
+from typing import TYPE_CHECKING, NamedTuple, Optional
+
+if TYPE_CHECKING:
+
+    from asyncio import Future
+    from os import PathLike
+
+    from aiohttp import ClientSession
+
+    from ..logger import BotLogger
+
+
+ARGS_FFPROBE: tuple[str, ...] = ("ffprobe",
+                                 "-v", "error",
+                                 "-show_entries", "format=duration,size:stream=codec_type",
+                                 "-of", "json")
+
+MAX_SONDEOS_CACHEADOS: int = 1024
+MAX_SONDEOS_A_LA_VEZ: int = 4
+TIEMPO_MAXIMO_SONDEO: float = 15 # en segundos
+
+
+class InfoAudio(NamedTuple):
+    """
+    Lo que se sabe de un archivo de audio antes de decodificarlo.
+    """
+
+    tamanio: Optional[int]
+    duracion: Optional[float]
+    tiene_audio: bool
+    tipo: Optional[str] = None
+
+
+def _parsear_salida(salida: bytes, tamanio: Optional[int]) -> InfoAudio:
+    """
+    Interpreta el JSON que devuelve ffprobe.
+    """
+
+    try:
+        datos = loads(salida)
+    except JSONDecodeError:
+        return InfoAudio(tamanio, None, False)
+
+    formato = datos.get("format", {})
+    streams = datos.get("streams", [])
+
+    try:
+        duracion = float(formato["duration"])
+    except (KeyError, ValueError):
+        duracion = None
+
+    try:
+        tamanio = int(formato["size"])
+    except (KeyError, ValueError):
+        pass
+
+    return InfoAudio(tamanio,
+                     duracion,
+                     any(stream.get("codec_type") == "audio" for stream in streams))
+
+
+def _hash_archivo(ruta: "PathLike") -> str:
+    """
+    Calcula el hash del contenido de un archivo.
+    """
+
+    with open(ruta, "rb") as arch:
+        hasheador = sha256()
+        while bloque := arch.read(65536):
+            hasheador.update(bloque)
+
+    return hasheador.hexdigest()
+
+
+class SondeoAudio:
+    """
+    Servicio compartido para sondear audios con ffprobe, sin
+    bloquear el loop de eventos.
+
+    Los resultados se guardan según el contenido del archivo: el hash
+    para los archivos locales, y el ETag que manda el servidor (o la
+    URL, si no manda ninguno) para los remotos.
+    """
+
+    def __init__(self,
+                 *,
+                 max_cacheados: int=MAX_SONDEOS_CACHEADOS,
+                 max_a_la_vez: int=MAX_SONDEOS_A_LA_VEZ,
+                 tiempo_maximo: float=TIEMPO_MAXIMO_SONDEO,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'SondeoAudio'.
+        """
+
+        self.max_cacheados: int = max_cacheados
+        self.tiempo_maximo: float = tiempo_maximo
+        self.log: Optional["BotLogger"] = log
+
+        self._cache: OrderedDict[str, InfoAudio] = OrderedDict()
+        self._en_curso: dict[str, "Future[InfoAudio]"] = {}
+        self._semaforo: Semaphore = Semaphore(max_a_la_vez)
+
+
+    def __len__(self) -> int:
+        """
+        Cuenta la cantidad de resultados en caché.
+        """
+
+        return len(self._cache)
+
+
+    async def sondear(self,
+                      entrada: str,
+                      clave: str,
+                      tamanio: Optional[int]=None) -> InfoAudio:
+        """
+        Sondea una entrada (ruta o URL), o devuelve el resultado que
+        ya se tenía bajo 'clave'. Si hay otro sondeo en curso con la
+        misma clave, se espera a ese en vez de lanzar otro.
+        """
+
+        if clave in self._cache:
+            self._cache.move_to_end(clave)
+            return self._cache[clave]
+
+        if clave in self._en_curso:
+            # Si cancelan a uno de los que espera, no se cancela el sondeo de los demás
+            return await shield(self._en_curso[clave])
+
+        futuro = get_running_loop().create_future()
+        self._en_curso[clave] = futuro
+
+        try:
+            info = await self._ejecutar_ffprobe(entrada, tamanio)
+            definitivo = info is not None
+            info = info or InfoAudio(tamanio, None, False)
+        except BaseException as err:
+            if not futuro.done():
+                futuro.set_exception(err)
+                # Que nadie se quede esperando, pero sin avisos de excepción sin leer
+                futuro.exception()
+            raise
+        else:
+            if not futuro.done():
+                futuro.set_result(info)
+        finally:
+            del self._en_curso[clave]
+
+        if definitivo:
+            self._guardar(clave, info)
+
+        return info
+
+
+    async def sondear_archivo(self, ruta: "PathLike") -> InfoAudio:
+        """
+        Sondea un archivo local.
+        """
+
+        clave = await to_thread(_hash_archivo, ruta)
+        return await self.sondear(str(ruta), clave)
+
+
+    async def sondear_url(self,
+                          sesion: "ClientSession",
+                          url: str,
+                          *,
+                          tamanio_maximo: Optional[int]=None) -> InfoAudio:
+        """
+        Sondea un archivo remoto.
+
+        Primero se miran sólo los encabezados de la respuesta; si ya se
+        sabe que el archivo pesa más de 'tamanio_maximo' o que no es un
+        audio, no se llega a lanzar ffprobe.
+
+        Levanta 'aiohttp.ClientError' si no se puede acceder a la URL.
+        """
+
+        async with sesion.get(url) as resp:
+            resp.raise_for_status()
+            tipo = resp.content_type
+            tamanio = resp.content_length
+            etag = resp.headers.get("ETag")
+
+        if "audio" not in tipo:
+            return InfoAudio(tamanio, None, False, tipo)
+
+        if tamanio is not None and tamanio_maximo is not None and tamanio > tamanio_maximo:
+            return InfoAudio(tamanio, None, True, tipo)
+
+        clave = f"etag:{etag}" if etag else f"url:{url}"
+        info = await self.sondear(url, clave, tamanio)
+
+        return info._replace(tipo=tipo)
+
+
+    async def _ejecutar_ffprobe(self,
+                                entrada: str,
+                                tamanio: Optional[int]) -> Optional[InfoAudio]:
+        """
+        Lanza ffprobe sobre la entrada y espera su resultado.
+
+        Devuelve `None` si el sondeo falló por algo ajeno al archivo,
+        como que ffprobe no esté instalado o tarde demasiado, y por
+        lo tanto el resultado no se debería cachear.
+        """
+
+        async with self._semaforo:
+            try:
+                proceso = await create_subprocess_exec(*ARGS_FFPROBE, entrada,
+                                                       stdin=DEVNULL,
+                                                       stdout=PIPE,
+                                                       stderr=DEVNULL)
+            except OSError as err:
+                if self.log is not None:
+                    self.log.error(f"[AUDIO] No se pudo lanzar ffprobe: {err!r}")
+                return None
+
+            try:
+                salida, _ = await wait_for(proceso.communicate(), self.tiempo_maximo)
+            except TimeoutError:
+                proceso.kill()
+                await proceso.wait()
+                if self.log is not None:
+                    self.log.warning(f"[AUDIO] ffprobe tardó demasiado con {entrada!r}")
+                return None
+
+        if proceso.returncode != 0:
+            return InfoAudio(tamanio, None, False)
+
+        return _parsear_salida(salida, tamanio)
+
+
+    def _guardar(self, clave: str, info: InfoAudio) -> None:
+        """
+        Guarda un resultado, descartando los más viejos si se
+        supera el máximo.
+        """
+
+        self._cache[clave] = info
+        self._cache.move_to_end(clave)
+
+        while len(self._cache) > self.max_cacheados:
+            self._cache.popitem(last=False)
@@ -0,0 +1,154 @@
+"""
+Módulo para bajar audio por HTTP a medida que se reproduce.
+"""
+
+from asyncio import Queue, create_task, get_running_loop, run_coroutine_threadsafe
+from concurrent.futures import CancelledError
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from aiohttp import ClientError
+
+if TYPE_CHECKING:
+
+    from asyncio import AbstractEventLoop, Task
+
+    from aiohttp import ClientSession
+
+    from ..logger import BotLogger
+
+
+TAMANIO_BLOQUE_DESCARGA: int = 65536 # 64 KB
+MAX_BLOQUES_EN_BUFFER: int = 16
+
+
+class DescargaStreaming:
+    """
+    Descarga que se va pasando de a bloques a FFmpeg, en vez de bajar
+    el archivo entero a memoria antes de reproducirlo.
+
+    El buffer entre la descarga y FFmpeg está acotado, así que si FFmpeg
+    no consume, la descarga se frena. Si se pasa de 'tamanio_maximo'
+    bytes, la descarga se corta aunque el servidor no haya dicho cuánto
+    pesa el archivo.
+    """
+
+    def __init__(self,
+                 sesion: "ClientSession",
+                 url: str,
+                 *,
+                 max_bloques: int=MAX_BLOQUES_EN_BUFFER,
+                 tamanio_maximo: Optional[int]=None,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'DescargaStreaming'.
+        """
+
+        self.sesion: "ClientSession" = sesion
+        self.url: str = url
+        self.tamanio_maximo: Optional[int] = tamanio_maximo
+        self.log: Optional["BotLogger"] = log
+
+        # Vive en el loop de eventos; quien itera lo lee a través del loop
+        self._buffer: Queue[Optional[bytes]] = Queue(maxsize=max_bloques)
+        self._terminada: bool = False
+        self._tarea: Optional["Task"] = None
+        self._loop: Optional["AbstractEventLoop"] = None
+
+
+    def iniciar(self) -> None:
+        """
+        Empieza a descargar en segundo plano.
+        """
+
+        self._loop = get_running_loop()
+        self._tarea = create_task(self._descargar())
+
+
+    async def _descargar(self) -> None:
+        """
+        Baja el archivo y va dejando los bloques en el buffer.
+        Al terminar, de la forma que sea, avisa con un `None`.
+        """
+
+        try:
+            async with self.sesion.get(self.url) as resp:
+                resp.raise_for_status()
+
+                if self._excede(resp.content_length or 0):
+                    return
+
+                descargados = 0
+
+                async for bloque in resp.content.iter_chunked(TAMANIO_BLOQUE_DESCARGA):
+                    descargados += len(bloque)
+                    if self._excede(descargados):
+                        return
+
+                    await self._buffer.put(bloque)
+
+        except ClientError as err:
+            if self.log is not None:
+                self.log.warning(f"[AUDIO] Falló la descarga de {self.url!r}: {err!r}")
+
+        finally:
+            self._terminada = True
+            # Si el buffer está lleno, quien lee se entera al vaciarlo
+            if not self._buffer.full():
+                self._buffer.put_nowait(None)
+
+
+    def _excede(self, tamanio: int) -> bool:
+        """
+        Verifica si la descarga se pasa del tamaño máximo permitido.
+        """
+
+        if self.tamanio_maximo is None or tamanio <= self.tamanio_maximo:
+            return False
+
+        if self.log is not None:
+            self.log.warning(f"[AUDIO] Se cortó la descarga de {self.url!r} por superar " +
+                             f"los {self.tamanio_maximo} bytes.")
+        return True
+
+
+    async def _sacar(self) -> Optional[bytes]:
+        """
+        Saca un bloque del buffer, esperando si está vacío. Devuelve
+        `None` cuando ya no van a llegar más.
+        """
+
+        if self._terminada and self._buffer.empty():
+            return None
+
+        return await self._buffer.get()
+
+
+    def __iter__(self) -> Iterator[bytes]:
+        """
+        Itera los bloques a medida que llegan. Es bloqueante, y está
+        pensado para el hilo que le escribe a FFmpeg.
+        """
+
+        if self._loop is None:
+            return
+
+        while True:
+            try:
+                bloque = run_coroutine_threadsafe(self._sacar(), self._loop).result()
+            except (CancelledError, RuntimeError):
+                # El loop de eventos ya se cerró
+                return
+
+            if bloque is None:
+                return
+
+            yield bloque
+
+
+    def cancelar(self) -> None:
+        """
+        Cancela la descarga. Se puede llamar desde cualquier hilo.
+        """
+
+        if self._tarea is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._tarea.cancel)
@@ -0,0 +1,122 @@
+"""
+Módulo para transcodificar en segundo plano los sonidos subidos.
+
+Los sonidos se normalizan a Ogg/Opus de 48 kHz estéreo con el volumen
+nivelado, de manera que al reproducirlos ya no haga falta decodificar
+ni remuestrear el archivo original.
+"""
+
+from asyncio import Task, create_task, get_running_loop
+from concurrent.futures import Executor, ProcessPoolExecutor
+from hashlib import sha1
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from ..db.atajos import registrar_sonido
+from .cache_opus import transcodificar_a_opus
+
+if TYPE_CHECKING:
+
+    from os import PathLike
+
+    from ..logger import BotLogger
+
+
+FILTRO_NORMALIZACION: str = "loudnorm=I=-16:TP=-1.5:LRA=11"
+"""
+Filtro de FFmpeg para normalizar el volumen percibido (EBU R128).
+"""
+
+MAX_PROCESOS_TRANSCODIFICACION: int = 2
+
+
+class TranscodificadorSonidos:
+    """
+    Pool de procesos que transcodifica los sonidos subidos y los
+    registra en la DB.
+    """
+
+    def __init__(self,
+                 directorio: "PathLike",
+                 *,
+                 max_procesos: int=MAX_PROCESOS_TRANSCODIFICACION,
+                 pool: Optional[Executor]=None,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'TranscodificadorSonidos'.
+
+        Si no se le pasa un 'pool' compartido, crea uno propio recién
+        con el primer sonido a procesar.
+        """
+
+        self.directorio: Path = Path(directorio)
+        self.max_procesos: int = max_procesos
+        self.log: Optional["BotLogger"] = log
+
+        self._pool: Optional[Executor] = pool
+        self._pool_propio: bool = pool is None
+        self._tareas: set[Task] = set()
+
+
+    def ruta_destino(self, ruta: "PathLike") -> Path:
+        """
+        Devuelve dónde se guarda la versión transcodificada de un sonido.
+        """
+
+        path = Path(ruta)
+        clave = sha1(path.as_posix().encode()).hexdigest()[:16]
+
+        return self.directorio / f"{path.stem}_{clave}.ogg"
+
+
+    async def procesar(self, ruta: "PathLike", id_usuario: int) -> Optional[Path]:
+        """
+        Transcodifica un sonido en el pool de procesos, y lo registra en
+        la DB. Devuelve la ruta del resultado, o `None` si falló.
+        """
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_procesos)
+
+        destino = self.ruta_destino(ruta)
+
+        try:
+            await get_running_loop().run_in_executor(self._pool,
+                                                     transcodificar_a_opus,
+                                                     str(ruta),
+                                                     str(destino),
+                                                     FILTRO_NORMALIZACION)
+        except Exception as err: # pylint: disable=broad-except
+            if self.log is not None:
+                self.log.error(f"[AUDIO] No se pudo transcodificar {str(ruta)!r}: {err!r}")
+            return None
+
+        registrar_sonido(Path(ruta).as_posix(), destino.as_posix(), id_usuario)
+
+        if self.log is not None:
+            self.log.info(f"[AUDIO] Sonido {str(ruta)!r} transcodificado en {destino.as_posix()!r}.")
+
+        return destino
+
+
+    def en_segundo_plano(self, ruta: "PathLike", id_usuario: int) -> Task:
+        """
+        Lanza el procesamiento de un sonido sin esperarlo.
+        """
+
+        tarea = create_task(self.procesar(ruta, id_usuario))
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+        return tarea
+
+
+    def cerrar(self) -> None:
+        """
+        Apaga el pool de procesos propio, sin esperar a los trabajos
+        pendientes. El compartido lo cierra su dueño.
+        """
+
+        if self._pool is not None and self._pool_propio:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
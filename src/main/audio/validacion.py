@@ -0,0 +1,70 @@
+"""
+Módulo para validar los audios que llegan de afuera.
+"""
+
+from typing import TYPE_CHECKING
+
+from ..enums import RestriccionesSonido
+
+if TYPE_CHECKING:
+
+    from .sondeo import InfoAudio
+
+
+TAMANIO_MAXIMO_AUDIO: int = 8388608 # 8 MB en bytes
+DURACION_MAXIMA_AUDIO: int = 8 # en segundos
+
+TAMANIO_MAXIMO_REPRODUCCION: int = 104857600 # 100 MB en bytes
+DURACION_MAXIMA_REPRODUCCION: int = 3600 # en segundos
+"""
+Límites para los audios que sólo se reproducen, sin guardarse.
+"""
+
+Restricciones = list[tuple[RestriccionesSonido, str]]
+
+
+def analizar_tamanio_audio(tamanio: int,
+                           tamanio_maximo: int=TAMANIO_MAXIMO_AUDIO) -> Restricciones:
+    """
+    Verifica que el tamaño de un audio, en bytes, esté dentro del límite.
+    Sirve para descartar un archivo antes de siquiera bajarlo.
+    """
+
+    if tamanio <= tamanio_maximo:
+        return []
+
+    mb = 1048576 # 1 Mb en b
+    return [(RestriccionesSonido.MUY_PESADO,
+             (f"El archivo pesa `{round(tamanio / mb, 3)} MB`, debería " +
+              f"ser como máximo `{round(tamanio_maximo / mb, 3)} MB`"))]
+
+
+def analizar_info_audio(info: "InfoAudio",
+                        *,
+                        tamanio_maximo: int=TAMANIO_MAXIMO_AUDIO,
+                        duracion_maxima: int=DURACION_MAXIMA_AUDIO) -> Restricciones:
+    """
+    Analiza lo que se sondeó de un audio.
+    Devuelve una lista con las restricciones violadas que se encontraron, junto con un mensaje
+    de error; o una lista vacía si el archivo pasa las pruebas.
+
+    Por defecto se usan los límites de los sonidos que se guardan.
+    """
+
+    resultado = ([] if info.tamanio is None
+                 else analizar_tamanio_audio(info.tamanio, tamanio_maximo))
+
+    if resultado:
+        # Si pesa demasiado, ni siquiera se llegó a sondear
+        return resultado
+
+    if not info.tiene_audio:
+        resultado.append((RestriccionesSonido.NO_ES_AUDIO,
+                          "No se encontró audio en el archivo, o no se pudo leer"))
+
+    elif info.duracion is not None and info.duracion > duracion_maxima:
+        resultado.append((RestriccionesSonido.DEMASIADO_LARGO,
+                          (f"El audio dura `{round(info.duracion, 3)} segundos`. Se permite " +
+                           f"que sea como máximo de `{duracion_maxima} segundos`")))
+
+    return resultado
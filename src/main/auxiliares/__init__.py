@@ -2,5 +2,9 @@
 Paquete auxiliar.
 """
 
+from .indice_nombres import *
+from .medicion_carga import *
+from .presupuesto_latencia import *
+from .planificador import *
 from .autocompletado import *
 from .auxiliares import *
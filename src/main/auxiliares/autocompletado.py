@@ -2,14 +2,17 @@
 Módulo para funciones de autocompletado.
 """
 
+from asyncio import to_thread
 from typing import Optional, TYPE_CHECKING
 
 from discord import ChannelType, Interaction
 from discord.app_commands import Choice
 
-from ..archivos import buscar_archivos, partir_ruta
+from ..archivos import partir_ruta
 from ..db.atajos import (get_canales_escuchados, get_recomendaciones_carpetas,
-                         get_sonidos_path, get_usuarios_autorizados)
+                         get_usuarios_autorizados)
+from .indice_nombres import MAX_SUGERENCIAS
+from .presupuesto_latencia import presupuesto_latencia
 
 if TYPE_CHECKING:
 
@@ -23,14 +26,15 @@ async def autocompletado_canales(interaccion: Interaction,
     Devuelve todos los canales del guild que coinciden con la búsqueda
     y el tipo actuales.
     """
-    canales = interaccion.guild.channels
+    indice = interaccion.client.indices_nombres.canales(interaccion.guild)
+    filtro = (None if tipos_canales is None
+              else lambda entrada: entrada.extra in tipos_canales)
 
-    return [Choice(name=canal.name, value=str(canal.id)) for canal in canales
-            if ((current.lower() in canal.name.lower())
-            and (canal.type in tipos_canales if tipos_canales is not None else True))][:25]
-    
+    return [Choice(name=entrada.etiqueta, value=str(entrada.id))
+            for entrada in indice.buscar(current, MAX_SUGERENCIAS, filtro)]
 
 
+@presupuesto_latencia()
 async def autocompletado_todos_canales(interaccion: Interaction,
                                        current: str) -> list[Choice[str]]:
     """
@@ -40,6 +44,7 @@ async def autocompletado_todos_canales(interaccion: Interaction,
                                         current=current)
 
 
+@presupuesto_latencia()
 async def autocompletado_canales_texto(interaccion: Interaction,
                                        current: str) -> list[Choice[str]]:
     """
@@ -50,6 +55,7 @@ async def autocompletado_canales_texto(interaccion: Interaction,
                                         tipos_canales=(ChannelType.text, ))
 
 
+@presupuesto_latencia()
 async def autocompletado_canales_voz(interaccion: Interaction,
                                      current: str) -> list[Choice[str]]:
     """
@@ -60,74 +66,82 @@ async def autocompletado_canales_voz(interaccion: Interaction,
                                         tipos_canales=(ChannelType.voice, ))
 
 
-async def autocompletado_canales_escuchados(_interaccion: Interaction,
+@presupuesto_latencia()
+async def autocompletado_canales_escuchados(interaccion: Interaction,
                                             current: str) -> list[Choice[str]]:
     """
-    Devuelve todos los canales escuchados por BotShot.
+    Devuelve los canales del guild actual escuchados por BotShot.
     """
 
-    lista_choices = []
+    canales = await to_thread(get_canales_escuchados,
+                              id_guild=interaccion.guild_id,
+                              prefijo=current,
+                              limite=MAX_SUGERENCIAS)
 
-    for lista_ch in get_canales_escuchados().values():
-        for id_ch, nombre_ch in lista_ch:
-            if current.lower() in nombre_ch.lower():
-                lista_choices.append(Choice(name=nombre_ch, value=str(id_ch)))
-
-    return lista_choices[:25]
+    return [Choice(name=nombre_ch, value=str(id_ch))
+            for id_ch, nombre_ch in canales.get(interaccion.guild_id, ())]
 
 
+@presupuesto_latencia()
 async def autocompletado_recomendaciones_carpetas(_interaccion: Interaction,
                                                   current: str) -> list[Choice[str]]:
     """
     Devuelve todas las recomendaciones de carpetas hechas.
     """
 
-    return [Choice(name=recom, value=recom)
-            for recom in [dato[0] for dato in get_recomendaciones_carpetas()]
-            if current.lower() in recom.lower()
-    ][:25]
+    # El iterador abre la conexión recién al recorrerlo, en el otro hilo
+    recomendaciones = await to_thread(list, get_recomendaciones_carpetas(contiene=current,
+                                                                         limite=MAX_SUGERENCIAS))
+
+    return [Choice(name=recom, value=recom) for recom, _, _ in recomendaciones]
 
 
+@presupuesto_latencia()
 async def autocompletado_miembros_guild(interaccion: Interaction,
                                         current: str) -> list[Choice[str]]:
     """
     Devuelve todos los usuarios del guild actual.
     """
 
-    return [Choice(name=member.display_name, value=str(member.id))
-            for member in interaccion.guild.members
-            if (current.lower() in member.name.lower()
-                or (current.lower() in member.nick.lower()
-                    if member.nick is not None else False))
-    ][:25]
+    indice = interaccion.client.indices_nombres.miembros(interaccion.guild)
+
+    return [Choice(name=entrada.etiqueta, value=str(entrada.id))
+            for entrada in indice.buscar(current, MAX_SUGERENCIAS)]
 
 
+@presupuesto_latencia()
 async def autocompletado_usuarios_autorizados(_interaccion: Interaction,
                                               current: str) -> list[Choice[str]]:
     """
     Devuelve todos los usuarios autorizados.
     """
 
+    usuarios = await to_thread(list, get_usuarios_autorizados(contiene=current,
+                                                              limite=MAX_SUGERENCIAS))
+
     return [Choice(name=f"{nombre}#{discriminador}", value=str(id_usuario))
-            for (id_usuario, nombre, discriminador) in get_usuarios_autorizados()
-            if current.lower() in nombre.lower()
-    ][:25]
+            for (id_usuario, nombre, discriminador) in usuarios]
 
 
 async def autocompletado_ruta(interaccion: Interaction,
                               current: str,
-                              ruta_actual: "PathLike") -> list[Choice[str]]:
+                              ruta_actual: Optional["PathLike"]=None) -> list[Choice[str]]:
     """
-    Devuelve todos los archivos en una ruta.
+    Devuelve los sonidos que coinciden con la búsqueda, opcionalmente
+    sólo los que están bajo 'ruta_actual'.
+
+    Se busca en el índice de sonidos del bot, sin tocar el disco.
     """
 
     return [
         Choice(name=partir_ruta(ruta)[1], value=ruta)
-        for ruta in buscar_archivos(nombre_ruta=ruta_actual)
-        if current.lower() in ruta.lower()
-    ][:25]
+        for ruta in interaccion.client.indice_sonidos.buscar(current,
+                                                             bajo=ruta_actual,
+                                                             limite=MAX_SUGERENCIAS)
+    ]
 
 
+@presupuesto_latencia()
 async def autocompletado_archivos_audio(interaccion: Interaction,
                                         current: str) -> list[Choice[str]]:
     """
@@ -136,10 +150,10 @@ async def autocompletado_archivos_audio(interaccion: Interaction,
     """
 
     return await autocompletado_ruta(interaccion=interaccion,
-                                     current=current,
-                                     ruta_actual=get_sonidos_path())
+                                     current=current)
 
 
+@presupuesto_latencia()
 async def autocompletado_sonidos_usuario(interaccion: Interaction,
                                          current: str) -> list[Choice[str]]:
     """
@@ -148,7 +162,20 @@ async def autocompletado_sonidos_usuario(interaccion: Interaction,
     """
 
     usuario_id = interaccion.user.id
+    raiz = interaccion.client.indice_sonidos.raiz
 
     return await autocompletado_ruta(interaccion=interaccion,
                                      current=current,
-                                     ruta_actual=f"{get_sonidos_path()}/bienvenida/{usuario_id}")
+                                     ruta_actual=f"{raiz}/bienvenida/{usuario_id}")
+
+
+@presupuesto_latencia()
+async def autocompletado_tareas(interaccion: Interaction,
+                                current: str) -> list[Choice[str]]:
+    """
+    Devuelve las tareas programadas cuyo nombre contiene la búsqueda.
+    """
+
+    return [Choice(name=tarea.nombre, value=tarea.nombre)
+            for tarea in interaccion.client.planificador.tareas()
+            if current.lower() in tarea.nombre.lower()][:MAX_SUGERENCIAS]
@@ -0,0 +1,441 @@
+"""
+Módulo para los índices de nombres usados al autocompletar.
+
+Recorrer todos los miembros de un guild grande en cada tecla que se
+escribe no llega a tiempo, así que los nombres se indexan una vez por
+prefijos, subcadenas cortas y trigramas, y se mantienen al día con los
+eventos de discord.
+"""
+
+from asyncio import sleep
+from heapq import nsmallest
+from typing import TYPE_CHECKING, Any, Callable, Iterable, NamedTuple, Optional
+from unicodedata import combining, normalize
+
+if TYPE_CHECKING:
+
+    from discord import Guild, Member
+    from discord.abc import GuildChannel
+
+
+MAX_SUGERENCIAS: int = 25
+"""
+Cantidad máxima de opciones que discord acepta en un autocompletado.
+"""
+
+LARGO_PREFIJOS: int = 2
+LARGO_NGRAMAS: int = 3
+TAMANIO_LOTE_INDICE: int = 1000
+"""
+Cuántas entradas se indexan antes de ceder el loop de eventos al armar
+el índice de un guild.
+"""
+
+
+def normalizar(texto: str) -> str:
+    """
+    Pasa un texto a minúsculas y sin tildes, para comparar nombres.
+    """
+
+    descompuesto = normalize("NFKD", texto.casefold())
+    return "".join(car for car in descompuesto if not combining(car))
+
+
+def _ngramas(texto: str, largo: int=LARGO_NGRAMAS) -> set[str]:
+    """
+    Devuelve los n-gramas de un texto.
+    """
+
+    return {texto[inicio:inicio + largo] for inicio in range(len(texto) - largo + 1)}
+
+
+def _prefijos(texto: str, largo: int=LARGO_PREFIJOS) -> set[str]:
+    """
+    Devuelve los prefijos cortos de cada palabra de un texto.
+    """
+
+    return {palabra[:fin]
+            for palabra in texto.split()
+            for fin in range(1, min(largo, len(palabra)) + 1)}
+
+
+def _subcadenas(texto: str, largo: int=LARGO_PREFIJOS) -> set[str]:
+    """
+    Devuelve todas las subcadenas de un texto de hasta 'largo' caracteres.
+    """
+
+    return {texto[inicio:inicio + tamanio]
+            for tamanio in range(1, largo + 1)
+            for inicio in range(len(texto) - tamanio + 1)}
+
+
+class EntradaIndice(NamedTuple):
+    """
+    Algo indexado por nombre, como un miembro o un canal.
+    """
+
+    id: int
+    etiqueta: str
+    nombres: tuple[str, ...]
+    extra: Any = None
+
+
+def _puntaje(consulta: str, entrada: EntradaIndice) -> Optional[tuple[int, int, str]]:
+    """
+    Puntúa qué tan bien coincide una entrada con la consulta, siendo
+    menor mejor; o `None` si no coincide.
+    """
+
+    mejor = None
+
+    for nombre in entrada.nombres:
+        if nombre == consulta:
+            rango = 0
+        elif nombre.startswith(consulta):
+            rango = 1
+        elif f" {consulta}" in f" {nombre}":
+            rango = 2
+        elif consulta in nombre:
+            rango = 3
+        else:
+            continue
+
+        if mejor is None or rango < mejor:
+            mejor = rango
+
+    if mejor is None:
+        return None
+
+    return mejor, len(entrada.etiqueta), entrada.etiqueta.casefold()
+
+
+class IndiceNombres:
+    """
+    Índice de nombres normalizados, por prefijos de palabras, por
+    subcadenas cortas y por trigramas, para buscar por coincidencia
+    parcial sin recorrer todo.
+    """
+
+    def __init__(self) -> None:
+        """
+        Inicializa una instancia de 'IndiceNombres'.
+        """
+
+        self._entradas: dict[int, EntradaIndice] = {}
+        self._por_prefijo: dict[str, set[int]] = {}
+        self._por_subcadena: dict[str, set[int]] = {}
+        self._por_ngrama: dict[str, set[int]] = {}
+
+
+    def __len__(self) -> int:
+        """
+        Cuenta la cantidad de entradas indexadas.
+        """
+
+        return len(self._entradas)
+
+
+    def __contains__(self, id_entrada: int) -> bool:
+        """
+        Verifica si una entrada está indexada.
+        """
+
+        return id_entrada in self._entradas
+
+
+    @staticmethod
+    def _claves(entrada: EntradaIndice) -> tuple[set[str], set[str], set[str]]:
+        """
+        Devuelve los prefijos, subcadenas cortas y n-gramas bajo los que
+        va una entrada.
+        """
+
+        prefijos = set()
+        subcadenas = set()
+        ngramas = set()
+
+        for nombre in entrada.nombres:
+            prefijos |= _prefijos(nombre)
+            subcadenas |= _subcadenas(nombre)
+            ngramas |= _ngramas(nombre)
+
+        return prefijos, subcadenas, ngramas
+
+
+    def _indices(self) -> tuple[dict[str, set[int]], ...]:
+        """
+        Devuelve los índices en el mismo orden que las claves de '_claves'.
+        """
+
+        return self._por_prefijo, self._por_subcadena, self._por_ngrama
+
+
+    def agregar(self,
+                id_entrada: int,
+                etiqueta: str,
+                nombres: Iterable[str],
+                extra: Any=None) -> None:
+        """
+        Indexa una entrada, reemplazando la anterior con el mismo id.
+        'etiqueta' es lo que se muestra, y 'nombres' por lo que se busca.
+        """
+
+        self.quitar(id_entrada)
+
+        entrada = EntradaIndice(id_entrada,
+                                etiqueta,
+                                tuple(normalizar(nombre) for nombre in nombres if nombre),
+                                extra)
+        self._entradas[id_entrada] = entrada
+
+        for claves, indice in zip(self._claves(entrada), self._indices()):
+            for clave in claves:
+                indice.setdefault(clave, set()).add(id_entrada)
+
+
+    def quitar(self, id_entrada: int) -> bool:
+        """
+        Saca una entrada del índice.
+        Devuelve `True` si estaba indexada.
+        """
+
+        entrada = self._entradas.pop(id_entrada, None)
+
+        if entrada is None:
+            return False
+
+        for claves, indice in zip(self._claves(entrada), self._indices()):
+            for clave in claves:
+                ids = indice[clave]
+                ids.discard(id_entrada)
+                if not ids:
+                    del indice[clave]
+
+        return True
+
+
+    def _candidatos(self, consulta: str) -> Iterable[int]:
+        """
+        Devuelve los ids que podrían coincidir con la consulta.
+        """
+
+        if len(consulta) < LARGO_NGRAMAS:
+            return self._por_subcadena.get(consulta, ())
+
+        conjuntos = []
+
+        for ngrama in _ngramas(consulta):
+            ids = self._por_ngrama.get(ngrama)
+            if not ids:
+                return ()
+            conjuntos.append(ids)
+
+        conjuntos.sort(key=len)
+        return conjuntos[0].intersection(*conjuntos[1:])
+
+
+    def buscar(self,
+               consulta: str,
+               limite: int=MAX_SUGERENCIAS,
+               filtro: Optional[Callable[[EntradaIndice], bool]]=None) -> list[EntradaIndice]:
+        """
+        Devuelve las mejores 'limite' entradas que coinciden con la
+        consulta, primero las que coinciden exacto, después las que
+        empiezan igual, y después las que la contienen.
+        """
+
+        consulta = normalizar(consulta.strip())
+
+        if not consulta:
+            encontradas = []
+            for entrada in self._entradas.values():
+                if filtro is None or filtro(entrada):
+                    encontradas.append(entrada)
+                    if len(encontradas) >= limite:
+                        break
+            return encontradas
+
+        candidatos = self._candidatos(consulta)
+        puntuadas = []
+
+        if len(consulta) < LARGO_NGRAMAS:
+            # Las consultas cortas coinciden con casi todo, así que primero
+            # se puntúan los inicios de palabras, y si alcanzan para llenar
+            # el límite no se sigue con los que sólo la contienen, que
+            # siempre quedarían después
+            iniciales = self._por_prefijo.get(consulta, set())
+            puntuadas = self._puntuar(consulta, iniciales, filtro)
+
+            if len(puntuadas) >= limite:
+                candidatos = ()
+            else:
+                candidatos = (id_entrada for id_entrada in candidatos
+                              if id_entrada not in iniciales)
+
+        puntuadas += self._puntuar(consulta, candidatos, filtro)
+
+        return [self._entradas[id_entrada]
+                for _, id_entrada in nsmallest(limite, puntuadas)]
+
+
+    def _puntuar(self,
+                 consulta: str,
+                 ids: Iterable[int],
+                 filtro: Optional[Callable[[EntradaIndice], bool]]=None) -> list[tuple[Any, int]]:
+        """
+        Puntúa las entradas que coinciden con la consulta y pasan el filtro.
+        """
+
+        puntuadas = []
+
+        for id_entrada in ids:
+            entrada = self._entradas[id_entrada]
+
+            if filtro is not None and not filtro(entrada):
+                continue
+
+            puntaje = _puntaje(consulta, entrada)
+            if puntaje is not None:
+                puntuadas.append((puntaje, id_entrada))
+
+        return puntuadas
+
+
+class IndicesGuilds:
+    """
+    Índices de miembros y canales de cada guild.
+
+    Se arman de antemano con 'preparar', cuando el guild está disponible,
+    y después se mantienen con los eventos de discord en vez de volver a
+    recorrer el guild. Si se piden antes, se arman en el momento.
+    """
+
+    def __init__(self) -> None:
+        """
+        Inicializa una instancia de 'IndicesGuilds'.
+        """
+
+        self._miembros: dict[int, IndiceNombres] = {}
+        self._canales: dict[int, IndiceNombres] = {}
+
+
+    def miembros(self, guild: "Guild") -> IndiceNombres:
+        """
+        Devuelve el índice de miembros del guild, armándolo si hace falta.
+        """
+
+        if guild.id not in self._miembros:
+            indice = IndiceNombres()
+            for miembro in guild.members:
+                self._indexar_miembro(indice, miembro)
+            self._miembros[guild.id] = indice
+
+        return self._miembros[guild.id]
+
+
+    def canales(self, guild: "Guild") -> IndiceNombres:
+        """
+        Devuelve el índice de canales del guild, armándolo si hace falta.
+        """
+
+        if guild.id not in self._canales:
+            indice = IndiceNombres()
+            for canal in guild.channels:
+                self._indexar_canal(indice, canal)
+            self._canales[guild.id] = indice
+
+        return self._canales[guild.id]
+
+
+    async def preparar(self, guild: "Guild") -> None:
+        """
+        Arma los índices del guild de a lotes, cediendo el loop de
+        eventos entre uno y otro para no trabar al bot con guilds enormes.
+
+        Los índices se registran desde el principio, así que los eventos
+        que lleguen mientras tanto ya se aplican sobre ellos.
+        """
+
+        if guild.id in self._miembros and guild.id in self._canales:
+            return
+
+        miembros = self._miembros.setdefault(guild.id, IndiceNombres())
+        canales = self._canales.setdefault(guild.id, IndiceNombres())
+
+        for numero, miembro in enumerate(guild.members, start=1):
+            # Pudo haberse ido mientras se cedía el loop
+            if guild.get_member(miembro.id) is not None:
+                self._indexar_miembro(miembros, miembro)
+            if numero % TAMANIO_LOTE_INDICE == 0:
+                await sleep(0)
+
+        for canal in guild.channels:
+            self._indexar_canal(canales, canal)
+
+
+    @staticmethod
+    def _indexar_miembro(indice: IndiceNombres, miembro: "Member") -> None:
+        """
+        Agrega un miembro al índice, por su nombre y su apodo.
+        """
+
+        indice.agregar(miembro.id, miembro.display_name, (miembro.name, miembro.nick))
+
+
+    @staticmethod
+    def _indexar_canal(indice: IndiceNombres, canal: "GuildChannel") -> None:
+        """
+        Agrega un canal al índice, guardando también su tipo.
+        """
+
+        indice.agregar(canal.id, canal.name, (canal.name,), canal.type)
+
+
+    def actualizar_miembro(self, miembro: "Member") -> None:
+        """
+        Reindexa un miembro que entró o cambió de nombre. Si el índice
+        del guild todavía no existe, no hace nada: se armará completo.
+        """
+
+        indice = self._miembros.get(miembro.guild.id)
+        if indice is not None:
+            self._indexar_miembro(indice, miembro)
+
+
+    def quitar_miembro(self, miembro: "Member") -> None:
+        """
+        Saca a un miembro que se fue del guild.
+        """
+
+        indice = self._miembros.get(miembro.guild.id)
+        if indice is not None:
+            indice.quitar(miembro.id)
+
+
+    def actualizar_canal(self, canal: "GuildChannel") -> None:
+        """
+        Reindexa un canal creado o modificado.
+        """
+
+        indice = self._canales.get(canal.guild.id)
+        if indice is not None:
+            self._indexar_canal(indice, canal)
+
+
+    def quitar_canal(self, canal: "GuildChannel") -> None:
+        """
+        Saca un canal borrado.
+        """
+
+        indice = self._canales.get(canal.guild.id)
+        if indice is not None:
+            indice.quitar(canal.id)
+
+
+    def olvidar_guild(self, guild: "Guild") -> None:
+        """
+        Descarta los índices de un guild del que se fue el bot.
+        """
+
+        self._miembros.pop(guild.id, None)
+        self._canales.pop(guild.id, None)
@@ -0,0 +1,42 @@
+"""
+Módulo para medir cuánto tarda en importarse y en armarse cada cog.
+
+El cargador de cogs empieza la medición antes de cargar la extensión, y
+el cog base marca cuándo se empezó a armar; así ninguno de los dos
+depende del otro.
+"""
+
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+_marca_setup: ContextVar[Optional[list[Optional[float]]]] = ContextVar("_marca_setup",
+                                                                       default=None)
+"""
+Dónde anotar cuándo terminó de importarse el cog que se está cargando
+en la tarea actual.
+"""
+
+
+def medir_carga() -> list[Optional[float]]:
+    """
+    Empieza a medir la carga de un cog en la tarea actual. Devuelve
+    dónde quedará anotado cuándo se empezó a armar el cog.
+    """
+
+    marca = [None]
+    _marca_setup.set(marca)
+
+    return marca
+
+
+def marcar_inicio_setup() -> None:
+    """
+    Anota que el cog que se está cargando ya se importó, y se
+    empieza a armar.
+    """
+
+    marca = _marca_setup.get()
+
+    if marca is not None and marca[0] is None:
+        marca[0] = perf_counter()
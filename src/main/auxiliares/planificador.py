@@ -0,0 +1,472 @@
+"""
+Módulo para el planificador de tareas periódicas.
+
+Cada tarea tiene una programación, que puede ser un intervalo ('24h',
+'30m') o una expresión al estilo de cron ('0 5 * * *'), y un margen
+aleatorio para que las tareas pesadas no arranquen todas a la vez. Una
+tarea nunca corre dos veces al mismo tiempo, y cada ejecución queda
+anotada en la DB con su duración y cómo terminó.
+"""
+
+from asyncio import (Semaphore, create_task, get_running_loop,
+                     iscoroutinefunction, sleep, to_thread)
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from random import uniform
+from re import fullmatch
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Optional, Union
+
+from ..db.atajos import get_ejecuciones_tarea, registrar_ejecucion_tarea
+
+if TYPE_CHECKING:
+
+    from asyncio import Task
+
+    from ..logger import BotLogger
+
+
+UNIDADES_INTERVALO: dict[str, int] = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+"""
+Segundos de cada unidad que se puede usar en un intervalo.
+"""
+
+RANGOS_CRON: tuple[tuple[int, int], ...] = ((0, 59), # minutos
+                                            (0, 23), # horas
+                                            (1, 31), # días del mes
+                                            (1, 12), # meses
+                                            (0, 7))  # días de la semana, 0 y 7 son domingo
+MAX_ANIOS_CRON: int = 5
+"""
+Años hacia adelante en los que se busca la próxima fecha de una
+expresión de cron antes de darla por imposible (como '0 0 30 2 *').
+"""
+
+ESTADO_OK: str = "ok"
+ESTADO_ERROR: str = "error"
+
+
+class Intervalo:
+    """
+    Programación que corre una tarea cada tantos segundos, contando
+    desde que empezó la ejecución anterior.
+    """
+
+    def __init__(self, segundos: float, texto: Optional[str]=None) -> None:
+        """
+        Inicializa una instancia de 'Intervalo'.
+        """
+
+        if segundos <= 0:
+            raise ValueError("El intervalo debe ser positivo.")
+
+        self.segundos: float = segundos
+        self.texto: str = texto or f"{segundos:g}s"
+
+
+    def __str__(self) -> str:
+        """
+        Muestra el intervalo.
+        """
+
+        return f"cada {self.texto}"
+
+
+    def siguiente(self, ahora: datetime, ultima: Optional[datetime]=None) -> datetime:
+        """
+        Devuelve cuándo toca la próxima ejecución. Si nunca corrió, o si
+        ya se pasó la hora (por ejemplo, porque el bot estuvo apagado),
+        toca ahora.
+        """
+
+        if ultima is None:
+            return ahora
+
+        return max(ahora, ultima + timedelta(seconds=self.segundos))
+
+
+def _parsear_campo_cron(campo: str, minimo: int, maximo: int) -> frozenset[int]:
+    """
+    Devuelve los valores que acepta un campo de una expresión de cron,
+    que puede tener '*', rangos ('1-5'), listas ('1,15') y pasos ('*/10').
+    """
+
+    valores = set()
+
+    for parte in campo.split(","):
+        rango, barra, paso = parte.partition("/")
+        paso = int(paso) if barra else 1
+
+        if rango == "*":
+            inicio, fin = minimo, maximo
+        elif "-" in rango:
+            inicio, fin = (int(valor) for valor in rango.split("-", 1))
+        else:
+            inicio = int(rango)
+            fin = maximo if barra else inicio
+
+        if paso < 1 or not minimo <= inicio <= fin <= maximo:
+            raise ValueError(f"El campo {campo!r} está fuera de rango ({minimo}-{maximo}).")
+
+        valores.update(range(inicio, fin + 1, paso))
+
+    return frozenset(valores)
+
+
+class Cron:
+    """
+    Programación al estilo de cron: 'minuto hora día mes día_semana',
+    en la hora local.
+    """
+
+    def __init__(self, expresion: str) -> None:
+        """
+        Inicializa una instancia de 'Cron'.
+        """
+
+        campos = expresion.split()
+
+        if len(campos) != len(RANGOS_CRON):
+            raise ValueError(f"La expresión {expresion!r} debe tener {len(RANGOS_CRON)} campos.")
+
+        try:
+            (self.minutos,
+             self.horas,
+             self.dias,
+             self.meses,
+             dias_semana) = (_parsear_campo_cron(campo, *rango)
+                             for campo, rango in zip(campos, RANGOS_CRON))
+        except ValueError as err:
+            raise ValueError(f"La expresión {expresion!r} no es válida: {err}") from err
+
+        self.dias_semana: frozenset[int] = frozenset(dia % 7 for dia in dias_semana)
+        self.texto: str = " ".join(campos)
+        # Como en cron, si se restringen los dos días, alcanza con que coincida uno
+        self._dia_libre: bool = campos[2].startswith("*")
+        self._dia_semana_libre: bool = campos[4].startswith("*")
+
+
+    def __str__(self) -> str:
+        """
+        Muestra la expresión.
+        """
+
+        return f"cron '{self.texto}'"
+
+
+    def _coincide_dia(self, fecha: datetime) -> bool:
+        """
+        Verifica si la programación corre en el día de la fecha.
+        """
+
+        en_dia = fecha.day in self.dias
+        # En cron la semana empieza el domingo
+        en_dia_semana = (fecha.weekday() + 1) % 7 in self.dias_semana
+
+        if self._dia_libre or self._dia_semana_libre:
+            return en_dia and en_dia_semana
+
+        return en_dia or en_dia_semana
+
+
+    def siguiente(self, ahora: datetime, _ultima: Optional[datetime]=None) -> datetime:
+        """
+        Devuelve el próximo minuto posterior a 'ahora' que coincide con
+        la expresión. Las ejecuciones perdidas no se recuperan, así que
+        la última ejecución no se usa.
+        """
+
+        fecha = ahora.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        tope = fecha + timedelta(days=366 * MAX_ANIOS_CRON)
+
+        while fecha < tope:
+            if fecha.month not in self.meses:
+                fecha = (fecha.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._coincide_dia(fecha):
+                fecha = fecha.replace(hour=0, minute=0) + timedelta(days=1)
+            elif fecha.hour not in self.horas:
+                fecha = fecha.replace(minute=0) + timedelta(hours=1)
+            elif fecha.minute not in self.minutos:
+                fecha += timedelta(minutes=1)
+            else:
+                return fecha
+
+        raise ValueError(f"La expresión '{self.texto}' nunca se cumple.")
+
+
+Programacion = Union[Intervalo, Cron]
+
+
+def parsear_programacion(texto: str) -> Programacion:
+    """
+    Interpreta una programación escrita como intervalo ('90s', '30m',
+    '24h', '7d') o como expresión de cron ('0 5 * * *').
+    """
+
+    texto = texto.strip()
+    intervalo = fullmatch(r"(\d+(?:\.\d+)?)\s*([smhd])", texto)
+
+    if intervalo is not None:
+        cantidad, unidad = intervalo.groups()
+        return Intervalo(float(cantidad) * UNIDADES_INTERVALO[unidad], f"{cantidad}{unidad}")
+
+    return Cron(texto)
+
+
+class EjecucionTarea(NamedTuple):
+    """
+    Una ejecución de una tarea programada.
+    """
+
+    tarea: str
+    inicio: datetime
+    duracion: float # en segundos
+    estado: str
+    detalle: str
+
+
+class TareaProgramada:
+    """
+    Una tarea que el planificador corre según su programación.
+
+    Si 'funcion' es una corrutina, se la espera en el loop de eventos,
+    y debería mandar a otro hilo o proceso lo que bloquee; si no, se la
+    corre entera en otro hilo. Lo que devuelva se anota como detalle.
+    """
+
+    def __init__(self,
+                 nombre: str,
+                 funcion: Callable[[], Any],
+                 programacion: Programacion,
+                 *,
+                 jitter: float=0.0) -> None:
+        """
+        Inicializa una instancia de 'TareaProgramada'.
+        """
+
+        self.nombre: str = nombre
+        self.funcion: Callable[[], Any] = funcion
+        self.programacion: Programacion = programacion
+        self.jitter: float = jitter # en segundos
+
+        self.proxima: Optional[datetime] = None
+        self.ultima: Optional[EjecucionTarea] = None
+        self.en_curso: bool = False
+
+
+class Planificador:
+    """
+    Corre las tareas programadas en segundo plano.
+
+    A lo sumo 'max_simultaneas' tareas corren a la vez; si a una le
+    toca mientras otras están corriendo, espera su turno.
+    """
+
+    def __init__(self,
+                 *,
+                 max_simultaneas: int=1,
+                 pool: Optional[Executor]=None,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'Planificador'.
+
+        Si no se le pasa un 'pool' compartido, 'en_proceso' crea uno
+        propio la primera vez que se usa.
+        """
+
+        self.log: Optional["BotLogger"] = log
+
+        self._tareas: dict[str, TareaProgramada] = {}
+        self._ciclos: dict[str, "Task"] = {}
+        self._turnos: Semaphore = Semaphore(max_simultaneas)
+        self._pool: Optional[Executor] = pool
+        self._pool_propio: bool = pool is None
+        self._iniciado: bool = False
+
+
+    def __contains__(self, nombre: str) -> bool:
+        """
+        Verifica si hay una tarea con ese nombre.
+        """
+
+        return nombre in self._tareas
+
+
+    def tareas(self) -> list[TareaProgramada]:
+        """
+        Devuelve las tareas registradas, por nombre.
+        """
+
+        return sorted(self._tareas.values(), key=lambda tarea: tarea.nombre)
+
+
+    def agregar(self, tarea: TareaProgramada) -> None:
+        """
+        Registra una tarea. Si el planificador ya está andando, la
+        tarea empieza a correr según su programación.
+        """
+
+        if tarea.nombre in self._tareas:
+            raise ValueError(f"Ya hay una tarea llamada {tarea.nombre!r}.")
+
+        self._tareas[tarea.nombre] = tarea
+
+        if self._iniciado:
+            self._ciclos[tarea.nombre] = create_task(self._ciclo(tarea))
+
+
+    def quitar(self, nombre: str) -> bool:
+        """
+        Deja de correr una tarea y la saca del planificador.
+        Devuelve `True` si estaba registrada.
+        """
+
+        ciclo = self._ciclos.pop(nombre, None)
+
+        if ciclo is not None:
+            ciclo.cancel()
+
+        return self._tareas.pop(nombre, None) is not None
+
+
+    def iniciar(self) -> None:
+        """
+        Empieza a correr todas las tareas registradas.
+        """
+
+        if self._iniciado:
+            return
+
+        self._iniciado = True
+        for tarea in self._tareas.values():
+            self._ciclos[tarea.nombre] = create_task(self._ciclo(tarea))
+
+
+    async def _ciclo(self, tarea: TareaProgramada) -> None:
+        """
+        Espera a que le toque a la tarea y la corre, una y otra vez.
+        """
+
+        ultima = None
+
+        try:
+            historial = await to_thread(get_ejecuciones_tarea, tarea.nombre, 1)
+
+            if historial:
+                inicio, duracion, estado, detalle = historial[0]
+                ultima = datetime.fromisoformat(inicio)
+                if tarea.ultima is None:
+                    tarea.ultima = EjecucionTarea(tarea.nombre, ultima, duracion, estado, detalle)
+        except Exception as err: # pylint: disable=broad-except
+            # Sin historial, la tarea corre como si nunca lo hubiera hecho
+            ultima = None
+            self._registrar_error(f"[TAREAS] No se pudo leer el historial de {tarea.nombre!r}: " +
+                                  f"{err!r}")
+
+        while True:
+            try:
+                proxima = tarea.programacion.siguiente(datetime.now(), ultima)
+            except ValueError as err:
+                self._registrar_error(f"[TAREAS] La tarea {tarea.nombre!r} no puede correr: {err}")
+                return
+
+            tarea.proxima = proxima + timedelta(seconds=uniform(0, tarea.jitter))
+            await sleep(max((tarea.proxima - datetime.now()).total_seconds(), 0))
+
+            ejecucion = await self.ejecutar(tarea.nombre)
+            if ejecucion is not None:
+                ultima = ejecucion.inicio
+
+
+    async def ejecutar(self, nombre: str) -> Optional[EjecucionTarea]:
+        """
+        Corre una tarea ahora, la anota en el historial y la devuelve.
+        Si la tarea ya está corriendo, no hace nada y devuelve `None`.
+        """
+
+        tarea = self._tareas[nombre]
+
+        if tarea.en_curso:
+            if self.log is not None:
+                self.log.warning(f"[TAREAS] {nombre!r} todavía está corriendo, se saltea.")
+            return None
+
+        tarea.en_curso = True
+
+        try:
+            async with self._turnos:
+                inicio = datetime.now()
+                comienzo = perf_counter()
+
+                try:
+                    if iscoroutinefunction(tarea.funcion):
+                        resultado = await tarea.funcion()
+                    else:
+                        resultado = await to_thread(tarea.funcion)
+                    estado, detalle = ESTADO_OK, ("" if resultado is None else str(resultado))
+                except Exception as err: # pylint: disable=broad-except
+                    estado, detalle = ESTADO_ERROR, repr(err)
+
+                duracion = perf_counter() - comienzo
+        finally:
+            tarea.en_curso = False
+
+        ejecucion = EjecucionTarea(nombre, inicio, duracion, estado, detalle)
+        tarea.ultima = ejecucion
+
+        if estado == ESTADO_OK:
+            if self.log is not None:
+                self.log.info(f"[TAREAS] {nombre!r} terminó en {duracion:.2f}s. {detalle}".rstrip())
+        else:
+            self._registrar_error(f"[TAREAS] {nombre!r} falló tras {duracion:.2f}s: {detalle}")
+
+        try:
+            await to_thread(registrar_ejecucion_tarea,
+                            nombre,
+                            inicio.isoformat(timespec="seconds"),
+                            duracion,
+                            estado,
+                            detalle)
+        except Exception as err: # pylint: disable=broad-except
+            self._registrar_error(f"[TAREAS] No se pudo anotar la ejecución de {nombre!r}: {err!r}")
+
+        return ejecucion
+
+
+    async def en_proceso(self, funcion: Callable[..., Any], *args: Any) -> Any:
+        """
+        Corre una función en un proceso aparte, para el trabajo pesado
+        de CPU que en otro hilo igual trabaría al bot. La función y sus
+        argumentos tienen que poder serializarse.
+        """
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=1)
+
+        return await get_running_loop().run_in_executor(self._pool, funcion, *args)
+
+
+    def _registrar_error(self, mensaje: str) -> None:
+        """
+        Anota un error en el log, si hay uno.
+        """
+
+        if self.log is not None:
+            self.log.error(mensaje)
+
+
+    def cerrar(self) -> None:
+        """
+        Deja de correr todas las tareas, y cierra el proceso aparte si
+        es propio.
+        """
+
+        self._iniciado = False
+
+        for ciclo in self._ciclos.values():
+            ciclo.cancel()
+        self._ciclos.clear()
+
+        if self._pool is not None and self._pool_propio:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,215 @@
+"""
+Módulo para medir y acotar cuánto tarda cada autocompletado.
+
+Discord descarta las sugerencias que llegan tarde, y el usuario se
+queda sin nada. Cada autocompletado tiene un presupuesto de tiempo: si
+se pasa, se contesta con lo último que se sugirió para una búsqueda
+parecida, y se deja terminar al cálculo para tenerlo a mano la próxima.
+"""
+
+from asyncio import ensure_future, shield, wait_for
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import wraps
+from time import perf_counter
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+if TYPE_CHECKING:
+
+    from asyncio import Future
+
+    from discord import Interaction
+    from discord.app_commands import Choice
+
+
+HandlerAutocompletado = Callable[["Interaction", str], Awaitable[list["Choice"]]]
+
+PRESUPUESTO_AUTOCOMPLETADO: float = 1.0 # en segundos
+MAX_BUSQUEDAS_CACHEADAS: int = 256
+LIMITES_HISTOGRAMA: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                                         0.1, 0.25, 0.5, 1.0, 2.5) # en segundos
+"""
+Límite superior de cada cubeta de los histogramas. Hay una cubeta más
+al final para lo que tarde más que el último límite.
+"""
+
+
+class HistogramaLatencias:
+    """
+    Histograma de cuánto tardan las llamadas a un autocompletado.
+    """
+
+    def __init__(self, limites: tuple[float, ...]=LIMITES_HISTOGRAMA) -> None:
+        """
+        Inicializa una instancia de 'HistogramaLatencias'.
+        """
+
+        self.limites: tuple[float, ...] = limites
+        self.cubetas: list[int] = [0] * (len(limites) + 1)
+        self.cantidad: int = 0
+        self.total: float = 0.0
+        self.maximo: float = 0.0
+        self.excedidos: int = 0
+
+
+    def registrar(self, segundos: float, excedido: bool=False) -> None:
+        """
+        Anota la duración de una llamada.
+        """
+
+        self.cubetas[bisect_left(self.limites, segundos)] += 1
+        self.cantidad += 1
+        self.total += segundos
+        self.maximo = max(self.maximo, segundos)
+
+        if excedido:
+            self.excedidos += 1
+
+
+    def percentil(self, porcentaje: float) -> float:
+        """
+        Estima un percentil, devolviendo el límite de la cubeta donde cae.
+        """
+
+        if not self.cantidad:
+            return 0.0
+
+        objetivo = self.cantidad * porcentaje / 100
+        acumulado = 0
+
+        for limite, cuenta in zip(self.limites, self.cubetas):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                return limite
+
+        return self.maximo
+
+
+    def resumen(self) -> dict[str, float]:
+        """
+        Devuelve las estadísticas principales del histograma.
+        """
+
+        return {
+            "llamadas": self.cantidad,
+            "promedio": (self.total / self.cantidad if self.cantidad else 0.0),
+            "p50": self.percentil(50),
+            "p95": self.percentil(95),
+            "p99": self.percentil(99),
+            "maximo": self.maximo,
+            "excedidos": self.excedidos
+        }
+
+
+HISTOGRAMAS: dict[str, HistogramaLatencias] = {}
+"""
+Histogramas de cada autocompletado medido, por nombre.
+"""
+
+
+class CacheSugerencias:
+    """
+    Últimas sugerencias devueltas por un autocompletado, por contexto
+    (guild y usuario) y búsqueda.
+    """
+
+    def __init__(self, max_busquedas: int=MAX_BUSQUEDAS_CACHEADAS) -> None:
+        """
+        Inicializa una instancia de 'CacheSugerencias'.
+        """
+
+        self.max_busquedas: int = max_busquedas
+        self._sugerencias: OrderedDict[tuple, list["Choice"]] = OrderedDict()
+
+
+    def __len__(self) -> int:
+        """
+        Cuenta la cantidad de búsquedas guardadas.
+        """
+
+        return len(self._sugerencias)
+
+
+    def guardar(self, contexto: tuple, consulta: str, sugerencias: list["Choice"]) -> None:
+        """
+        Guarda las sugerencias de una búsqueda.
+        """
+
+        clave = (contexto, consulta.lower())
+        self._sugerencias[clave] = sugerencias
+        self._sugerencias.move_to_end(clave)
+
+        while len(self._sugerencias) > self.max_busquedas:
+            self._sugerencias.popitem(last=False)
+
+
+    def buscar(self, contexto: tuple, consulta: str) -> list["Choice"]:
+        """
+        Devuelve las sugerencias de la misma búsqueda si ya se hizo, o
+        si no las de la búsqueda más larga que empiece igual, filtradas
+        por la consulta actual. Puede que queden menos que las que habría.
+        """
+
+        consulta = consulta.lower()
+
+        for fin in range(len(consulta), -1, -1):
+            sugerencias = self._sugerencias.get((contexto, consulta[:fin]))
+            if sugerencias is None:
+                continue
+
+            self._sugerencias.move_to_end((contexto, consulta[:fin]))
+            if fin == len(consulta):
+                return sugerencias
+
+            return [sugerencia for sugerencia in sugerencias
+                    if consulta in sugerencia.name.lower()]
+
+        return []
+
+
+def presupuesto_latencia(limite: float=PRESUPUESTO_AUTOCOMPLETADO,
+                         *,
+                         nombre: Optional[str]=None) -> Callable[[HandlerAutocompletado],
+                                                                 HandlerAutocompletado]:
+    """
+    Decorador que mide cuánto tarda un autocompletado y lo registra en
+    'HISTOGRAMAS'.
+
+    Si no termina en 'limite' segundos, se devuelven las sugerencias
+    guardadas de una búsqueda parecida, y el cálculo sigue en segundo
+    plano para guardar su resultado. Sólo se puede cortar a tiempo lo
+    que cede el control al loop de eventos (por ejemplo, lo que se manda
+    a otro hilo); lo que bloquea igual se mide.
+    """
+
+    def decorador(func: HandlerAutocompletado) -> HandlerAutocompletado:
+        nombre_handler = nombre or func.__name__
+        histograma = HISTOGRAMAS.setdefault(nombre_handler, HistogramaLatencias())
+        cache = CacheSugerencias()
+
+        @wraps(func)
+        async def envoltura(interaccion: "Interaction", current: str) -> list["Choice"]:
+            contexto = (interaccion.guild_id, interaccion.user.id)
+            inicio = perf_counter()
+
+            def al_terminar(tarea: "Future") -> None:
+                if not tarea.cancelled() and tarea.exception() is None:
+                    cache.guardar(contexto, current, tarea.result())
+
+            tarea = ensure_future(func(interaccion, current))
+            tarea.add_done_callback(al_terminar)
+
+            try:
+                sugerencias = await wait_for(shield(tarea), limite)
+            except TimeoutError:
+                histograma.registrar(perf_counter() - inicio, excedido=True)
+                return cache.buscar(contexto, current)
+
+            duracion = perf_counter() - inicio
+            histograma.registrar(duracion, excedido=(duracion > limite))
+
+            return sugerencias
+
+        return envoltura
+
+    return decorador
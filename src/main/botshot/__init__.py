@@ -2,4 +2,5 @@
 Paquete para botshot.
 """
 
+from .cargador_cogs import *
 from .botshot import *
@@ -3,23 +3,37 @@ Módulo dedicado a contener la lógica de una clase que sobrecarga a
 'discord.ext.commands.Bot'.
 """
 
-from asyncio import set_event_loop_policy
+from asyncio import Lock, create_task, gather, set_event_loop_policy, to_thread
+from concurrent.futures import ProcessPoolExecutor
 from platform import system
-from typing import TYPE_CHECKING, Callable
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Optional, Union
 
+from aiohttp import ClientSession
 from discord import Intents, Message
-from discord.ext.commands import Bot
+from discord.ext.commands import Bot, Context
 from discord.utils import utcnow
 
-from ..archivos import buscar_archivos
-from ..auxiliares import get_prefijo
+from ..archivos import IndiceArchivos, indexar_existentes
+from ..audio import (CacheOpus, ColaAudio, GestorVoz, PoolFFmpeg,
+                     RegistroBienvenidas, SondeoAudio, TranscodificadorSonidos)
+from ..auxiliares import IndicesGuilds, Planificador, get_prefijo, medir_carga
+from ..db import migrar_db, transaccion
 from ..db.atajos import (actualizar_guild, existe_usuario_autorizado,
-                         get_botshot_id, get_cogs_path)
+                         get_botshot_id, get_cache_path, get_cogs_path,
+                         get_ffmpeg_max_procesos, get_ffmpeg_precalentados,
+                         get_imagenes_path, get_sonidos_path,
+                         get_voz_ventana_inactividad)
+from ..imagenes import ProcesadorImagenes
 from ..logger import BotLogger
+from .cargador_cogs import ArbolComandos, CacheCogs, InfoCog, TiempoCarga
 
 if TYPE_CHECKING:
+    from asyncio import Task
     from datetime import datetime, timedelta
 
+    from discord import Guild, Interaction
+
 # Para que no tire error en Windows al cerrar el Bot.
 
 try:
@@ -34,6 +48,12 @@ except ImportError:
 
 PrefixCallable = Callable[["BotShot", Message], str]
 
+MAX_PROCESOS_TRABAJO: int = 2
+"""
+Procesos del pool compartido para el trabajo pesado de CPU:
+transcodificar sonidos, generar vistas previas y las tareas programadas.
+"""
+
 
 # pylint: disable=abstract-method
 class BotShot(Bot):
@@ -59,37 +79,237 @@ class BotShot(Bot):
         super().__init__(cmd_prefix,
                          intents=BotShot.intents_botshot(),
                          application_id=get_botshot_id(),
+                         tree_cls=ArbolComandos,
                          options=opciones)
 
         self.log: BotLogger = BotLogger()
         self.despierto_desde: "datetime" = utcnow()
 
+        self.log.info("[DB] Aplicando migraciones...")
+        migrar_db()
+
+        self.colas_audio: dict[int, ColaAudio] = {}
+        self.pool_procesos: ProcessPoolExecutor = ProcessPoolExecutor(
+            max_workers=MAX_PROCESOS_TRABAJO
+        )
+        self.pool_ffmpeg: PoolFFmpeg = PoolFFmpeg(precalentados=get_ffmpeg_precalentados(),
+                                                  max_procesos=get_ffmpeg_max_procesos(),
+                                                  log=self.log)
+        self.cache_opus: CacheOpus = CacheOpus(f"{get_cache_path()}/opus",
+                                               pool_ffmpeg=self.pool_ffmpeg,
+                                               log=self.log)
+        self.transcodificador: TranscodificadorSonidos = TranscodificadorSonidos(
+            f"{get_cache_path()}/sonidos",
+            pool=self.pool_procesos,
+            log=self.log
+        )
+        self.bienvenidas: RegistroBienvenidas = RegistroBienvenidas(
+            f"{get_sonidos_path()}/bienvenida"
+        )
+        self.sondeo: SondeoAudio = SondeoAudio(log=self.log)
+        self.indices_nombres: IndicesGuilds = IndicesGuilds()
+        self.indice_sonidos: IndiceArchivos = IndiceArchivos(get_sonidos_path(), log=self.log)
+        self.imagenes: ProcesadorImagenes = ProcesadorImagenes(f"{get_cache_path()}/imagenes",
+                                                               pool=self.pool_procesos,
+                                                               log=self.log)
+        self.planificador: Planificador = Planificador(pool=self.pool_procesos, log=self.log)
+        self.cache_cogs: CacheCogs = CacheCogs(get_cogs_path(), f"{get_cache_path()}/cogs.json")
+        self.cogs_diferidos: dict[str, InfoCog] = {}
+        self._carga_diferida: Lock = Lock()
+        self.sesion_http: Optional[ClientSession] = None
+        self._escaneo_imagenes: Optional["Task"] = None
+        self._indexado_contenidos: Optional["Task"] = None
+        self.voz: GestorVoz = GestorVoz(
+            self,
+            ventana_inactividad=get_voz_ventana_inactividad(),
+            al_desconectar=lambda guild: self.cola_audio(guild).detener(),
+            log=self.log
+        )
+
 
     async def setup_hook(self) -> None:
         """
         Reliza acciones iniciales que el bot necesita.
         """
 
+        self.log.info("[AUDIO] Cargando sonidos de bienvenida...")
+        await to_thread(self.bienvenidas.cargar)
+        await to_thread(self.indice_sonidos.cargar)
+        self.indice_sonidos.iniciar()
+        self.log.info("[IMAGENES] Cargando índice de imágenes...")
+        await to_thread(self.imagenes.cargar)
+        self._escaneo_imagenes = create_task(self.imagenes.escanear(get_imagenes_path()))
+        self._indexado_contenidos = create_task(self.indexar_contenidos())
+        self.sesion_http = ClientSession()
+        await self.pool_ffmpeg.iniciar()
+        self.voz.iniciar()
         await self.cargar_cogs()
+        self.planificador.iniciar()
+
+
+    async def indexar_contenidos(self) -> None:
+        """
+        Registra el contenido de las imágenes y sonidos que ya estaban
+        guardados, para que lo que se suba después no los repita.
+        """
+
+        registrados = await to_thread(indexar_existentes, get_imagenes_path(), get_sonidos_path())
+
+        if registrados:
+            self.log.info(f"[ARCHIVOS] Se indexó el contenido de {registrados} archivos " +
+                          "ya guardados.")
 
 
     async def cargar_cogs(self) -> None:
         """
-        Busca y carga recursivamente todos los cogs
-        del bot.
+        Busca todos los cogs del bot y carga los que no son diferidos,
+        registrando cuánto tardó cada uno. Los diferidos se cargan recién
+        cuando se usa alguno de sus comandos, salvo que todavía no se
+        sepa cuáles son.
+
+        discord importa cada extensión sin ceder el loop, así que las
+        importaciones corren de a una; lo único que se solapa entre cogs
+        son sus `setup` asincrónicos.
+        """
+
+        inicio = perf_counter()
+        cogs = await to_thread(self.cache_cogs.descubrir)
+        inmediatos = [info for info in cogs
+                      if not info.diferido or info.hash_arbol is None or not info.comandos]
+
+        self.cogs_diferidos = {comando: info
+                               for info in cogs if info not in inmediatos
+                               for comando in info.comandos}
+
+        tiempos = [tiempo for tiempo in await gather(*map(self.cargar_cog, inmediatos))
+                   if tiempo is not None]
+
+        diferidos = {info.extension for info in self.cogs_diferidos.values()}
+        importaciones = sum(tiempo.importacion for tiempo in tiempos)
+        self.log.info(f"[COG] Se cargaron {len(tiempos)} cogs en " +
+                      f"{(perf_counter() - inicio) * 1000:.1f}ms " +
+                      f"({len(diferidos)} diferido/s), {importaciones * 1000:.1f}ms " +
+                      "importando de a uno y el resto armándolos a la vez:")
+        for tiempo in sorted(tiempos, key=lambda tiempo: tiempo.total, reverse=True):
+            self.log.info(f"[COG]    {tiempo.extension}: importación " +
+                          f"{tiempo.importacion * 1000:.1f}ms, setup de reloj " +
+                          f"{tiempo.setup * 1000:.1f}ms (solapado con otros cogs)")
+
+        await self.sincronizar_arbol()
+
+
+    async def cargar_cog(self, info: InfoCog) -> Optional[TiempoCarga]:
+        """
+        Carga la extensión de un cog y anota sus comandos en el caché.
+        Devuelve cuánto tardó, o `None` si falló.
         """
 
-        ext = "py"
+        marca = medir_carga()
+        inicio = perf_counter()
+
+        try:
+            await self.load_extension(info.extension)
+        except Exception as err: # pylint: disable=broad-except
+            self.log.error(f"[COG] Falló la carga de {info.extension!r}: {err!r}")
+            self.cache_cogs.olvidar(info.extension)
+            return None
+
+        fin = perf_counter()
+        inicio_setup = marca[0] or fin
+        self.cache_cogs.anotar(info.extension, (cog for cog in self.cogs.values()
+                                                if type(cog).__module__ == info.extension))
+
+        return TiempoCarga(info.extension, inicio_setup - inicio, fin - inicio_setup)
+
+
+    async def cargar_cog_diferido(self, comando: str) -> bool:
+        """
+        Carga el cog diferido que tiene al comando, si no se cargó aún.
+        Devuelve `True` si se cargó.
+        """
+
+        if comando not in self.cogs_diferidos:
+            return False
+
+        async with self._carga_diferida:
+            info = self.cogs_diferidos.get(comando)
+
+            if info is None:
+                return False
 
-        for ruta_cog in buscar_archivos(patron=f"*.{ext}",
-                                        nombre_ruta=get_cogs_path(),
-                                        ignorar_patrones=("__init__.*", "*_abc.*")):
+            tiempo = await self.cargar_cog(info)
+            self.cogs_diferidos = {nombre: diferido
+                                   for nombre, diferido in self.cogs_diferidos.items()
+                                   if diferido.extension != info.extension}
 
-            self.log.info(f"[COG] Cargando cog {ruta_cog!r}")
-            await self.load_extension(ruta_cog.removesuffix(f".{ext}").replace("/", "."))
+        if tiempo is not None:
+            self.log.info(f"[COG] Cog diferido {info.extension!r} cargado al usar " +
+                          f"{comando!r}, en {tiempo.total * 1000:.1f}ms.")
+
+        return tiempo is not None
+
+
+    async def sincronizar_arbol(self, forzar: bool=False) -> bool:
+        """
+        Sincroniza el árbol de comandos con discord, sólo si cambió
+        algún comando desde la última vez (o si se pide 'forzar').
+        Devuelve `True` si se sincronizó.
+        """
+
+        hash_arbol = self.cache_cogs.hash_arbol()
+
+        if not forzar and hash_arbol == self.cache_cogs.hash_sincronizado:
+            self.log.info("[COG] El árbol de comandos no cambió, no se sincroniza.")
+            await to_thread(self.cache_cogs.guardar)
+            return False
+
+        # Al sincronizar, discord borra los comandos que no estén en el árbol
+        for info in {info.extension: info for info in self.cogs_diferidos.values()}.values():
+            await self.cargar_cog_diferido(info.comandos[0])
 
         self.log.info("Sincronizando arbol de comandos...")
         await self.tree.sync()
+        self.cache_cogs.hash_sincronizado = self.cache_cogs.hash_arbol()
+        await to_thread(self.cache_cogs.guardar)
+
+        return True
+
+
+    async def get_context(self,
+                          origen: Union[Message, "Interaction"],
+                          /,
+                          **opciones) -> Context:
+        """
+        Arma el contexto de un mensaje. Si invoca a un comando de un cog
+        diferido, primero se carga el cog.
+        """
+
+        ctx = await super().get_context(origen, **opciones)
+
+        if ctx.command is None and ctx.invoked_with in self.cogs_diferidos:
+            if await self.cargar_cog_diferido(ctx.invoked_with):
+                ctx = await super().get_context(origen, **opciones)
+
+        return ctx
+
+
+    async def close(self) -> None:
+        """
+        Libera los recursos propios de BotShot antes de cerrar.
+        """
+
+        self.voz.cerrar()
+        self.planificador.cerrar()
+        self.indice_sonidos.cerrar()
+        self.imagenes.cerrar()
+        self.transcodificador.cerrar()
+        self.pool_ffmpeg.cerrar()
+        self.pool_procesos.shutdown(wait=False, cancel_futures=True)
+
+        if self.sesion_http is not None:
+            await self.sesion_http.close()
+
+        await super().close()
 
 
     def actualizar_db(self) -> None:
@@ -99,8 +319,9 @@ class BotShot(Bot):
         """
 
         self.log.info("[DB] Actualizando guilds...")
-        for guild in self.guilds:
-            actualizar_guild(guild.id, guild.name)
+        with transaccion():
+            for guild in self.guilds:
+                actualizar_guild(guild.id, guild.name)
 
 
     @property
@@ -112,6 +333,18 @@ class BotShot(Bot):
         return utcnow() - self.despierto_desde
 
 
+    def cola_audio(self, guild: "Guild") -> ColaAudio:
+        """
+        Devuelve la cola de reproducción del guild, creándola
+        si todavía no existe.
+        """
+
+        if guild.id not in self.colas_audio:
+            self.colas_audio[guild.id] = ColaAudio(guild, log=self.log)
+
+        return self.colas_audio[guild.id]
+
+
     def es_admin(self, user_id: int) -> bool:
         """
         Verifica si el id de un usuario pertenece al
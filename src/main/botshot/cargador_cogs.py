@@ -0,0 +1,281 @@
+"""
+Módulo para descubrir y cargar los cogs de BotShot.
+
+Lo que se encuentra al buscar los cogs se guarda en un caché, que sólo
+se rehace para los archivos que cambiaron. El caché también anota qué
+comandos tiene cada cog, y un hash de cómo se sincronizan con discord:
+así el árbol de comandos se sincroniza sólo cuando cambió algo, y los
+cogs que declaran 'CARGA_DIFERIDA = True' se pueden cargar recién la
+primera vez que alguien usa uno de sus comandos.
+"""
+
+from ast import AnnAssign, Assign, Constant, Name, parse
+from hashlib import sha256
+from json import dump, dumps, load
+from os import replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional
+
+from discord.app_commands import CommandTree
+
+from ..archivos import buscar_archivos, mtimes_carpetas
+
+if TYPE_CHECKING:
+
+    from os import PathLike
+
+    from discord import Interaction
+    from discord.app_commands import Command, Group
+    from discord.ext.commands import Cog
+
+
+NOMBRE_CARGA_DIFERIDA: str = "CARGA_DIFERIDA"
+"""
+Constante que un módulo de cog pone en `True` para cargarse recién
+cuando se usa uno de sus comandos.
+"""
+
+IGNORAR_COGS: tuple[str, ...] = ("__init__.*", "*_abc.*")
+
+
+class InfoCog(NamedTuple):
+    """
+    Lo que se sabe de un cog sin tener que importarlo.
+    """
+
+    extension: str
+    ruta: str
+    mtime_ns: int
+    diferido: bool
+    comandos: tuple[str, ...] = ()
+    hash_arbol: Optional[str] = None
+    """
+    Hash de sus comandos de barra, o `None` si nunca se cargó
+    desde la última vez que cambió el archivo.
+    """
+
+
+class TiempoCarga(NamedTuple):
+    """
+    Cuánto tardó en cargarse un cog.
+
+    Las importaciones corren de a una, así que 'importacion' es sólo la
+    del cog. Los setups de varios cogs se solapan, así que 'setup' es el
+    tiempo de reloj desde que empezó a armarse hasta que terminó, y
+    puede incluir lo que tardaron otros cogs en el medio.
+    """
+
+    extension: str
+    importacion: float # en segundos
+    setup: float # en segundos, de reloj
+
+    @property
+    def total(self) -> float:
+        """
+        Tiempo total de la carga.
+        """
+
+        return self.importacion + self.setup
+
+
+def declara_carga_diferida(ruta: "PathLike") -> bool:
+    """
+    Se fija, sin importarlo, si un módulo pone 'CARGA_DIFERIDA' en `True`.
+    """
+
+    arbol = parse(Path(ruta).read_text(encoding="utf-8"))
+
+    for nodo in arbol.body:
+        if isinstance(nodo, Assign):
+            objetivos = nodo.targets
+        elif isinstance(nodo, AnnAssign):
+            objetivos = [nodo.target]
+        else:
+            continue
+
+        if any(isinstance(objetivo, Name) and objetivo.id == NOMBRE_CARGA_DIFERIDA
+               for objetivo in objetivos):
+            return isinstance(nodo.value, Constant) and nodo.value.value is True
+
+    return False
+
+
+def hash_comandos(comandos: Iterable["Command | Group"]) -> str:
+    """
+    Devuelve un hash de los comandos tal como se mandan a discord
+    al sincronizar.
+    """
+
+    datos = sorted((comando.to_dict() for comando in comandos), key=lambda datos: datos["name"])
+
+    return sha256(dumps(datos, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def nombres_comandos(cog: "Cog") -> tuple[str, ...]:
+    """
+    Devuelve los nombres con los que se puede invocar a un cog: sus
+    comandos de barra (y grupos) y sus comandos de texto con sus alias.
+    """
+
+    nombres = [comando.name for comando in comandos_de_barra(cog)]
+
+    for comando in cog.get_commands():
+        nombres.append(comando.name)
+        nombres.extend(comando.aliases)
+
+    return tuple(nombres)
+
+
+def comandos_de_barra(cog: "Cog") -> list["Command | Group"]:
+    """
+    Devuelve los comandos de barra de más arriba de un cog, contando
+    los grupos que registra por su cuenta.
+    """
+
+    return cog.get_app_commands() + list(getattr(cog, "grupos_cargados", ()))
+
+
+class CacheCogs:
+    """
+    Caché de los cogs encontrados bajo una carpeta, guardado en JSON.
+    """
+
+    def __init__(self, raiz: "PathLike", ruta_cache: "PathLike") -> None:
+        """
+        Inicializa una instancia de 'CacheCogs'.
+        """
+
+        self.raiz: str = Path(raiz).as_posix()
+        self.ruta_cache: Path = Path(ruta_cache)
+        self.cogs: dict[str, InfoCog] = {}
+        self.hash_sincronizado: Optional[str] = None
+
+        self._carpetas: dict[str, int] = {}
+
+
+    def _leer(self) -> dict:
+        """
+        Lee el caché guardado, o devuelve uno vacío si no hay o está roto.
+        """
+
+        try:
+            with open(self.ruta_cache, encoding="utf-8") as arch:
+                return load(arch)
+        except (OSError, ValueError):
+            return {}
+
+
+    def descubrir(self) -> list[InfoCog]:
+        """
+        Devuelve los cogs que hay en la carpeta. Si no se agregó ni se
+        sacó ningún archivo, no se la vuelve a recorrer, y de los que no
+        cambiaron se reusa lo anotado.
+        Es bloqueante, así que se debería correr fuera del loop de eventos.
+        """
+
+        datos = self._leer()
+        anteriores = {}
+
+        for extension, info in datos.get("cogs", {}).items():
+            try:
+                anteriores[extension] = InfoCog(**{**info, "comandos": tuple(info["comandos"])})
+            except (TypeError, KeyError):
+                continue
+
+        carpetas = mtimes_carpetas(Path(self.raiz))
+
+        if carpetas == datos.get("carpetas") and anteriores:
+            rutas = [info.ruta for info in anteriores.values()]
+        else:
+            rutas = buscar_archivos(patron="*.py",
+                                    nombre_ruta=self.raiz,
+                                    ignorar_patrones=IGNORAR_COGS)
+
+        self.cogs = {}
+
+        for ruta in sorted(rutas):
+            extension = ruta.removesuffix(".py").replace("/", ".")
+            mtime_ns = Path(ruta).stat().st_mtime_ns
+            anterior = anteriores.get(extension)
+
+            if anterior is not None and anterior.mtime_ns == mtime_ns:
+                self.cogs[extension] = anterior
+            else:
+                self.cogs[extension] = InfoCog(extension,
+                                               ruta,
+                                               mtime_ns,
+                                               declara_carga_diferida(ruta))
+
+        self._carpetas = carpetas
+        self.hash_sincronizado = datos.get("hash_sincronizado")
+
+        return list(self.cogs.values())
+
+
+    def anotar(self, extension: str, cogs: Iterable["Cog"]) -> None:
+        """
+        Anota los comandos de los cogs que cargó una extensión.
+        """
+
+        cogs = list(cogs)
+        comandos = [comando for cog in cogs for comando in comandos_de_barra(cog)]
+
+        self.cogs[extension] = self.cogs[extension]._replace(
+            comandos=tuple(nombre for cog in cogs for nombre in nombres_comandos(cog)),
+            hash_arbol=hash_comandos(comandos)
+        )
+
+
+    def olvidar(self, extension: str) -> None:
+        """
+        Descarta lo anotado de una extensión, por ejemplo si falló al
+        cargarse, para que se vuelva a cargar la próxima vez.
+        """
+
+        self.cogs[extension] = self.cogs[extension]._replace(comandos=(), hash_arbol=None)
+
+
+    def hash_arbol(self) -> str:
+        """
+        Devuelve un hash de los comandos de barra de todos los cogs
+        anotados, cargados o no.
+        """
+
+        partes = sorted(f"{info.extension}:{info.hash_arbol}" for info in self.cogs.values()
+                        if info.hash_arbol is not None)
+
+        return sha256("\n".join(partes).encode("utf-8")).hexdigest()
+
+
+    def guardar(self) -> None:
+        """
+        Guarda el caché.
+        Es bloqueante, así que se debería correr fuera del loop de eventos.
+        """
+
+        self.ruta_cache.parent.mkdir(parents=True, exist_ok=True)
+        ruta_temp = self.ruta_cache.with_name(f".{self.ruta_cache.name}.tmp")
+
+        with open(ruta_temp, "w", encoding="utf-8") as arch:
+            dump({"carpetas": self._carpetas,
+                  "hash_sincronizado": self.hash_sincronizado,
+                  "cogs": {extension: info._asdict() for extension, info in self.cogs.items()}},
+                 arch)
+
+        replace(ruta_temp, self.ruta_cache)
+
+
+class ArbolComandos(CommandTree):
+    """
+    Árbol de comandos que, antes de buscar un comando de barra, carga
+    el cog diferido que lo tiene, si hace falta.
+    """
+
+    async def interaction_check(self, interaction: "Interaction") -> bool:
+        """
+        Se llama con cada comando de barra o autocompletado, antes de
+        buscar el comando.
+        """
+
+        await self.client.cargar_cog_diferido(interaction.data.get("name", ""))
+        return True
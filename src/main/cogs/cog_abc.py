@@ -11,6 +11,8 @@ from discord.app_commands import AppCommandError, Group
 from discord.ext.commands import Cog, Context
 from discord.utils import MISSING
 
+from ..auxiliares import marcar_inicio_setup
+
 if TYPE_CHECKING:
 
     from discord import Permissions
@@ -65,7 +67,9 @@ class _CogABC(Cog):
         """
         Inicializa una instancia '_CogABC', o una hija.
         """
+        marcar_inicio_setup()
         self.bot: "BotShot" = bot
+        self.grupos_cargados: list[_GrupoABC] = []
         self._cargar_grupos()
 
 
@@ -75,7 +79,9 @@ class _CogABC(Cog):
         """
 
         for clase_grupo in self.grupos():
-            self.bot.tree.add_command(clase_grupo(self.bot))
+            grupo = clase_grupo(self.bot)
+            self.bot.tree.add_command(grupo)
+            self.grupos_cargados.append(grupo)
 
 
     @classmethod
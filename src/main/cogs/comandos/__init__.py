@@ -6,5 +6,4 @@ from .admin import *
 from .canales import *
 from .directorios import *
 from .imagenes import *
-from .pruebas import *
 from .recomendaciones import *
@@ -2,6 +2,7 @@
 Cog que agrupa comandos administrativos.
 """
 
+from asyncio import to_thread
 from io import StringIO
 from os import execl
 from sys import executable as sys_executable
@@ -14,11 +15,13 @@ from discord.app_commands import describe
 from discord.app_commands.errors import CheckFailure
 from discord.ext.commands import Context
 
-from ...auxiliares import (autocompletado_miembros_guild,
+from ...auxiliares import (HISTOGRAMAS, autocompletado_miembros_guild,
+                           autocompletado_tareas,
                            autocompletado_usuarios_autorizados)
 from ...db.atajos import (actualizar_prefijo, borrar_usuario_autorizado,
-                          existe_usuario_autorizado, get_log_path,
-                          get_prefijo_guild, registrar_usuario_autorizado)
+                          existe_usuario_autorizado, get_ejecuciones_tarea,
+                          get_log_path, get_prefijo_guild,
+                          registrar_usuario_autorizado)
 from ..cog_abc import GroupsList, _CogABC, _GrupoABC
 
 if TYPE_CHECKING:
@@ -289,10 +292,7 @@ class CogAdmin(_CogABC):
 
         self.bot.log.info("Cerrando conexiones de voz...")
 
-        for client in self.bot.voice_clients:
-            if client.is_playing() or client.is_paused():
-                client.stop()
-            await client.disconnect()
+        await self.bot.voz.desconectar_todos()
 
 
     @appcommand(name="reboot",
@@ -335,6 +335,102 @@ class CogAdmin(_CogABC):
         await self.bot.close()
 
 
+    @appcommand(name="voz",
+                description="[ADMIN] Muestra cuántas conexiones de voz hay abiertas.")
+    async def conexiones_voz(self, interaccion: Interaction) -> None:
+        """
+        Muestra el estado de las conexiones de voz de BotShot.
+        """
+
+        stats = self.bot.voz.estadisticas()
+
+        await interaccion.response.send_message(f"*Conexiones de voz:* `{stats['conexiones']}`\n" +
+                                                f"*Reproduciendo:* `{stats['reproduciendo']}`\n" +
+                                                f"*Inactivas:* `{stats['inactivas']}`",
+                                                ephemeral=True)
+
+
+    @appcommand(name="autocompletado",
+                description="[ADMIN] Muestra cuánto tardan los autocompletados.")
+    async def latencias_autocompletado(self, interaccion: Interaction) -> None:
+        """
+        Muestra las latencias de cada autocompletado usado.
+        """
+
+        lineas = []
+
+        for nombre, histograma in sorted(HISTOGRAMAS.items()):
+            resumen = histograma.resumen()
+            if not resumen["llamadas"]:
+                continue
+
+            lineas.append(f"*{nombre}:* `{resumen['llamadas']}` llamadas, " +
+                          f"p50 `{resumen['p50'] * 1000:.0f}ms`, " +
+                          f"p95 `{resumen['p95'] * 1000:.0f}ms`, " +
+                          f"máx. `{resumen['maximo'] * 1000:.0f}ms`, " +
+                          f"`{resumen['excedidos']}` excedidas")
+
+        await interaccion.response.send_message("\n".join(lineas) or
+                                                "*Todavía no se usó ningún autocompletado.*",
+                                                ephemeral=True)
+
+
+    @appcommand(name="tareas",
+                description="[ADMIN] Muestra las tareas programadas y cuándo corrieron.")
+    @describe(tarea="La tarea de la que ver las últimas ejecuciones.")
+    @autocomplete(tarea=autocompletado_tareas)
+    async def tareas_programadas(self,
+                                 interaccion: Interaction,
+                                 tarea: Optional[str]=None) -> None:
+        """
+        Muestra el estado de cada tarea programada, o el historial
+        de una en particular.
+        """
+
+        if tarea is not None:
+            ejecuciones = await to_thread(get_ejecuciones_tarea, tarea, 10)
+            lineas = [f"`{inicio}` *{estado}* en `{duracion:.2f}s`" +
+                      (f": {detalle[:150]}" if detalle else "")
+                      for inicio, duracion, estado, detalle in ejecuciones]
+
+            await interaccion.response.send_message(f"**{tarea}**\n" + ("\n".join(lineas) or
+                                                    "*Todavía no corrió nunca.*"),
+                                                    ephemeral=True)
+            return
+
+        lineas = []
+
+        for programada in self.bot.planificador.tareas():
+            ultima = programada.ultima
+            estado = ("*corriendo*" if programada.en_curso
+                      else "*sin correr*" if ultima is None
+                      else f"*{ultima.estado}* el `{ultima.inicio:%d/%m %H:%M}` " +
+                           f"en `{ultima.duracion:.2f}s`")
+            proxima = ("-" if programada.proxima is None
+                       else f"`{programada.proxima:%d/%m %H:%M}`")
+
+            lineas.append(f"**{programada.nombre}** ({programada.programacion}): " +
+                          f"{estado}, próxima {proxima}")
+
+        await interaccion.response.send_message("\n".join(lineas) or
+                                                "*No hay tareas programadas.*",
+                                                ephemeral=True)
+
+
+    @appcommand(name="sincronizar",
+                description="[ADMIN] Vuelve a subir los comandos de barra a discord.")
+    async def sincronizar_comandos(self, interaccion: Interaction) -> None:
+        """
+        Sincroniza el árbol de comandos aunque no haya cambiado, por si
+        discord quedó desactualizado.
+        """
+
+        await interaccion.response.defer(ephemeral=True, thinking=True)
+        await self.bot.sincronizar_arbol(forzar=True)
+
+        await interaccion.followup.send("*Comandos sincronizados.*", ephemeral=True)
+
+
     @appcommand(name="uptime",
                 description="[ADMIN] Calcula el tiempo que BotShot estuvo activo.")
     async def calculate_uptime(self, interaccion: Interaction) -> None:
@@ -2,42 +2,49 @@
 Cog para comandos que trabajan con audio.
 """
 
-from io import BytesIO
 from typing import TYPE_CHECKING, Optional
 
-from discord import Attachment, ChannelType, FFmpegPCMAudio, Interaction
+from aiohttp import ClientError
+from discord import Attachment, ChannelType, Interaction
 from discord.app_commands import AppCommandError, autocomplete
 from discord.app_commands import command as appcommand
 from discord.app_commands import describe
 from discord.app_commands.errors import CheckFailure
-from requests import codes
-from requests import get as req_get
-from requests.exceptions import (ConnectionError, InvalidSchema, InvalidURL,
-                                 MissingSchema)
-from tinytag import TinyTag
 
-from ...archivos import borrar_archivo, existe, repite_nombre
+from ...archivos import bloques_de_url, borrar_archivo, existe, guardar_contenido
+from ...audio import (DURACION_MAXIMA_REPRODUCCION,
+                      TAMANIO_MAXIMO_AUDIO, TAMANIO_MAXIMO_REPRODUCCION,
+                      DescargaStreaming, Pista, Restricciones,
+                      analizar_info_audio, analizar_tamanio_audio)
 from ...auxiliares import (autocompletado_archivos_audio,
                            autocompletado_canales_voz,
                            autocompletado_miembros_guild,
                            autocompletado_sonidos_usuario)
 from ...checks import es_usuario_autorizado
-from ...db.atajos import get_sonidos_path
-from ...enums import RestriccionesSonido
+from ...db.atajos import (borrar_sonido_y_contenido, get_sonido_opus,
+                          get_sonidos_path)
+from ...enums import EstadoGuardado, ModoBucle
 from ..cog_abc import GroupsList, _CogABC, _GrupoABC
 
 if TYPE_CHECKING:
 
-    from os import PathLike
-
-    from discord import Member
+    from discord import AudioSource, Member
     from discord.abc import GuildChannel
 
     from ...botshot import BotShot
 
 
-TAMANIO_MAXIMO_AUDIO: int = 8388608 # 8 MB en bytes
-DURACION_MAXIMA_AUDIO: int = 8 # en segundos
+def _mensaje_restricciones(resultado: Restricciones) -> str:
+    """
+    Arma el mensaje de error con las restricciones que violó un audio.
+    """
+
+    restrs = ""
+    for restr, err in resultado:
+        restrs += f"\n\t- **{restr.value}:** {err}."
+
+    return ("**[ERROR]** El archivo no cumple con los requisitos.\n\n" +
+            f">>> Restricciones violadas:\n{restrs}")
 
 
 class GrupoAudio(_GrupoABC):
@@ -111,7 +118,7 @@ class GrupoAudio(_GrupoABC):
 
         if sonido is not None:
             await self._reproducir_sonido_cargado(interaccion, sonido)
-        
+
         elif archivo is not None:
             await self._reproducir_archivo_sonido(interaccion, archivo)
 
@@ -119,17 +126,33 @@ class GrupoAudio(_GrupoABC):
             await self._reproducir_link_musica(interaccion, link)
 
 
+    def _encolar_pista(self, interaccion: Interaction, pista: Pista) -> str:
+        """
+        Encola una pista en la cola del guild, y devuelve un mensaje
+        describiendo qué pasó con ella.
+        """
+
+        posicion = self.bot.cola_audio(interaccion.guild).encolar(pista)
+        self.bot.voz.registrar_actividad(interaccion.guild)
+
+        if posicion == 0:
+            return f"Reproduciendo `{pista.titulo}`..."
+
+        return f"`{pista.titulo}` encolado en la posición `{posicion}`."
+
+
     async def _reproducir_sonido_cargado(self,
                                          interaccion: Interaction,
                                          ruta_sonido: str) -> None:
         """
         Reproduce un sonido buscándolo en las carpetas que botshot tiene.
         """
-        obj_sonido = FFmpegPCMAudio(ruta_sonido)
-        interaccion.guild.voice_client.play(obj_sonido)      
 
-        await interaccion.response.send_message(content="Reproduciendo sonido...",
-                                                ephemeral=True)
+        # La primera vez que suena, el sonido se transcodifica
+        await interaccion.response.defer(ephemeral=True, thinking=True)
+        pista = await self.bot.cache_opus.pista(ruta_sonido)
+        await interaccion.followup.send(content=self._encolar_pista(interaccion, pista),
+                                        ephemeral=True)
 
 
     async def _reproducir_archivo_sonido(self,
@@ -139,17 +162,70 @@ class GrupoAudio(_GrupoABC):
         Reproduce un sonido proveniente de un archivo subido.
         """
 
-        if "audio" not in archivo.content_type:
+        if archivo.content_type is None or "audio" not in archivo.content_type:
             await interaccion.response.send_message(content="Capo, esto no es un audio.",
                                                     ephemeral=True)
             return
 
-        arch_sonido = await archivo.to_file()
-        obj_sonido = FFmpegPCMAudio(arch_sonido.fp, pipe=True)
-        interaccion.guild.voice_client.play(obj_sonido)
+        resultado = analizar_tamanio_audio(archivo.size, TAMANIO_MAXIMO_REPRODUCCION)
 
-        await interaccion.response.send_message(content="Reproduciendo archivo de audio...",
-                                                ephemeral=True)
+        if resultado:
+            await interaccion.response.send_message(content=_mensaje_restricciones(resultado),
+                                                    ephemeral=True)
+            return
+
+        await interaccion.response.defer(ephemeral=True, thinking=True)
+
+        try:
+            resultado = await self._sondear_para_reproducir(archivo.url)
+        except ClientError:
+            resultado = None
+
+        if resultado is None:
+            msg = "**[ERROR]** No se pudo acceder al archivo."
+        elif resultado:
+            msg = _mensaje_restricciones(resultado)
+        else:
+            pista = Pista(archivo.filename, lambda: self._fuente_streaming(archivo.url))
+            msg = self._encolar_pista(interaccion, pista)
+
+        await interaccion.followup.send(content=msg,
+                                        ephemeral=True)
+
+
+    async def _sondear_para_reproducir(self, url: str) -> Restricciones:
+        """
+        Sondea un audio remoto y devuelve las restricciones de
+        reproducción que viola, sin decodificarlo.
+        """
+
+        info = await self.bot.sondeo.sondear_url(self.bot.sesion_http,
+                                                 url,
+                                                 tamanio_maximo=TAMANIO_MAXIMO_REPRODUCCION)
+
+        return analizar_info_audio(info,
+                                   tamanio_maximo=TAMANIO_MAXIMO_REPRODUCCION,
+                                   duracion_maxima=DURACION_MAXIMA_REPRODUCCION)
+
+
+    async def _fuente_streaming(self, url: str) -> "AudioSource":
+        """
+        Crea una fuente que va reproduciendo el archivo a medida que
+        se descarga. Al liberar la fuente, como al hacer `/audio stop`,
+        también se corta la descarga.
+        """
+
+        descarga = DescargaStreaming(self.bot.sesion_http,
+                                     url,
+                                     tamanio_maximo=TAMANIO_MAXIMO_REPRODUCCION,
+                                     log=self.bot.log)
+        descarga.iniciar()
+
+        try:
+            return await self.bot.pool_ffmpeg.fuente(descarga, al_cerrar=descarga.cancelar)
+        except BaseException:
+            descarga.cancelar()
+            raise
 
 
     async def _reproducir_link_musica(self,
@@ -159,29 +235,28 @@ class GrupoAudio(_GrupoABC):
         Reproduce música desde una URL con el contenido.
         """
 
+        await interaccion.response.defer(ephemeral=True, thinking=True)
+
         try:
-            req = req_get(url)
-        except (InvalidURL, InvalidSchema, MissingSchema, ConnectionError):
-            await interaccion.response.send_message("**[ERROR]** URL inválida.",
-                                                    ephemeral=True)
+            resultado = await self._sondear_para_reproducir(url)
+        except (ClientError, ValueError):
+            # 'ValueError' si la URL ni siquiera tiene un formato válido
+            await interaccion.followup.send("**[ERROR]** URL inválida.",
+                                            ephemeral=True)
             return
 
-        if not req.status_code == codes.ok:
-            msg = "**[ERROR]** Operación inválida."
-        
-        elif "audio" not in req.headers["content-type"]:
-            msg = "**[ERROR]** La URL no es de un audio."
+        if resultado:
+            msg = _mensaje_restricciones(resultado)
         else:
-            msg = f"Reproduciendo desde link `{url}`..."
-            obj_sonido = FFmpegPCMAudio(BytesIO(req.content), pipe=True)
-            interaccion.guild.voice_client.play(obj_sonido)
+            pista = Pista(url, lambda: self._fuente_streaming(url))
+            msg = self._encolar_pista(interaccion, pista)
 
-        await interaccion.response.send_message(content=msg,
-                                                ephemeral=True)
+        await interaccion.followup.send(content=msg,
+                                        ephemeral=True)
 
 
     @appcommand(name="stop",
-                description="Detiene un sonido.")
+                description="Detiene un sonido y vacía la cola.")
     async def parar_sonido(self,
                            interaccion: Interaction) -> None:
         """
@@ -194,13 +269,89 @@ class GrupoAudio(_GrupoABC):
             mensaje = "Capo, no estoy reproduciendo nada, y tampoco hay nada pausado."
 
         else:
-            mensaje = f"*Parando la reproducción...*"
+            mensaje = "*Parando la reproducción...*"
+
+        self.bot.cola_audio(interaccion.guild).detener()
+        await interaccion.response.send_message(content=mensaje,
+                                                ephemeral=True)
+
+
+    @appcommand(name="saltar",
+                description="Salta al siguiente audio de la cola.")
+    async def saltar_sonido(self,
+                            interaccion: Interaction) -> None:
+        """
+        Salta la pista que esté sonando.
+        """
+
+        saltada = self.bot.cola_audio(interaccion.guild).saltar()
+
+        if saltada is None:
+            mensaje = "Capo, no estoy reproduciendo nada."
+        else:
+            mensaje = f"*Saltando* `{saltada.titulo}`*...*"
+
+        await interaccion.response.send_message(content=mensaje,
+                                                ephemeral=True)
+
+
+    @appcommand(name="limpiar",
+                description="Vacía la cola, sin cortar lo que esté sonando.")
+    async def limpiar_cola(self,
+                           interaccion: Interaction) -> None:
+        """
+        Quita todas las pistas pendientes de la cola.
+        """
+
+        cantidad = self.bot.cola_audio(interaccion.guild).limpiar()
+        await interaccion.response.send_message(content=f"*Quité* `{cantidad}` *audio/s de la cola.*",
+                                                ephemeral=True)
+
+
+    @appcommand(name="cola",
+                description="Muestra los audios en cola.")
+    async def mostrar_cola(self,
+                           interaccion: Interaction) -> None:
+        """
+        Muestra la pista actual y las pendientes.
+        """
+
+        cola = self.bot.cola_audio(interaccion.guild)
+
+        if not cola.ocupada:
+            await interaccion.response.send_message(content="*La cola está vacía.*",
+                                                    ephemeral=True)
+            return
+
+        pendientes = "\n".join(f"\t`{i}.` `{titulo}`"
+                               for i, titulo in enumerate(cola.listar()[:20], start=1))
+        sobrantes = len(cola) - 20
+        if sobrantes > 0:
+            pendientes += f"\n\t*...y {sobrantes} más.*"
+
+        mensaje = (f"**Sonando:** `{cola.actual.titulo}`\n" +
+                   f"**Bucle:** `{cola.modo_bucle.value}`\n\n" +
+                   (f">>> {pendientes}" if pendientes else "*No hay nada más en cola.*"))
 
-        cl_voz.stop()
         await interaccion.response.send_message(content=mensaje,
                                                 ephemeral=True)
 
 
+    @appcommand(name="bucle",
+                description="Cambia el modo de repetición de la cola.")
+    @describe(modo="Qué repetir.")
+    async def cambiar_bucle(self,
+                            interaccion: Interaction,
+                            modo: ModoBucle) -> None:
+        """
+        Cambia el modo de bucle de la cola.
+        """
+
+        self.bot.cola_audio(interaccion.guild).modo_bucle = modo
+        await interaccion.response.send_message(content=f"*Bucle:* `{modo.value}`",
+                                                ephemeral=True)
+
+
     @appcommand(name="pausa",
                 description="Pausa/Resume el audio.")
     async def pausar_resumir_sonido(self,
@@ -255,7 +406,7 @@ class GrupoSonido(_GrupoABC):
         Agrega un sonido asignado a un usuario.
         """
 
-        if (audio.content_type is None 
+        if (audio.content_type is None
             or "audio" not in audio.content_type):
 
             await interaccion.response.send_message(content="*Este archivo no es de audio. >:(*",
@@ -277,49 +428,51 @@ class GrupoSonido(_GrupoABC):
             usuario: "Member" = interaccion.guild.get_member(int(usuario))
 
         audio_fn = audio.filename
-        ruta_temp = repite_nombre(f"{get_sonidos_path()}/bienvenida/{usuario.id}/{audio_fn}")
-        await audio.save(ruta_temp)
-        resultado = self._analizar_archivo_audio(ruta_temp)
+        # Si ya se sabe que pesa demasiado, ni se lo baja ni se lo sondea
+        resultado = analizar_tamanio_audio(audio.size)
+
+        if not resultado:
+            await interaccion.response.defer(ephemeral=True, thinking=True)
+
+            try:
+                info = await self.bot.sondeo.sondear_url(self.bot.sesion_http,
+                                                         audio.url,
+                                                         tamanio_maximo=TAMANIO_MAXIMO_AUDIO)
+                resultado = analizar_info_audio(info)
+            except ClientError:
+                await interaccion.followup.send(content="**[ERROR]** No se pudo acceder al archivo.",
+                                                ephemeral=True)
+                return
 
         if resultado:
-            restrs = ""
-            borrar_archivo(ruta_temp)
-            for restr, err in resultado:
-                restrs += f"\n\t- **{restr.value}:** {err}."
-
-            mensaje = (f"**[ERROR]** El archivo no cumple con los requisitos.\n\n" +
-                       f">>> Restricciones violadas:\n{restrs}")
+            mensaje = _mensaje_restricciones(resultado)
         else:
-            mensaje = f"Agregando sonido `{audio_fn}` para **{usuario.display_name}**..."
-
-        await interaccion.response.send_message(content=mensaje,
+            try:
+                ruta, estado = await guardar_contenido(
+                    bloques_de_url(self.bot.sesion_http, audio.url),
+                    f"{get_sonidos_path()}/bienvenida/{usuario.id}/{audio_fn}"
+                )
+            except ClientError:
+                await interaccion.followup.send(content="**[ERROR]** No se pudo bajar el archivo.",
                                                 ephemeral=True)
-        self.bot.log.info(mensaje)
-
-
-    def _analizar_archivo_audio(self,
-                                ruta_audio: "PathLike") -> list[tuple[RestriccionesSonido, str]]:
-        """
-        Analiza un archivo de audio.
-        Devuelve una lista con las restricciones violadas que se encontraron, junto con un mensaje
-        de error; o una lista vacía si el archivo pasa las pruebas.
-        """
-
-        resultado = []
-        tags = TinyTag.get(ruta_audio)
-
-        if tags.filesize > TAMANIO_MAXIMO_AUDIO: # No más de 8 MB
-            mb = 1048576 # 1 Mb en b
-            resultado.append((RestriccionesSonido.MUY_PESADO,
-                              (f"El archivo pesa `{round(tags.filesize / mb, 3)} MB`, debería " +
-                              f"ser como máximo `{TAMANIO_MAXIMO_AUDIO} MB`")))
-
-        if tags.duration > DURACION_MAXIMA_AUDIO: # No más de 8 seg
-            resultado.append((RestriccionesSonido.DEMASIADO_LARGO,
-                              (f"El audio dura `{round(tags.duration, 3)} segundos`. Se permite " +
-                               f"que sea como máximo de `{DURACION_MAXIMA_AUDIO} segundos`")))
+                return
 
-        return resultado
+            if estado == EstadoGuardado.REPETIDO:
+                mensaje = (f"**{usuario.display_name}** ya tenía ese sonido, guardado " +
+                           f"como `{ruta}`.")
+            else:
+                mensaje = f"Agregando sonido `{audio_fn}` para **{usuario.display_name}**..."
+                self.bot.indice_sonidos.agregar(ruta)
+                self.bot.bienvenidas.agregar(usuario.id, ruta)
+                self.bot.transcodificador.en_segundo_plano(ruta, usuario.id)
+
+        if interaccion.response.is_done():
+            await interaccion.followup.send(content=mensaje,
+                                            ephemeral=True)
+        else:
+            await interaccion.response.send_message(content=mensaje,
+                                                    ephemeral=True)
+        self.bot.log.info(mensaje)
 
 
     @appcommand(name="quitar",
@@ -337,8 +490,16 @@ class GrupoSonido(_GrupoABC):
             await interaccion.response.send_message(f"El sonido en cuestión `{sonido}` " +
                                                      "no existe.",
                                                     ephemeral=True)
+            return
+
+        ruta_opus = get_sonido_opus(sonido)
+        if ruta_opus is not None:
+            borrar_archivo(ruta_opus, ignorar_excepciones=True)
 
+        borrar_sonido_y_contenido(sonido)
         borrar_archivo(sonido)
+        self.bot.indice_sonidos.quitar(sonido)
+        self.bot.bienvenidas.quitar(sonido)
         await interaccion.response.send_message(f"*Eliminado sonido en* `{sonido}`*...*",
                                                 ephemeral=True)
 
@@ -377,30 +538,23 @@ class CogAudio(_CogABC):
             return
 
         cl_voz = canal.guild.voice_client
-        es_mismo_canal = False
+        es_mismo_canal = (cl_voz is not None
+                          and cl_voz.is_connected()
+                          and cl_voz.channel == canal)
 
-        if (cl_voz is not None
-            and cl_voz.is_connected()):
+        # Conectarse a voz puede tardar más de lo que discord espera una respuesta
+        await interaccion.response.defer(ephemeral=True, thinking=True)
+        await self.bot.voz.conectar(canal)
 
-            if cl_voz.channel == canal:
-                es_mismo_canal = True
-
-            if cl_voz.is_playing() or cl_voz.is_paused():
-                await cl_voz.move_to(canal)
-
-            else:
-                await cl_voz.disconnect()
-                await canal.connect()
-
-        else: # Si se conecta por primera vez
-            await canal.connect()
+        if es_mismo_canal:
+            await interaccion.followup.send(content="Ya estoy en ese canal!",
+                                            ephemeral=True)
+            return
 
-        reconexion = "reconecté" if es_mismo_canal else "conecté"
-        await interaccion.response.send_message(content=f"Ya me {reconexion}!",
-                                                ephemeral=True)
+        await interaccion.followup.send(content="Ya me conecté!",
+                                        ephemeral=True)
 
-        self.bot.log.info(f"{'Reconectado' if es_mismo_canal else 'Conectado'} al canal de voz " +
-                          f"{canal.name!r} en {canal.guild.name!r}.")
+        self.bot.log.info(f"Conectado al canal de voz {canal.name!r} en {canal.guild.name!r}.")
 
 
     @appcommand(name="desconectar",
@@ -419,9 +573,7 @@ class CogAudio(_CogABC):
                                                     ephemeral=True)
             return
 
-        if cl_voz.is_playing() or cl_voz.is_paused():
-            cl_voz.stop()
-        await cl_voz.disconnect()
+        await self.bot.voz.desconectar(interaccion.guild)
         await interaccion.response.send_message(content="Desconectado correctamente.",
                                                 ephemeral=True)
 
@@ -2,6 +2,7 @@
 Cog para manejar imágenes.
 """
 
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 from discord import File, Interaction
@@ -24,10 +25,18 @@ class CogImagenes(_CogABC):
 
     @appcommand(name='randart',
                 description='Muestra una imagen aleatoria.')
-    @describe(cantidad="La cantidad de imágenes a mandar. Máximo 15 (quince).")
-    async def gimmerandart(self, interaccion: Interaction, cantidad: int=1) -> None:
+    @describe(cantidad="La cantidad de imágenes a mandar. Máximo 15 (quince).",
+              original="Mandar la imagen original en vez de la vista previa.")
+    async def gimmerandart(self,
+                           interaccion: Interaction,
+                           cantidad: int=1,
+                           original: bool=False) -> None:
         """|
         Mandar una foto random.
+
+        Por defecto se manda la vista previa, que pesa mucho menos,
+        si es que la imagen ya tiene una. Las animadas se mandan
+        siempre originales.
         """
         path_archivo = get_imagenes_path()
         limite = 15
@@ -41,8 +50,15 @@ class CogImagenes(_CogABC):
             await interaccion.response.send_message(content='Disfruta de tu porno, puerco de mierda ' +
                                                              f'{interaccion.user.mention}')
 
-        arch = File(archivo_random(path_archivo))
-        await interaccion.channel.send(content=f'**||{arch.filename}||**',
+        ruta_imagen = archivo_random(path_archivo)
+        vista_previa = None if original else self.bot.imagenes.vista_previa(ruta_imagen)
+
+        if vista_previa is None:
+            arch = File(ruta_imagen)
+        else:
+            arch = File(vista_previa, filename=f"{Path(ruta_imagen).stem}.jpg")
+
+        await interaccion.channel.send(content=f'**||{Path(ruta_imagen).name}||**',
                                         file=arch)
 
 
@@ -16,6 +16,12 @@ if TYPE_CHECKING:
     from ...botshot import BotShot
 
 
+CARGA_DIFERIDA: bool = True
+"""
+Estos comandos casi no se usan, así que el cog se carga recién
+la primera vez que alguien usa uno.
+"""
+
 class CogPruebas(_CogABC):
     """
     Cog para comandos de pruebas.
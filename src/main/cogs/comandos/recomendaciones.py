@@ -55,11 +55,11 @@ class CogRecomendaciones(_CogABC):
         a agregar.
         """
 
-        recomendadas = get_recomendaciones_carpetas()
+        recomendadas = [f'\t-\t`{nombre_f}`\t( *{self.bot.get_user(id_u)}* )'
+                        for (nombre_f, _, id_u) in get_recomendaciones_carpetas()]
 
         if recomendadas:
-            contenido = ('>>> \t**Lista de Recomendaciones:**\n\n' +
-                         '\n'.join(f'\t-\t`{nombre_f}`\t( *{self.bot.get_user(id_u)}* )' for (nombre_f, _, id_u) in recomendadas))
+            contenido = ('>>> \t**Lista de Recomendaciones:**\n\n' + '\n'.join(recomendadas))
         else:
             contenido = '*No hay recomendaciones crack.*'
 
@@ -1,24 +1,32 @@
 """
-Cog para tareas periódicas, como loops.
+Cog para tareas periódicas, como backups.
 """
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Callable
 
-from discord.ext.tasks import loop
-
-from ...archivos import hacer_backup_db
+from ...archivos import hacer_backup_db, hacer_backup_incremental
+from ...auxiliares import TareaProgramada, parsear_programacion
+from ...db import mantener_db
+from ...db.atajos import (get_backup_path, get_imagenes_path,
+                          get_limite_backup_archivos, get_programacion_tarea,
+                          get_sonidos_path)
 from ..cog_abc import _CogABC
 
 if TYPE_CHECKING:
 
-    from discord.ext.tasks import Loop
-
     from ...botshot import BotShot
 
 
+JITTER_TAREAS: float = 600 # en segundos
+"""
+Margen aleatorio que se le suma a cada ejecución, para que las tareas
+con la misma programación no arranquen todas juntas.
+"""
+
+
 class CogTareas(_CogABC):
     """
-    Cog para loops y demás.
+    Cog que registra las tareas periódicas en el planificador del bot.
     """
 
     def __init__(self, bot: "BotShot") -> None:
@@ -28,21 +36,35 @@ class CogTareas(_CogABC):
 
         super().__init__(bot)
 
-        self.tareas: list["Loop"] = [
-            self.backup_db
+        self.tareas: list[TareaProgramada] = [
+            self._tarea("backup_db", self.backup_db),
+            self._tarea("backup_archivos", self.backup_archivos),
+            self._tarea("mantenimiento_db", self.mantenimiento_db)
         ]
 
-        self.iniciar_tareas()
+        self.registrar_tareas()
 
 
-    def iniciar_tareas(self) -> None:
+    @staticmethod
+    def _tarea(nombre: str, funcion: Callable[[], Any]) -> TareaProgramada:
         """
-        Inicia todas las tareas.
+        Arma una tarea con la programación guardada en la DB.
         """
 
-        self.bot.log.info("Iniciando tareas...")
+        return TareaProgramada(nombre,
+                               funcion,
+                               parsear_programacion(get_programacion_tarea(nombre)),
+                               jitter=JITTER_TAREAS)
+
+
+    def registrar_tareas(self) -> None:
+        """
+        Agrega todas las tareas al planificador.
+        """
+
+        self.bot.log.info("Registrando tareas...")
         for tarea in self.tareas:
-            tarea.start()
+            self.bot.planificador.agregar(tarea)
 
 
     async def cog_unload(self) -> None:
@@ -52,25 +74,69 @@ class CogTareas(_CogABC):
 
         self.bot.log.info("Cancelando tareas...")
         for tarea in self.tareas:
-            tarea.cancel()
+            self.bot.planificador.quitar(tarea.nombre)
+
+
+    def backup_db(self) -> str:
+        """
+        Hace un backup de la DB. El planificador la corre en otro hilo.
+        """
+
+        info = hacer_backup_db()
+        detalle = f"DB guardada en {info.ruta!r} ({info.tamanio / 1024:.1f} KB)."
+
+        if info.borrados:
+            detalle += f" Se borraron los backups viejos {', '.join(info.borrados)}."
+
+        return detalle
 
 
-    @loop(hours=24.0)
-    async def backup_db(self) -> None:
+    async def backup_archivos(self) -> str:
         """
-        Hace un backup de la DB.
+        Hace un backup incremental de las imágenes y los sonidos,
+        en otro proceso.
         """
 
-        hacer_backup_db()
+        limite = get_limite_backup_archivos()
+        carpeta = f"{get_backup_path()}/archivos"
+        arboles = {"imagenes": get_imagenes_path(), "sonidos": get_sonidos_path()}
+        resumenes = []
+        errores = []
 
+        for nombre, raiz in arboles.items():
+            try:
+                resumen = await self.bot.planificador.en_proceso(hacer_backup_incremental,
+                                                                 raiz,
+                                                                 f"{carpeta}/{nombre}",
+                                                                 limite)
+            except Exception as err: # pylint: disable=broad-except
+                errores.append(f"{nombre}: {err!r}")
+                continue
 
-    @backup_db.before_loop
-    async def wait_for_bot(self) -> None:
+            resumenes.append(f"{nombre}: {resumen.cambiados} de {resumen.archivos} " +
+                             f"archivos cambiados, {resumen.bytes_escritos / 1024:.1f} KB nuevos.")
+
+        if errores:
+            raise RuntimeError(" ".join(resumenes + errores))
+
+        return " ".join(resumenes)
+
+
+    def mantenimiento_db(self) -> str:
         """
-        Espera hasta que el bot esté listo.
+        Revisa la DB, actualiza sus estadísticas y devuelve el espacio
+        libre. El planificador la corre en otro hilo.
         """
 
-        await self.bot.wait_until_ready()
+        info = mantener_db()
+
+        if not info.integra:
+            raise RuntimeError(f"La DB tiene problemas: {'; '.join(info.integridad[:5])}")
+
+        return (f"DB de {info.antes.tamanio / 1024:.1f} KB a " +
+                f"{info.despues.tamanio / 1024:.1f} KB, " +
+                f"{info.paginas_liberadas} páginas liberadas, " +
+                f"{info.despues.paginas_libres} libres.")
 
 
 async def setup(bot: "BotShot"):
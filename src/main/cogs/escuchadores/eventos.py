@@ -4,18 +4,17 @@ Cog para el handler de navegador de carpetas.
 
 from typing import TYPE_CHECKING
 
-from discord import FFmpegPCMAudio, Guild, Member, Message, VoiceState
+from discord import Guild, Member, Message, User, VoiceState
 from discord.ext.commands import Cog, Context
 
-from ...archivos import archivo_random
+from ...audio import AgrupadorIngresos
 from ...checks import es_canal_escuchado, mensaje_tiene_imagen
-from ...db.atajos import actualizar_guild, get_sonidos_path
+from ...db.atajos import actualizar_guild
 from ...interfaces import ConfirmacionGuardar
 from ..cog_abc import _CogABC
 
 if TYPE_CHECKING:
 
-    from discord import Member
     from discord.abc import GuildChannel
 
     from ...botshot import BotShot
@@ -26,6 +25,24 @@ class CogEventos(_CogABC):
     Cog para confirmar si guardar imágenes.
     """
 
+    def __init__(self, bot: "BotShot") -> None:
+        """
+        Inicializa una instancia de 'CogEventos'.
+        """
+
+        super().__init__(bot)
+        self.ingresos: AgrupadorIngresos = AgrupadorIngresos(self._dar_bienvenidas,
+                                                             log=bot.log)
+
+
+    async def cog_unload(self) -> None:
+        """
+        Descarta las bienvenidas que estaban por sonar.
+        """
+
+        self.ingresos.cancelar()
+
+
     @Cog.listener()
     async def on_ready(self) -> None:
         """
@@ -45,6 +62,99 @@ class CogEventos(_CogABC):
 
         self.bot.log.info(f'El bot se conectó a "{guild.name}"')
         actualizar_guild(guild.id, guild.name)
+        await self.bot.indices_nombres.preparar(guild)
+
+
+    @Cog.listener()
+    async def on_guild_available(self, guild: Guild) -> None:
+        """
+        Un servidor quedó disponible, por ejemplo al conectarse el bot.
+        Se arman sus índices de nombres antes de que alguien autocomplete.
+        """
+
+        await self.bot.indices_nombres.preparar(guild)
+
+
+    @Cog.listener()
+    async def on_guild_remove(self, guild: Guild) -> None:
+        """
+        El bot fue sacado de un servidor.
+        """
+
+        self.bot.indices_nombres.olvidar_guild(guild)
+
+
+    @Cog.listener()
+    async def on_member_join(self, miembro: Member) -> None:
+        """
+        Un miembro entró a un servidor.
+        """
+
+        self.bot.indices_nombres.actualizar_miembro(miembro)
+
+
+    @Cog.listener()
+    async def on_member_remove(self, miembro: Member) -> None:
+        """
+        Un miembro se fue de un servidor.
+        """
+
+        self.bot.indices_nombres.quitar_miembro(miembro)
+
+
+    @Cog.listener()
+    async def on_member_update(self, antes: Member, despues: Member) -> None:
+        """
+        Un miembro cambió algo de su perfil en el servidor, como el apodo.
+        """
+
+        if antes.nick != despues.nick:
+            self.bot.indices_nombres.actualizar_miembro(despues)
+
+
+    @Cog.listener()
+    async def on_user_update(self, antes: User, despues: User) -> None:
+        """
+        Un usuario cambió su nombre, que se ve en todos sus servidores.
+        """
+
+        if antes.name == despues.name:
+            return
+
+        for guild in despues.mutual_guilds:
+            miembro = guild.get_member(despues.id)
+            if miembro is not None:
+                self.bot.indices_nombres.actualizar_miembro(miembro)
+
+
+    @Cog.listener()
+    async def on_guild_channel_create(self, canal: "GuildChannel") -> None:
+        """
+        Se creó un canal en un servidor.
+        """
+
+        self.bot.indices_nombres.actualizar_canal(canal)
+
+
+    @Cog.listener()
+    async def on_guild_channel_delete(self, canal: "GuildChannel") -> None:
+        """
+        Se borró un canal de un servidor.
+        """
+
+        self.bot.indices_nombres.quitar_canal(canal)
+
+
+    @Cog.listener()
+    async def on_guild_channel_update(self,
+                                      antes: "GuildChannel",
+                                      despues: "GuildChannel") -> None:
+        """
+        Se modificó un canal de un servidor.
+        """
+
+        if antes.name != despues.name:
+            self.bot.indices_nombres.actualizar_canal(despues)
 
 
     @Cog.listener()
@@ -62,7 +172,7 @@ class CogEventos(_CogABC):
                           f'"{mensaje.channel.name}" del server "{mensaje.guild.name}" ' +
                           f'mediante {"un mensaje sin contenido" if not mensaje.content else f"el mensaje `{mensaje.content}`"}') #pylint: disable=line-too-long
         await mensaje.channel.send(content='¿Querés guardarlo pibe?',
-                                   view=ConfirmacionGuardar(),
+                                   view=ConfirmacionGuardar(mensaje=mensaje),
                                    delete_after=30,
                                    reference=mensaje.to_reference())
 
@@ -88,22 +198,28 @@ class CogEventos(_CogABC):
     @Cog.listener()
     async def on_voice_state_update(self,
                                     member: Member,
-                                    _before: VoiceState,
+                                    before: VoiceState,
                                     after: VoiceState) -> None:
         """
         Escucha si un miembro del guild cambió su estado de voz.
+
+        Sólo interesan los cambios de canal; silenciarse, ensordecerse o
+        transmitir también disparan este evento pero se ignoran.
         """
 
-        if after.channel is not None:
+        if after.channel is not None and before.channel != after.channel:
             await self._alguien_se_une_a_canal_de_voz(member, after.channel)
 
 
     async def _alguien_se_une_a_canal_de_voz(self,
-                                             miembro: "Member",
+                                             miembro: Member,
                                              canal: "GuildChannel") -> None:
         """
         Procesa el evento en el que un miembro de un guild
         se unió al mismo canal de voz que el bot.
+
+        La bienvenida no suena en el acto, sino que se agrupa con las
+        de otros que entren casi al mismo tiempo.
         """
 
         cl_audio = canal.guild.voice_client
@@ -112,19 +228,38 @@ class CogEventos(_CogABC):
             or canal != cl_audio.channel):
             return
 
-        ruta_sonidos = get_sonidos_path()
-        sonido = (archivo_random(f"{ruta_sonidos}/bienvenida/{miembro.id}")
-                  or archivo_random(f"{ruta_sonidos}/bienvenida/generico"))
-
         self.bot.log.info(f"{miembro.display_name!r} se conectó al canal de voz {canal.name!r} " +
                           f"en {canal.guild.name!r}")
 
-        if sonido is None:
+        self.ingresos.registrar(canal.guild, miembro)
+
+
+    async def _dar_bienvenidas(self, guild: Guild, miembros: list[Member]) -> None:
+        """
+        Encola las bienvenidas de los miembros que entraron en una
+        misma ráfaga, sin cortar lo que esté sonando.
+        """
+
+        cl_audio = guild.voice_client
+        if cl_audio is None:
             return
 
-        if cl_audio.is_playing():
-            cl_audio.stop()
-        cl_audio.play(FFmpegPCMAudio(sonido))
+        cola = self.bot.cola_audio(guild)
+        sonidos = []
+
+        for miembro in miembros:
+            sigue_en_canal = (miembro.voice is not None
+                              and miembro.voice.channel == cl_audio.channel)
+            sonido = self.bot.bienvenidas.sonido_para(miembro.id)
+
+            if sigue_en_canal and sonido is not None and sonido not in sonidos:
+                sonidos.append(sonido)
+
+        for sonido in sonidos:
+            cola.encolar(await self.bot.cache_opus.pista(sonido))
+
+        if sonidos:
+            self.bot.voz.registrar_actividad(guild)
 
 
 async def setup(bot: "BotShot"):
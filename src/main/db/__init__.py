@@ -4,3 +4,4 @@ Paquete de bases de datos.
 
 # Los atajos deberían ser llamados explícitamente
 from .database import *
+from .mantenimiento import *
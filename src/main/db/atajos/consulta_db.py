@@ -3,7 +3,6 @@ Módulo para atajos de consulta a la db.
 """
 
 from ..database import existe_dato_en_tabla
-from .sacar_db import get_usuarios_autorizados
 
 
 def existe_canal_escuchado(id_canal: int) -> bool:
@@ -22,8 +21,5 @@ def existe_usuario_autorizado(id_usuario: int) -> bool:
     especificado.
     """
 
-    for id_u, _, _ in get_usuarios_autorizados():
-        if id_usuario == id_u:
-            return True
-
-    return False
+    return existe_dato_en_tabla(tabla="usuarios_autorizados",
+                                id=id_usuario)
@@ -2,7 +2,7 @@
 Módulo para atajos de comandos DELETE.
 """
 
-from ..database import borrar_datos_de_tabla
+from ..database import borrar_datos_de_tabla, transaccion
 
 
 def borrar_canal_escuchado(canal_id: int) -> None:
@@ -30,3 +30,41 @@ def borrar_usuario_autorizado(id_usuario: int) -> None:
 
     borrar_datos_de_tabla(tabla="usuarios_autorizados",
                           id=id_usuario)
+
+
+def borrar_sonido(ruta: str) -> None:
+    """
+    Elimina el registro de un sonido subido.
+    """
+
+    borrar_datos_de_tabla(tabla="sonidos",
+                          ruta=ruta)
+
+
+def borrar_contenido(ruta: str) -> None:
+    """
+    Elimina el registro del contenido de un archivo guardado.
+    """
+
+    borrar_datos_de_tabla(tabla="contenidos",
+                          ruta=ruta)
+
+
+def borrar_sonido_y_contenido(ruta: str) -> None:
+    """
+    Elimina tanto el registro de un sonido subido como el
+    de su contenido, en una sola transacción.
+    """
+
+    with transaccion():
+        borrar_sonido(ruta)
+        borrar_contenido(ruta)
+
+
+def borrar_imagen(ruta: str) -> None:
+    """
+    Elimina el registro de una imagen procesada.
+    """
+
+    borrar_datos_de_tabla(tabla="imagenes",
+                          ruta=ruta)
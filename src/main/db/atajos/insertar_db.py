@@ -3,7 +3,7 @@ Módulo para atajos de INSERT.
 """
 
 from ..database import (actualizar_dato_de_tabla, existe_dato_en_tabla,
-                        insertar_datos_en_tabla)
+                        insertar_datos_en_tabla, transaccion)
 from .consulta_db import existe_canal_escuchado
 from .sacar_db import get_prefijo_default
 
@@ -15,17 +15,20 @@ def actualizar_guild(guild_id: int, nombre_guild: str) -> bool:
     Devuelve 'True' si el guild ya está presente, sino devuelve 'False'.
     """
 
-    if existe_dato_en_tabla(tabla="guilds", id=guild_id):
-        actualizar_dato_de_tabla(tabla="guilds",
-                                 nombre_col="nombre",
-                                 valor=nombre_guild)
-        return True
-
-    insertar_datos_en_tabla(tabla="guilds",
-                            llave_primaria_por_defecto=False,
-                            valores=(guild_id, nombre_guild))
-    actualizar_prefijo(get_prefijo_default(), guild_id)
-    return False
+    with transaccion():
+        if existe_dato_en_tabla(tabla="guilds", id=guild_id):
+            actualizar_dato_de_tabla(tabla="guilds",
+                                     nombre_col="nombre",
+                                     valor=nombre_guild,
+                                     # condiciones
+                                     id=guild_id)
+            return True
+
+        insertar_datos_en_tabla(tabla="guilds",
+                                llave_primaria_por_defecto=False,
+                                valores=(guild_id, nombre_guild))
+        actualizar_prefijo(get_prefijo_default(), guild_id)
+        return False
 
 
 def actualizar_prefijo(nuevo_prefijo: str, guild_id: int) -> bool:
@@ -35,16 +38,19 @@ def actualizar_prefijo(nuevo_prefijo: str, guild_id: int) -> bool:
     Devuelve 'True' si el prefijo ya está presente, sino devuelve 'False'.
     """
 
-    if existe_dato_en_tabla(tabla="prefijos", id_guild=guild_id):
-        actualizar_dato_de_tabla(tabla="prefijos",
-                                 nombre_col="prefijo",
-                                 valor=nuevo_prefijo)
-        return True
-
-    insertar_datos_en_tabla(tabla="prefijos",
-                            llave_primaria_por_defecto=True,
-                            valores=(guild_id, nuevo_prefijo))
-    return False
+    with transaccion():
+        if existe_dato_en_tabla(tabla="prefijos", id_guild=guild_id):
+            actualizar_dato_de_tabla(tabla="prefijos",
+                                     nombre_col="prefijo",
+                                     valor=nuevo_prefijo,
+                                     # condiciones
+                                     id_guild=guild_id)
+            return True
+
+        insertar_datos_en_tabla(tabla="prefijos",
+                                llave_primaria_por_defecto=True,
+                                valores=(guild_id, nuevo_prefijo))
+        return False
 
 
 def actualizar_canal_escuchado(id_canal: int, nombre_canal: str, id_guild: int) -> bool:
@@ -54,18 +60,19 @@ def actualizar_canal_escuchado(id_canal: int, nombre_canal: str, id_guild: int)
     Devuelve 'True' si el canal ya está presente, sino devuelve 'False'.
     """
 
-    if existe_canal_escuchado(id_canal=id_canal):
-        actualizar_dato_de_tabla(tabla="canales_escuchables",
-                                    nombre_col="nombre",
-                                    valor=nombre_canal,
-                                    # condiciones
-                                    id=id_canal)
-        return True
-
-    insertar_datos_en_tabla(tabla="canales_escuchables",
-                            llave_primaria_por_defecto=False,
-                            valores=(id_canal, id_guild, nombre_canal))
-    return False
+    with transaccion():
+        if existe_canal_escuchado(id_canal=id_canal):
+            actualizar_dato_de_tabla(tabla="canales_escuchables",
+                                        nombre_col="nombre",
+                                        valor=nombre_canal,
+                                        # condiciones
+                                        id=id_canal)
+            return True
+
+        insertar_datos_en_tabla(tabla="canales_escuchables",
+                                llave_primaria_por_defecto=False,
+                                valores=(id_canal, id_guild, nombre_canal))
+        return False
 
 
 def insertar_recomendacion_carpeta(nombre_carpeta: str,
@@ -78,15 +85,16 @@ def insertar_recomendacion_carpeta(nombre_carpeta: str,
     caso contrario devuelve 'False'.
     """
 
-    if existe_dato_en_tabla(tabla="carpetas_recomendadas",
-                            recomendacion=nombre_carpeta,
-                            id_usuario=id_usuario):
-        return False
+    with transaccion():
+        if existe_dato_en_tabla(tabla="carpetas_recomendadas",
+                                recomendacion=nombre_carpeta,
+                                id_usuario=id_usuario):
+            return False
 
-    insertar_datos_en_tabla(tabla="carpetas_recomendadas",
-                            llave_primaria_por_defecto=True,
-                            valores=(nombre_carpeta, nombre_usuario, id_usuario))
-    return True
+        insertar_datos_en_tabla(tabla="carpetas_recomendadas",
+                                llave_primaria_por_defecto=True,
+                                valores=(nombre_carpeta, nombre_usuario, id_usuario))
+        return True
 
 
 def registrar_usuario_autorizado(nombre: str,
@@ -99,11 +107,73 @@ def registrar_usuario_autorizado(nombre: str,
     devuelve 'False'.
     """
 
-    if existe_dato_en_tabla(tabla="usuarios_autorizados",
-                            id=id_usuario):
-        return False
+    with transaccion():
+        if existe_dato_en_tabla(tabla="usuarios_autorizados",
+                                id=id_usuario):
+            return False
+
+        insertar_datos_en_tabla(tabla="usuarios_autorizados",
+                                llave_primaria_por_defecto=False,
+                                valores=(id_usuario, nombre, discriminador))
+        return True
+
+
+def registrar_sonido(ruta: str, ruta_opus: str, id_usuario: int) -> None:
+    """
+    Registra la versión transcodificada de un sonido subido,
+    reemplazando la anterior si había una.
+    """
+
+    insertar_datos_en_tabla(tabla="sonidos",
+                            resolucion="REPLACE",
+                            llave_primaria_por_defecto=True,
+                            valores=(ruta, ruta_opus, id_usuario))
+
+
+def registrar_contenido(hash_contenido: str, ruta: str) -> None:
+    """
+    Registra el hash del contenido de un archivo guardado.
+    """
+
+    insertar_datos_en_tabla(tabla="contenidos",
+                            resolucion="REPLACE",
+                            llave_primaria_por_defecto=True,
+                            valores=(hash_contenido, ruta))
+
+
+def registrar_imagen(ruta: str, ruta_vista_previa: str, hash_perceptual: str) -> None:
+    """
+    Registra la vista previa y el hash perceptual de una imagen,
+    reemplazando los anteriores si había.
+    """
+
+    insertar_datos_en_tabla(tabla="imagenes",
+                            resolucion="REPLACE",
+                            llave_primaria_por_defecto=True,
+                            valores=(ruta, ruta_vista_previa, hash_perceptual))
+
+
+def registrar_ejecucion_tarea(nombre_tarea: str,
+                              inicio: str,
+                              duracion: float,
+                              estado: str,
+                              detalle: str,
+                              *,
+                              conservar: int=50) -> None:
+    """
+    Anota una ejecución de una tarea programada, y borra las más
+    viejas de esa tarea para que queden a lo sumo 'conservar'.
+    """
 
-    insertar_datos_en_tabla(tabla="usuarios_autorizados",
-                            llave_primaria_por_defecto=False,
-                            valores=(id_usuario, nombre, discriminador))
-    return True
+    with transaccion() as con:
+        insertar_datos_en_tabla(tabla="ejecuciones_tareas",
+                                llave_primaria_por_defecto=True,
+                                valores=(nombre_tarea, inicio, duracion, estado, detalle))
+
+        con.execute("""--sql
+            DELETE FROM ejecuciones_tareas
+            WHERE tarea = ? AND id NOT IN (SELECT id FROM ejecuciones_tareas
+                                           WHERE tarea = ?
+                                           ORDER BY id DESC
+                                           LIMIT ?);
+            """, (nombre_tarea, nombre_tarea, conservar))
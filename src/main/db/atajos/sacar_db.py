@@ -2,10 +2,12 @@
 Módulo para atajos de sacar datos de una DB.
 """
 
+from itertools import groupby
+from operator import itemgetter
 from os import PathLike
-from typing import TYPE_CHECKING, Tuple
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
 
-from ..database import sacar_datos_de_tabla
+from ..database import iterar_datos_de_tabla, sacar_datos_de_tabla
 
 if TYPE_CHECKING:
     from ..database import FetchResult
@@ -43,6 +45,36 @@ def get_limite_backup_db() -> int:
     return int(get_propiedad("limite_backup_db"))
 
 
+def get_limite_backup_archivos() -> int:
+    "Consigue cuántas instantáneas de los backups de archivos conservar."
+
+    return int(get_propiedad("limite_backup_archivos"))
+
+
+def get_programacion_tarea(nombre_tarea: str) -> str:
+    "Consigue cada cuánto (o cuándo) corre una tarea programada."
+
+    return get_propiedad(f"programacion_{nombre_tarea}")
+
+
+def get_ffmpeg_precalentados() -> int:
+    "Consigue cuántos procesos de FFmpeg mantener precalentados."
+
+    return int(get_propiedad("ffmpeg_precalentados"))
+
+
+def get_ffmpeg_max_procesos() -> int:
+    "Consigue cuántos procesos de FFmpeg pueden reproducir a la vez."
+
+    return int(get_propiedad("ffmpeg_max_procesos"))
+
+
+def get_voz_ventana_inactividad() -> float:
+    "Consigue cuántos segundos sin reproducir esperar antes de salir de voz."
+
+    return float(get_propiedad("voz_ventana_inactividad"))
+
+
 def get_path_de_db(nombre_path: str) -> PathLike:
     "Consigue un path de la DB."
 
@@ -57,12 +89,9 @@ def get_path_de_db(nombre_path: str) -> PathLike:
 def get_paths_de_db(nombre_path: str) -> Tuple[PathLike, ...]:
     "Consigue muchos paths de la DB."
 
-    res = sacar_datos_de_tabla("paths",
-                               sacar_uno=False,
-                               nombre_path=nombre_path)
-
-    # Los valores siempre serán la tercera columna
-    return tuple(col[2] for col in res)
+    return tuple(fpath for fpath, in iterar_datos_de_tabla("paths",
+                                                           columnas=("fpath",),
+                                                           nombre_path=nombre_path))
 
 
 def get_imagenes_path() -> PathLike:
@@ -95,6 +124,12 @@ def get_sonidos_path() -> PathLike:
     return get_path_de_db("sonidos")
 
 
+def get_cache_path() -> PathLike:
+    "Consigue el path de los archivos cacheados."
+
+    return get_path_de_db("cache")
+
+
 def get_prefijo_guild(guild_id: int) -> str:
     "Devuelve un prefijo por id del guild."
 
@@ -108,51 +143,112 @@ def get_prefijo_guild(guild_id: int) -> str:
     return res[2]
 
 
-def get_canales_escuchados() -> dict[int, tuple[tuple[int, str], ...]]:
+def get_canales_escuchados(id_guild: Optional[int]=None,
+                           prefijo: str="",
+                           limite: Optional[int]=None) -> dict[int, tuple[tuple[int, str], ...]]:
     """
     Devuelve un diccionario en el cual las claves son ids de guilds,
     y los valores una tupla en el que sus elementos son otras subtuplas.
     Estas subtuplas tienen el id y el nombre de los canales pertenecientes
     a ese guild.
+
+    Se puede filtrar por guild y por cómo empieza el nombre del canal
+    (sin distinguir mayúsculas), y el filtro lo aplica la propia DB.
+    """
+
+    condiciones = ({} if id_guild is None else {"guild_id": id_guild})
+    datos = iterar_datos_de_tabla(tabla="canales_escuchables",
+                                  columnas=("guild_id", "id", "nombre"),
+                                  empieza_con={"nombre": prefijo},
+                                  ordenar_por=("guild_id", "nombre"),
+                                  limite=limite,
+                                  **condiciones)
+
+    return {id_guild_canal: tuple((id_canal, nombre_canal) for _, id_canal, nombre_canal in filas)
+            for id_guild_canal, filas in groupby(datos, key=itemgetter(0))}
+
+
+def get_recomendaciones_carpetas(contiene: str="",
+                                 limite: Optional[int]=None) -> Iterator[tuple[str, str, int]]:
+    """
+    Va devolviendo los datos de las recomendaciones hechas por usuarios.
+
+    Se puede filtrar por las que contengan un texto, sin distinguir
+    mayúsculas.
     """
 
-    datos = sacar_datos_de_tabla(tabla="canales_escuchables")
-    dic_final = {}
+    return iterar_datos_de_tabla(tabla="carpetas_recomendadas",
+                                 columnas=("recomendacion", "nombre_usuario", "id_usuario"),
+                                 contiene={"recomendacion": contiene},
+                                 limite=limite)
 
-    for id_canal, id_guild, nombre_canal in datos:
-        if id_guild not in dic_final:
-            dic_final[id_guild] = []
-        
-        dic_final[id_guild].append((id_canal, nombre_canal))
 
+def get_usuarios_autorizados(contiene: str="",
+                             limite: Optional[int]=None) -> Iterator[Tuple[int, str, int]]:
+    """
+    Va devolviendo los datos de los usuarios autorizados.
 
-    # inmutar el dic
-    for lista_ch in dic_final.values():
-        for datos_ch in lista_ch:
-            datos_ch = tuple(datos_ch)
-        lista_ch = tuple(lista_ch)
+    Se puede filtrar por los que tengan un texto en el nombre, sin
+    distinguir mayúsculas.
+    """
 
-    return dic_final
+    return iterar_datos_de_tabla(tabla="usuarios_autorizados",
+                                 contiene={"nombre": contiene},
+                                 limite=limite)
 
 
-def get_recomendaciones_carpetas() -> list[tuple[str, str, int]]:
+def get_sonido_opus(ruta: PathLike) -> Optional[PathLike]:
     """
-    Devuelve los datos de las recomendaciones hechas por usuarios.
+    Devuelve la ruta de la versión transcodificada de un sonido,
+    o `None` si todavía no tiene una.
     """
 
-    datos = []
+    res = sacar_datos_de_tabla(tabla="sonidos",
+                               sacar_uno=True,
+                               ruta=str(ruta))
+
+    return res[2] if res else None
+
 
-    for dato in sacar_datos_de_tabla(tabla="carpetas_recomendadas",
-                                     sacar_uno=False):
-        datos.append(dato[1:])
+def get_rutas_por_hash(hash_contenido: str) -> list[str]:
+    """
+    Devuelve las rutas de los archivos guardados con ese contenido.
+    """
+
+    return [ruta for ruta, in iterar_datos_de_tabla(tabla="contenidos",
+                                                    columnas=("ruta",),
+                                                    hash=hash_contenido)]
+
+
+def get_rutas_con_contenido() -> set[str]:
+    """
+    Devuelve las rutas de todos los archivos que tienen registrado
+    el hash de su contenido.
+    """
+
+    return {ruta for ruta, in iterar_datos_de_tabla(tabla="contenidos",
+                                                    columnas=("ruta",))}
+
+
+def get_imagenes_procesadas() -> Iterator[Tuple[str, str, str]]:
+    """
+    Va devolviendo las imágenes ya procesadas, con la ruta de su
+    vista previa (vacía si es animada) y su hash perceptual.
+    """
 
-    return datos
+    return iterar_datos_de_tabla(tabla="imagenes",
+                                 columnas=("ruta", "ruta_vista_previa", "hash_perceptual"))
 
 
-def get_usuarios_autorizados() -> list[Tuple[int, str, int]]:
+def get_ejecuciones_tarea(nombre_tarea: str,
+                          limite: Optional[int]=None) -> list[Tuple[str, float, str, str]]:
     """
-    Devuelve los datos de los usuarios autorizados.
+    Devuelve las últimas ejecuciones de una tarea programada, de la
+    más nueva a la más vieja, con su inicio, duración, estado y detalle.
     """
 
-    return sacar_datos_de_tabla(tabla="usuarios_autorizados",
-                                sacar_uno=False)
+    return sacar_datos_de_tabla(tabla="ejecuciones_tareas",
+                                columnas=("inicio", "duracion", "estado", "detalle"),
+                                ordenar_por=("id DESC",),
+                                limite=limite,
+                                tarea=nombre_tarea)
@@ -2,17 +2,105 @@
 Módulo de bases de datos.
 """
 
+from contextlib import contextmanager
 from os import PathLike
-from sqlite3 import connect
-from typing import Any, Dict, List, Literal, Optional, Tuple, TypeAlias, Union
+from sqlite3 import Connection, connect
+from threading import local
+from typing import Any, Dict, Iterator, List, Literal, Optional, Tuple, TypeAlias, Union
 
 DictConds: TypeAlias = Dict[str, Any]
+DictFiltros: TypeAlias = Dict[str, str]
 ValoresResolucion: TypeAlias = Literal["ABORT", "FAIL", "IGNORE", "REPLACE", "ROLLBACK"]
 _SingularResult: TypeAlias = Tuple[Union[None, int, str]]
 FetchResult: TypeAlias = Union[List[_SingularResult], _SingularResult]
 
 DEFAULT_DB: PathLike = "src/main/db/db.sqlite3"
 RESOLUCIONES: Tuple[str, ...] = "ABORT", "FAIL", "IGNORE", "REPLACE", "IGNORE"
+TAMANIO_LOTE_LECTURA: int = 256
+
+MIGRACIONES: Tuple[str, ...] = (
+    # 1: carpeta para archivos cacheados
+    """--sql
+    INSERT INTO paths (nombre_path, fpath) VALUES ('cache', 'cache');
+    """,
+    # 2: sonidos subidos, con su versión ya transcodificada
+    """--sql
+    CREATE TABLE sonidos (
+        id INTEGER PRIMARY KEY,
+        ruta TEXT UNIQUE,
+        ruta_opus TEXT,
+        id_usuario INTEGER
+    ) STRICT;
+    """,
+    # 3: configuración del pool de FFmpeg
+    """--sql
+    INSERT INTO propiedades (nombre, valor) VALUES ('ffmpeg_precalentados', '2');
+    INSERT INTO propiedades (nombre, valor) VALUES ('ffmpeg_max_procesos', '8');
+    """,
+    # 4: segundos sin reproducir antes de desconectarse de voz
+    """--sql
+    INSERT INTO propiedades (nombre, valor) VALUES ('voz_ventana_inactividad', '600');
+    """,
+    # 5: índice de archivos guardados según el hash de su contenido
+    """--sql
+    CREATE TABLE contenidos (
+        id INTEGER PRIMARY KEY,
+        hash TEXT,
+        ruta TEXT UNIQUE
+    ) STRICT;
+    CREATE INDEX contenidos_hash ON contenidos (hash);
+    """,
+    # 6: vistas previas y hashes perceptuales de las imágenes
+    """--sql
+    CREATE TABLE imagenes (
+        id INTEGER PRIMARY KEY,
+        ruta TEXT UNIQUE,
+        ruta_vista_previa TEXT,
+        hash_perceptual TEXT
+    ) STRICT;
+    """,
+    # 7: canales escuchados agrupados por guild
+    """--sql
+    CREATE INDEX canales_escuchables_guild ON canales_escuchables (guild_id, nombre);
+    """,
+    # 8: instantáneas a conservar de los backups incrementales de archivos
+    """--sql
+    INSERT INTO propiedades (nombre, valor) VALUES ('limite_backup_archivos', '14');
+    """,
+    # 9: historial de las tareas programadas, y cuándo corre cada una
+    """--sql
+    CREATE TABLE ejecuciones_tareas (
+        id INTEGER PRIMARY KEY,
+        tarea TEXT,
+        inicio TEXT,
+        duracion REAL,
+        estado TEXT,
+        detalle TEXT
+    ) STRICT;
+    CREATE INDEX ejecuciones_tareas_tarea ON ejecuciones_tareas (tarea, id);
+    INSERT INTO propiedades (nombre, valor) VALUES ('programacion_backup_db', '24h');
+    INSERT INTO propiedades (nombre, valor) VALUES ('programacion_backup_archivos', '0 5 * * *');
+    """,
+    # 10: las páginas que quedan libres al borrar se pueden devolver de a poco
+    """--sql sin-transaccion
+    PRAGMA auto_vacuum = INCREMENTAL;
+    VACUUM;
+    """,
+    # 11: mantenimiento diario de la DB
+    """--sql
+    INSERT INTO propiedades (nombre, valor) VALUES ('programacion_mantenimiento_db', '30 4 * * *');
+    """,
+)
+"""
+Scripts de SQL a aplicar en orden sobre la DB. La posición de cada
+uno (empezando por 1) es la versión a la que lleva la DB, y se guarda
+en 'PRAGMA user_version'. Sólo se deben agregar al final.
+
+Los que tienen 'MARCA_SIN_TRANSACCION' en la primera línea se corren
+fuera de una transacción, como necesita por ejemplo 'VACUUM'.
+"""
+
+MARCA_SIN_TRANSACCION: str = "sin-transaccion"
 
 
 def crear_nueva_db(db_path: PathLike[str]="") -> None:
@@ -73,6 +161,27 @@ def crear_nueva_db(db_path: PathLike[str]="") -> None:
         ) STRICT;
         """)
 
+    migrar_db(db_path)
+
+
+def migrar_db(db_path: PathLike[str]="") -> int:
+    """
+    Aplica las migraciones que a la DB todavía le falten.
+
+    Devuelve la cantidad de migraciones aplicadas.
+    """
+
+    with connect(db_path or DEFAULT_DB) as con:
+        version = con.execute("PRAGMA user_version;").fetchone()[0]
+
+        for num, script in enumerate(MIGRACIONES[version:], start=version + 1):
+            if MARCA_SIN_TRANSACCION in script.split("\n", 1)[0]:
+                con.executescript(f"{script}\nPRAGMA user_version = {num};")
+            else:
+                con.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {num};\nCOMMIT;")
+
+    return max(len(MIGRACIONES) - version, 0)
+
 
 def ejecutar_comando(comando: str, es_script: bool, db_path: PathLike[str]="") -> None:
     """
@@ -105,8 +214,101 @@ def ejecutar_script(comando: str, db_path: PathLike[str]="") -> None:
     ejecutar_comando(comando, True, db_path or DEFAULT_DB)
 
 
-def _condiciones_where(**condiciones: DictConds) -> str:
-    "Crea una expresión SQL con todas las condiciones en el kwargs."
+def _casefold(texto: Optional[str]) -> Optional[str]:
+    "Pasa un texto a minúsculas para compararlo, con cualquier alfabeto."
+
+    return texto.casefold() if isinstance(texto, str) else texto
+
+
+def _conectar() -> Connection:
+    """
+    Abre una conexión a la DB, con la función 'casefold' registrada,
+    porque 'LIKE' sólo ignora las mayúsculas de las letras ASCII.
+    """
+
+    con = connect(DEFAULT_DB)
+    con.create_function("casefold", 1, _casefold, deterministic=True)
+
+    return con
+
+
+_transacciones = local()
+"""
+Transacción en curso de cada hilo, si la hay. Es por hilo porque una
+conexión de sqlite no se puede usar desde otro hilo.
+"""
+
+
+@contextmanager
+def transaccion() -> Iterator[Connection]:
+    """
+    Agrupa todas las operaciones sobre la DB hechas adentro del bloque
+    en una sola transacción, que se confirma al salir, o se deshace
+    entera si se levanta una excepción.
+
+    Las funciones de este módulo (y los atajos) usan la transacción
+    en curso del hilo en vez de abrir su propia conexión. Si ya había
+    una, el bloque forma parte de esa. Adentro no se debe ceder el
+    control al loop de eventos.
+
+    ***Ejemplo:***
+    ```python
+    with transaccion():
+        insertar_datos_en_tabla(...)
+        actualizar_dato_de_tabla(...)
+    ```
+    """
+
+    en_curso = getattr(_transacciones, "con", None)
+
+    if en_curso is not None:
+        yield en_curso
+        return
+
+    con = _conectar()
+    _transacciones.con = con
+
+    try:
+        # Toma el lock de escritura de entrada, así nadie escribe en el medio
+        con.execute("BEGIN IMMEDIATE;")
+        yield con
+        con.commit()
+    except BaseException:
+        con.rollback()
+        raise
+    finally:
+        _transacciones.con = None
+        con.close()
+
+
+@contextmanager
+def _conexion() -> Iterator[Connection]:
+    """
+    Devuelve la conexión de la transacción en curso del hilo, o si no
+    hay una, abre una que se confirma y se cierra al terminar.
+    """
+
+    en_curso = getattr(_transacciones, "con", None)
+
+    if en_curso is not None:
+        yield en_curso
+        return
+
+    con = _conectar()
+
+    try:
+        with con:
+            yield con
+    finally:
+        con.close()
+
+
+def _condiciones_where(**condiciones: DictConds) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Crea una expresión SQL con todas las condiciones en el kwargs, junto
+    con los valores a pasarle. Los valores nunca se pegan en el SQL, así
+    que pueden tener comillas o barras.
+    """
 
     extra = None
 
@@ -117,8 +319,19 @@ def _condiciones_where(**condiciones: DictConds) -> str:
     except KeyError:
         extra = tuple()
 
-    conds = " AND ".join([f"{k}={v!r}" for k, v in condiciones.items()] + list(extra))
-    return ('' if not conds else f" WHERE {conds}")
+    conds = " AND ".join([f"{k}=?" for k in condiciones] + list(extra))
+    return ('' if not conds else f" WHERE {conds}"), tuple(condiciones.values())
+
+
+def escapar_like(texto: str, escape: str="\\") -> str:
+    """
+    Escapa los comodines de un texto para usarlo literal en un LIKE,
+    con la cláusula ESCAPE correspondiente.
+    """
+
+    return (texto.replace(escape, escape * 2)
+                 .replace("%", f"{escape}%")
+                 .replace("_", f"{escape}_"))
 
 
 def _protocolo_resolucion(resolucion: Optional[ValoresResolucion]=None) -> str:
@@ -134,22 +347,117 @@ def _protocolo_resolucion(resolucion: Optional[ValoresResolucion]=None) -> str:
     return res_protocol
 
 
+def _filtros_like(empieza_con: Optional[DictFiltros]=None,
+                  contiene: Optional[DictFiltros]=None) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Crea las condiciones para buscar texto en columnas, sin distinguir
+    mayúsculas (tampoco las acentuadas ni la 'ñ'), junto con los
+    parámetros a pasarles. Los textos vacíos no filtran nada.
+    """
+
+    condiciones = []
+    parametros = []
+
+    for filtros, patron in ((empieza_con, "{}%"), (contiene, "%{}%")):
+        for columna, texto in (filtros or {}).items():
+            if not texto:
+                continue
+
+            condiciones.append(f"casefold({columna}) LIKE ? ESCAPE '\\'")
+            parametros.append(patron.format(escapar_like(texto.casefold())))
+
+    return tuple(condiciones), tuple(parametros)
+
+
+def _consulta_select(tabla: str,
+                     columnas: Optional[Tuple[str, ...]]=None,
+                     empieza_con: Optional[DictFiltros]=None,
+                     contiene: Optional[DictFiltros]=None,
+                     ordenar_por: Optional[Tuple[str, ...]]=None,
+                     limite: Optional[int]=None,
+                     **condiciones: DictConds) -> Tuple[str, Tuple[Any, ...]]:
+    "Crea una consulta SELECT con todas las opciones, junto con sus parámetros."
+
+    conds_like, parametros_like = _filtros_like(empieza_con, contiene)
+    extra = condiciones.pop("where", tuple())
+    conds, parametros = _condiciones_where(where=extra + conds_like, **condiciones)
+
+    seleccion = (", ".join(columnas) if columnas else "*")
+    orden = (f" ORDER BY {', '.join(ordenar_por)}" if ordenar_por else "")
+    tope = ("" if limite is None else f" LIMIT {int(limite)}")
+
+    return f"SELECT {seleccion} FROM {tabla}{conds}{orden}{tope};", parametros + parametros_like
+
+
 def sacar_datos_de_tabla(tabla: str,
                          sacar_uno: bool=False,
+                         *,
+                         columnas: Optional[Tuple[str, ...]]=None,
+                         empieza_con: Optional[DictFiltros]=None,
+                         contiene: Optional[DictFiltros]=None,
+                         ordenar_por: Optional[Tuple[str, ...]]=None,
+                         limite: Optional[int]=None,
                          **condiciones: DictConds) -> FetchResult:
-    "Saca datos de una base de datos."
+    """
+    Saca datos de una base de datos.
 
-    res = None
-    conds = _condiciones_where(**condiciones)
+    Se pueden elegir las 'columnas' a sacar, filtrar las filas cuyo
+    texto en alguna columna empiece con ('empieza_con') o contenga
+    ('contiene') algo, ordenarlas por algunas columnas (agregando
+    ' DESC' para orden descendente) y sacar a lo sumo 'limite' filas.
+    Todo eso lo resuelve la DB, así que no se traen filas de más.
+    """
 
-    with connect(DEFAULT_DB) as con:
+    res = None
+    consulta, parametros = _consulta_select(tabla,
+                                            columnas,
+                                            empieza_con,
+                                            contiene,
+                                            ordenar_por,
+                                            limite,
+                                            **condiciones)
+
+    with _conexion() as con:
         cur = con.cursor()
-        cur.execute(f"SELECT * FROM {tabla}{conds};")
+        cur.execute(consulta, parametros)
         res = (cur.fetchone() if sacar_uno else cur.fetchall())
 
     return res
 
 
+def iterar_datos_de_tabla(tabla: str,
+                          *,
+                          columnas: Optional[Tuple[str, ...]]=None,
+                          empieza_con: Optional[DictFiltros]=None,
+                          contiene: Optional[DictFiltros]=None,
+                          ordenar_por: Optional[Tuple[str, ...]]=None,
+                          limite: Optional[int]=None,
+                          tamanio_lote: int=TAMANIO_LOTE_LECTURA,
+                          **condiciones: DictConds) -> Iterator[_SingularResult]:
+    """
+    Igual que 'sacar_datos_de_tabla', pero va entregando las filas de a
+    una, trayéndolas de la DB de a lotes de 'tamanio_lote', en vez de
+    tenerlas todas en memoria a la vez.
+
+    La conexión se abre recién al pedir la primera fila, y se cierra al
+    terminar de recorrerlas o al descartar el iterador. Hay que
+    recorrerlo entero en el mismo hilo. Dentro de una transacción, se
+    usa la de esta.
+    """
+
+    consulta, parametros = _consulta_select(tabla,
+                                            columnas,
+                                            empieza_con,
+                                            contiene,
+                                            ordenar_por,
+                                            limite,
+                                            **condiciones)
+    with _conexion() as con:
+        cur = con.execute(consulta, parametros)
+        while lote := cur.fetchmany(tamanio_lote):
+            yield from lote
+
+
 def borrar_datos_de_tabla(tabla: str,
                           **condiciones: DictConds) -> None:
     """
@@ -158,11 +466,11 @@ def borrar_datos_de_tabla(tabla: str,
     * NO oncluye una opción LIMIT.
     """
 
-    conds = _condiciones_where(**condiciones)
+    conds, parametros = _condiciones_where(**condiciones)
 
-    with connect(DEFAULT_DB) as con:
+    with _conexion() as con:
         cur = con.cursor()
-        cur.execute(f"DELETE FROM {tabla}{conds};")
+        cur.execute(f"DELETE FROM {tabla}{conds};", parametros)
 
 
 def insertar_datos_en_tabla(tabla: str,
@@ -173,12 +481,13 @@ def insertar_datos_en_tabla(tabla: str,
     "Intenta insertar datos en una tabla."
 
     protocolo_res = _protocolo_resolucion(resolucion)
-    valores_wrapped = [f"{v!r}" for v in valores]
-    valores_finales = f"({'?, ' if llave_primaria_por_defecto else ''}{', '.join(valores_wrapped)})"
+    marcadores = ", ".join("?" for _ in valores)
+    # Con NULL, sqlite asigna la llave primaria sola
+    valores_finales = f"({'NULL, ' if llave_primaria_por_defecto else ''}{marcadores})"
 
-    with connect(DEFAULT_DB) as con:
+    with _conexion() as con:
         cur = con.cursor()
-        cur.executescript(f"INSERT{protocolo_res} INTO {tabla} VALUES{valores_finales};")
+        cur.execute(f"INSERT{protocolo_res} INTO {tabla} VALUES{valores_finales};", tuple(valores))
 
 
 def actualizar_dato_de_tabla(tabla: str,
@@ -192,16 +501,17 @@ def actualizar_dato_de_tabla(tabla: str,
     if not isinstance(nombre_col, str):
         raise TypeError("El nombre de la columna debe ser de tipo string.")
 
-    conds = _condiciones_where(**condiciones)
+    conds, parametros = _condiciones_where(**condiciones)
     res_protocol = _protocolo_resolucion(resolucion)
 
-    with connect(DEFAULT_DB) as con:
+    with _conexion() as con:
         cur = con.cursor()
-        cur.execute(f"UPDATE{res_protocol} {tabla} SET {nombre_col}={valor!r} {conds};")
+        cur.execute(f"UPDATE{res_protocol} {tabla} SET {nombre_col}=? {conds};",
+                    (valor,) + parametros)
 
 
 def existe_dato_en_tabla(tabla: str,
                          **condiciones: DictConds) -> bool:
     "Se fija si existe un dato coincidente en la tabla especificada."
 
-    return bool(sacar_datos_de_tabla(tabla, **condiciones))
+    return bool(sacar_datos_de_tabla(tabla, limite=1, **condiciones))
@@ -0,0 +1,135 @@
+"""
+Módulo para el mantenimiento periódico de la DB.
+
+Al borrar filas quedan páginas libres que el archivo no devuelve, y
+sin estadísticas sqlite elige los índices a ciegas. El mantenimiento
+revisa que la DB esté sana, actualiza las estadísticas y devuelve las
+páginas libres, anotando cuánto ocupaba antes y después.
+"""
+
+from contextlib import closing
+from os import PathLike
+from os.path import getsize
+from pathlib import Path
+from sqlite3 import Connection, connect
+from time import perf_counter
+from typing import NamedTuple, Optional
+
+from . import database
+
+LIMITE_ANALISIS: int = 1000
+"""
+Filas que 'ANALYZE' mira de cada índice. Alcanza para estadísticas
+aproximadas sin tener que recorrer tablas enteras.
+"""
+
+AUTO_VACUUM_INCREMENTAL: int = 2
+
+
+class EstadoDB(NamedTuple):
+    """
+    Cuánto ocupa la DB en un momento dado.
+    """
+
+    tamanio: int # en bytes, contando el WAL si hay
+    paginas: int
+    paginas_libres: int
+
+
+class InfoMantenimiento(NamedTuple):
+    """
+    Resultado de un mantenimiento de la DB.
+    """
+
+    antes: EstadoDB
+    despues: EstadoDB
+    integridad: tuple[str, ...]
+    paginas_liberadas: int
+    checkpoint: Optional[tuple[int, int, int]]
+    duracion: float # en segundos
+
+    @property
+    def integra(self) -> bool:
+        """
+        Indica si la revisión no encontró problemas.
+        """
+
+        return self.integridad == ("ok",)
+
+
+def _tamanio_archivos(db_path: PathLike) -> int:
+    """
+    Suma lo que ocupan en disco la DB y su WAL, si existe.
+    """
+
+    tamanio = 0
+
+    for ruta in (Path(db_path), Path(f"{db_path}-wal")):
+        if ruta.exists():
+            tamanio += getsize(ruta)
+
+    return tamanio
+
+
+def _pragma(con: Connection, pragma: str) -> list[tuple]:
+    """
+    Corre un pragma hasta el final y devuelve todas sus filas.
+    """
+
+    return con.execute(f"PRAGMA {pragma};").fetchall()
+
+
+def estado_db(con: Connection, db_path: PathLike) -> EstadoDB:
+    """
+    Mide cuánto ocupa la DB.
+    """
+
+    return EstadoDB(tamanio=_tamanio_archivos(db_path),
+                    paginas=_pragma(con, "page_count")[0][0],
+                    paginas_libres=_pragma(con, "freelist_count")[0][0])
+
+
+def mantener_db(db_path: Optional[PathLike]=None,
+                paginas_vacuum: Optional[int]=None) -> InfoMantenimiento:
+    """
+    Revisa la integridad de la DB con 'quick_check' y, si está sana,
+    actualiza las estadísticas del planificador de consultas, devuelve
+    hasta 'paginas_vacuum' páginas libres (todas si es `None`) y, si la
+    DB usa WAL, lo vuelca en la DB y lo trunca.
+
+    Es bloqueante, así que se debería correr fuera del loop de eventos.
+    """
+
+    inicio = perf_counter()
+    db_path = db_path or database.DEFAULT_DB
+    liberadas = 0
+    checkpoint = None
+
+    # Sin transacción implícita, porque varios pragmas no corren dentro de una
+    with closing(connect(db_path, isolation_level=None)) as con:
+        antes = estado_db(con, db_path)
+        integridad = tuple(fila[0] for fila in _pragma(con, "quick_check"))
+
+        if integridad == ("ok",):
+            _pragma(con, f"analysis_limit = {LIMITE_ANALISIS}")
+            con.execute("ANALYZE;")
+            _pragma(con, "optimize")
+
+            if _pragma(con, "auto_vacuum")[0][0] == AUTO_VACUUM_INCREMENTAL:
+                libres = _pragma(con, "freelist_count")[0][0]
+                paginas = "" if paginas_vacuum is None else f"({paginas_vacuum})"
+                # 'execute' avanza el pragma una sola vez, y libera una sola página
+                con.executescript(f"PRAGMA incremental_vacuum{paginas};")
+                liberadas = libres - _pragma(con, "freelist_count")[0][0]
+
+            if _pragma(con, "journal_mode")[0][0] == "wal":
+                checkpoint = _pragma(con, "wal_checkpoint(TRUNCATE)")[0]
+
+        despues = estado_db(con, db_path)
+
+    return InfoMantenimiento(antes=antes,
+                             despues=despues,
+                             integridad=integridad,
+                             paginas_liberadas=liberadas,
+                             checkpoint=checkpoint,
+                             duracion=perf_counter() - inicio)
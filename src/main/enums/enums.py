@@ -12,3 +12,25 @@ class RestriccionesSonido(Enum):
 
     MUY_PESADO = "Tamaño demasiado grande"
     DEMASIADO_LARGO = "Duración demasiada larga"
+    NO_ES_AUDIO = "No es un audio válido"
+
+
+class ModoBucle(Enum):
+    """
+    Modos de repetición para la cola de reproducción
+    de audio.
+    """
+
+    DESACTIVADO = "Desactivado"
+    PISTA = "Pista"
+    COLA = "Cola"
+
+
+class EstadoGuardado(Enum):
+    """
+    Qué pasó al guardar un archivo según su contenido.
+    """
+
+    NUEVO = "Nuevo"
+    ENLAZADO = "Enlazado"
+    REPETIDO = "Repetido"
@@ -0,0 +1,6 @@
+"""
+Paquete de imágenes.
+"""
+
+from .hash_perceptual import *
+from .vistas_previas import *
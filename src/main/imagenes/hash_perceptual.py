@@ -0,0 +1,146 @@
+"""
+Módulo para el índice de hashes perceptuales de las imágenes.
+
+Dos imágenes casi iguales (otra resolución, otra compresión) tienen
+hashes que difieren en pocos bits, así que buscar repetidas es buscar
+hashes a poca distancia de Hamming.
+"""
+
+from typing import Iterator, Sequence
+
+BITS_HASH: int = 64
+BANDAS_INDICE: int = 4
+DISTANCIA_SIMILARES: int = 3
+"""
+Distancia de Hamming máxima para considerar dos imágenes casi iguales.
+Debe ser menor que 'BANDAS_INDICE' para que el índice no se pierda ninguna.
+"""
+
+
+def calcular_dhash(grises: Sequence[int], ancho: int=9) -> int:
+    """
+    Calcula el "difference hash" a partir de los píxeles en escala de
+    grises de una imagen reducida a 'ancho' x ('ancho' - 1), fila por fila.
+
+    Cada bit dice si un píxel es más claro que el que tiene a la derecha.
+    """
+
+    valor = 0
+
+    for inicio_fila in range(0, len(grises), ancho):
+        fila = grises[inicio_fila:inicio_fila + ancho]
+        for izq, der in zip(fila, fila[1:]):
+            valor = (valor << 1) | (izq > der)
+
+    return valor
+
+
+def distancia_hamming(hash_a: int, hash_b: int) -> int:
+    """
+    Cuenta los bits en los que difieren dos hashes.
+    """
+
+    return (hash_a ^ hash_b).bit_count()
+
+
+class IndicePerceptual:
+    """
+    Índice en memoria de hashes perceptuales.
+
+    Cada hash se parte en bandas, y se indexa por cada una. Si dos hashes
+    difieren en menos bits que la cantidad de bandas, al menos una banda
+    coincide entera, así que alcanza con comparar contra los que comparten
+    alguna banda en vez de contra todos.
+    """
+
+    def __init__(self, bandas: int=BANDAS_INDICE) -> None:
+        """
+        Inicializa una instancia de 'IndicePerceptual'.
+        """
+
+        self.bandas: int = bandas
+        self._bits_banda: int = BITS_HASH // bandas
+        self._por_ruta: dict[str, int] = {}
+        self._por_banda: list[dict[int, set[str]]] = [{} for _ in range(bandas)]
+
+
+    def __len__(self) -> int:
+        """
+        Cuenta la cantidad de imágenes indexadas.
+        """
+
+        return len(self._por_ruta)
+
+
+    def __contains__(self, ruta: str) -> bool:
+        """
+        Verifica si una imagen está indexada.
+        """
+
+        return ruta in self._por_ruta
+
+
+    def _partir(self, valor: int) -> Iterator[int]:
+        """
+        Parte un hash en sus bandas.
+        """
+
+        mascara = (1 << self._bits_banda) - 1
+
+        for num in range(self.bandas):
+            yield (valor >> (num * self._bits_banda)) & mascara
+
+
+    def agregar(self, ruta: str, valor: int) -> None:
+        """
+        Indexa el hash de una imagen, reemplazando el anterior si tenía.
+        """
+
+        self.quitar(ruta)
+        self._por_ruta[ruta] = valor
+
+        for indice, banda in zip(self._por_banda, self._partir(valor)):
+            indice.setdefault(banda, set()).add(ruta)
+
+
+    def quitar(self, ruta: str) -> bool:
+        """
+        Saca una imagen del índice.
+        Devuelve `True` si estaba indexada.
+        """
+
+        valor = self._por_ruta.pop(ruta, None)
+
+        if valor is None:
+            return False
+
+        for indice, banda in zip(self._por_banda, self._partir(valor)):
+            rutas = indice[banda]
+            rutas.discard(ruta)
+            if not rutas:
+                del indice[banda]
+
+        return True
+
+
+    def similares(self,
+                  valor: int,
+                  distancia_maxima: int=DISTANCIA_SIMILARES) -> list[tuple[str, int]]:
+        """
+        Busca las imágenes con un hash a lo sumo a 'distancia_maxima'.
+        Devuelve pares de ruta y distancia, de la más parecida a la menos.
+        """
+
+        candidatas = set()
+
+        for indice, banda in zip(self._por_banda, self._partir(valor)):
+            candidatas.update(indice.get(banda, ()))
+
+        encontradas = []
+
+        for ruta in candidatas:
+            distancia = distancia_hamming(valor, self._por_ruta[ruta])
+            if distancia <= distancia_maxima:
+                encontradas.append((ruta, distancia))
+
+        return sorted(encontradas, key=lambda par: (par[1], par[0]))
@@ -0,0 +1,299 @@
+"""
+Módulo para generar las vistas previas y los hashes de las imágenes.
+
+Las imágenes se guardan en su resolución original, que puede pesar
+varios MB. Por cada una se genera, en un pool de procesos, una versión
+reducida y comprimida para mandar por defecto, junto con su hash
+perceptual para encontrar imágenes casi iguales.
+"""
+
+from asyncio import Task, create_task, gather, get_running_loop, to_thread
+from concurrent.futures import Executor, ProcessPoolExecutor
+from hashlib import sha1
+from importlib.util import find_spec
+from os import replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from ..archivos import buscar_archivos
+from ..db import transaccion
+from ..db.atajos import borrar_imagen, get_imagenes_procesadas, registrar_imagen
+from .hash_perceptual import IndicePerceptual, calcular_dhash
+
+if TYPE_CHECKING:
+
+    from os import PathLike
+
+    from ..logger import BotLogger
+
+
+PILLOW_DISPONIBLE: bool = find_spec("PIL") is not None
+
+EXTENSIONES_IMAGEN: tuple[str, ...] = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp")
+LADO_VISTA_PREVIA: int = 512 # en píxeles
+CALIDAD_VISTA_PREVIA: int = 80
+MAX_PROCESOS_IMAGENES: int = 2
+TAMANIO_LOTE_ESCANEO: int = 32
+
+
+def generar_vista_previa(ruta_origen: str,
+                         ruta_destino: str,
+                         lado_maximo: int=LADO_VISTA_PREVIA,
+                         calidad: int=CALIDAD_VISTA_PREVIA) -> tuple[int, bool]:
+    """
+    Genera una vista previa en JPEG de una imagen, con su lado más
+    largo de a lo sumo 'lado_maximo' píxeles, y devuelve su hash
+    perceptual y si se generó la vista previa. Las imágenes animadas
+    no tienen, porque en JPEG quedarían quietas.
+
+    Está pensada para correr en un proceso aparte.
+    """
+
+    # Sólo hace falta en los procesos del pool
+    from PIL import Image # pylint: disable=import-outside-toplevel
+
+    with Image.open(ruta_origen) as imagen:
+        animada = getattr(imagen, "is_animated", False)
+
+        # Con JPEG, decodifica directamente a una resolución menor
+        imagen.draft("RGB", (lado_maximo, lado_maximo))
+
+        grises = imagen.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+        valor = calcular_dhash(list(grises.getdata()))
+
+        if animada:
+            return valor, False
+
+        vista = imagen.convert("RGB")
+        vista.thumbnail((lado_maximo, lado_maximo))
+
+        ruta_temp = f"{ruta_destino}.tmp"
+        vista.save(ruta_temp, "JPEG", quality=calidad, optimize=True)
+        replace(ruta_temp, ruta_destino)
+
+    return valor, True
+
+
+class ProcesadorImagenes:
+    """
+    Pool de procesos que genera las vistas previas de las imágenes, y
+    mantiene el índice de hashes perceptuales.
+    """
+
+    def __init__(self,
+                 directorio: "PathLike",
+                 *,
+                 max_procesos: int=MAX_PROCESOS_IMAGENES,
+                 lado_maximo: int=LADO_VISTA_PREVIA,
+                 calidad: int=CALIDAD_VISTA_PREVIA,
+                 pool: Optional[Executor]=None,
+                 log: Optional["BotLogger"]=None) -> None:
+        """
+        Inicializa una instancia de 'ProcesadorImagenes'.
+
+        Si no se le pasa un 'pool' compartido, crea uno propio recién
+        con la primera imagen a procesar.
+        """
+
+        self.directorio: Path = Path(directorio)
+        self.max_procesos: int = max_procesos
+        self.lado_maximo: int = lado_maximo
+        self.calidad: int = calidad
+        self.log: Optional["BotLogger"] = log
+        self.indice: IndicePerceptual = IndicePerceptual()
+
+        self._vistas_previas: dict[str, Optional[str]] = {}
+        """
+        Vista previa de cada imagen procesada, o `None` si es animada.
+        """
+        self._pool: Optional[Executor] = pool
+        self._pool_propio: bool = pool is None
+        self._tareas: set[Task] = set()
+
+
+    def cargar(self) -> None:
+        """
+        Carga de la DB las imágenes ya procesadas, olvidando las que
+        ya no existen.
+        Es bloqueante, así que se debería correr fuera del loop de eventos.
+        """
+
+        borradas = []
+
+        for ruta, ruta_vista_previa, hash_perceptual in get_imagenes_procesadas():
+            if not Path(ruta).exists():
+                borradas.append(ruta)
+                continue
+
+            self._vistas_previas[ruta] = ruta_vista_previa or None
+            self.indice.agregar(ruta, int(hash_perceptual, 16))
+
+        self._olvidar(borradas)
+
+
+    def _olvidar(self, rutas: list[str]) -> None:
+        """
+        Saca del índice y de la DB las imágenes que ya no existen, y
+        borra sus vistas previas.
+        """
+
+        if not rutas:
+            return
+
+        with transaccion():
+            for ruta in rutas:
+                vista_previa = self._vistas_previas.pop(ruta, None)
+                self.indice.quitar(ruta)
+                borrar_imagen(ruta)
+
+                if vista_previa is not None:
+                    Path(vista_previa).unlink(missing_ok=True)
+
+        if self.log is not None:
+            self.log.info(f"[IMAGENES] Se olvidaron {len(rutas)} imágenes borradas.")
+
+
+    def ruta_destino(self, ruta: "PathLike") -> Path:
+        """
+        Devuelve dónde se guarda la vista previa de una imagen.
+        """
+
+        path = Path(ruta)
+        clave = sha1(path.as_posix().encode()).hexdigest()[:16]
+
+        return self.directorio / f"{path.stem}_{clave}.jpg"
+
+
+    def vista_previa(self, ruta: "PathLike") -> Optional[str]:
+        """
+        Devuelve la ruta de la vista previa de una imagen, o `None`
+        si todavía no tiene una o si es animada.
+        """
+
+        # Los GIF se mandan siempre originales, por si están animados
+        if Path(ruta).suffix.lower() == ".gif":
+            return None
+
+        vista_previa = self._vistas_previas.get(Path(ruta).as_posix())
+
+        if vista_previa is None or not Path(vista_previa).exists():
+            return None
+
+        return vista_previa
+
+
+    async def procesar(self, ruta: "PathLike") -> Optional[int]:
+        """
+        Genera la vista previa de una imagen en el pool de procesos, y
+        la registra en la DB. Devuelve el hash perceptual, o `None` si falló.
+        """
+
+        if not PILLOW_DISPONIBLE:
+            return None
+
+        self.directorio.mkdir(parents=True, exist_ok=True)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_procesos)
+
+        ruta = Path(ruta).as_posix()
+        destino = self.ruta_destino(ruta).as_posix()
+
+        try:
+            valor, con_vista_previa = await get_running_loop().run_in_executor(self._pool,
+                                                                               generar_vista_previa,
+                                                                               ruta,
+                                                                               destino,
+                                                                               self.lado_maximo,
+                                                                               self.calidad)
+        except Exception as err: # pylint: disable=broad-except
+            if self.log is not None:
+                self.log.error(f"[IMAGENES] No se pudo procesar {ruta!r}: {err!r}")
+            return None
+
+        if not con_vista_previa:
+            destino = None
+
+        registrar_imagen(ruta, destino or "", f"{valor:016x}")
+
+        parecidas = [otra for otra, _ in self.indice.similares(valor) if otra != ruta]
+        if parecidas and self.log is not None:
+            self.log.info(f"[IMAGENES] {ruta!r} es casi igual a {parecidas[:3]!r}.")
+
+        self.indice.agregar(ruta, valor)
+        self._vistas_previas[ruta] = destino
+
+        return valor
+
+
+    def en_segundo_plano(self, ruta: "PathLike") -> Task:
+        """
+        Lanza el procesamiento de una imagen sin esperarlo.
+        """
+
+        tarea = create_task(self.procesar(ruta))
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+        return tarea
+
+
+    async def escanear(self, raiz: "PathLike") -> int:
+        """
+        Recorre el catálogo de imágenes y procesa las que todavía no
+        tengan vista previa. Devuelve la cantidad de imágenes procesadas.
+        """
+
+        if not PILLOW_DISPONIBLE:
+            if self.log is not None:
+                self.log.warning("[IMAGENES] Pillow no está instalado, no se generan " +
+                                 "vistas previas.")
+            return 0
+
+        rutas = await to_thread(buscar_archivos,
+                                nombre_ruta=raiz,
+                                ignorar_patrones=(".*",))
+        imagenes = {Path(ruta).as_posix() for ruta in rutas
+                    if Path(ruta).suffix.lower() in EXTENSIONES_IMAGEN}
+
+        prefijo = f"{Path(raiz).as_posix()}/"
+        await to_thread(self._olvidar, [ruta for ruta in self._vistas_previas
+                                        if ruta.startswith(prefijo) and ruta not in imagenes])
+
+        pendientes = [ruta for ruta in sorted(imagenes) if self._pendiente(ruta)]
+
+        procesadas = 0
+
+        for inicio in range(0, len(pendientes), TAMANIO_LOTE_ESCANEO):
+            lote = pendientes[inicio:inicio + TAMANIO_LOTE_ESCANEO]
+            resultados = await gather(*(self.procesar(ruta) for ruta in lote))
+            procesadas += sum(1 for valor in resultados if valor is not None)
+
+        if self.log is not None:
+            self.log.info(f"[IMAGENES] Escaneo terminado: {procesadas} imágenes procesadas.")
+
+        return procesadas
+
+
+    def _pendiente(self, ruta: str) -> bool:
+        """
+        Verifica si a una imagen le falta procesarse: nunca se procesó,
+        o se le perdió la vista previa.
+        """
+
+        if ruta not in self._vistas_previas:
+            return True
+
+        vista_previa = self._vistas_previas[ruta]
+        return vista_previa is not None and not Path(vista_previa).exists()
+
+
+    def cerrar(self) -> None:
+        """
+        Apaga el pool de procesos propio, sin esperar a los trabajos
+        pendientes. El compartido lo cierra su dueño.
+        """
+
+        if self._pool is not None and self._pool_propio:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
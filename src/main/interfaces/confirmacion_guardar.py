@@ -4,7 +4,7 @@ Módulo para preguntar al usuario si quiere guardar una imagen.
 
 from typing import Optional
 
-from discord import Interaction
+from discord import Interaction, Message
 from discord import PartialEmoji as Emoji
 from discord.enums import ButtonStyle
 from discord.ui import Button, View, button
@@ -18,11 +18,18 @@ class ConfirmacionGuardar(View):
     Clase para pedir confirmación de si guardar una imagen o no.
     """
 
-    def __init__(self, timeout: Optional[float]=120.0) -> None:
+    def __init__(self,
+                 timeout: Optional[float]=120.0,
+                 *,
+                 mensaje: Optional[Message]=None) -> None:
         """
         Inicializa una instancia de 'ConfirmacionGuardar'.
+
+        'mensaje' es el mensaje con las imágenes, para no tener que
+        volver a buscarlo al guardarlas.
         """
         super().__init__(timeout=timeout)
+        self.mensaje: Optional[Message] = mensaje
 
 
     @button(label="Obvio",
@@ -34,7 +41,7 @@ class ConfirmacionGuardar(View):
         Confirma que se quiere guardar algo.
         """
         await interaction.response.edit_message(content=f'Guardando en `{get_imagenes_path()}`',
-                                                view=SelectorCarpeta())
+                                                view=SelectorCarpeta(mensaje=self.mensaje))
 
 
     @button(label="Nah",
@@ -2,16 +2,31 @@
 Módulo para seleccionar una carpeta.
 """
 
+from asyncio import gather
 from typing import Optional
 
-from discord import Interaction
+from aiohttp import ClientError
+from discord import Attachment, Interaction, Message
 from discord import PartialEmoji as Emoji
 from discord import SelectOption
 from discord.enums import ButtonStyle
 from discord.ui import Button, Select, View, button
 
-from ..archivos import lista_nombre_carpetas, partir_ruta, unir_ruta
+from ..archivos import (bloques_de_url, guardar_contenido,
+                        lista_nombre_carpetas, partir_ruta, unir_ruta)
 from ..db.atajos import get_imagenes_path
+from ..enums import EstadoGuardado
+
+TAMANIO_MAXIMO_IMAGEN: int = 26214400 # 25 MB en bytes
+
+
+def es_imagen(adjunto: Attachment) -> bool:
+    """
+    Verifica si un adjunto es una imagen, con el mismo criterio
+    que 'mensaje_tiene_imagen'.
+    """
+
+    return adjunto.content_type is None or "image" in adjunto.content_type
 
 
 class MenuCarpetas(Select):
@@ -29,12 +44,16 @@ class MenuCarpetas(Select):
         min_values: int=1,
         max_values: int=1,
         disabled: bool=False,
-        row: Optional[int]=1
+        row: Optional[int]=1,
+        mensaje: Optional[Message]=None
     ) -> None:
         """
         Inicializa una instancia de 'MenuCarpetas'.
+
+        'mensaje' es el mensaje con las imágenes a guardar, si ya se tiene.
         """
         self.path = ruta
+        self.mensaje: Optional[Message] = mensaje
 
         opciones = [SelectOption(label=' '.join(carpeta.split('_')), value=carpeta)
                                  for carpeta in lista_rutas]
@@ -69,25 +88,87 @@ class MenuCarpetas(Select):
 
         if carpetas:
             await interaction.response.edit_message(content=f'Guardando en `{self.path}`',
-                                                    view=SelectorCarpeta(self.path))
+                                                    view=SelectorCarpeta(self.path,
+                                                                         mensaje=self.mensaje))
             return True
         return False
 
 
-    async def guardar_img(self, interaction: Interaction) -> None:
+    async def _mensaje_con_imagenes(self, interaction: Interaction) -> Optional[Message]:
         """
-        Deja de navegar y guarda la imagen especificada.
+        Consigue el mensaje con las imágenes, pidiéndoselo a discord
+        sólo si no se lo tenía ya.
         """
 
+        if self.mensaje is not None:
+            return self.mensaje
+
         mensaje_referido = interaction.message.reference
-        if mensaje_referido:
-            mensaje = await interaction.channel.fetch_message(mensaje_referido.message_id)
-            if mensaje.attachments:
-                imagen = mensaje.attachments[0]
-                await imagen.save(unir_ruta(self.path, imagen.filename))
-                await interaction.response.edit_message(content=f'Guardado en `{self.path}`, ' +
-                                                                'Goshujin-Sama \U0001F44D',
-                                                        view=None)
+        if mensaje_referido is None:
+            return None
+
+        if isinstance(mensaje_referido.resolved, Message):
+            return mensaje_referido.resolved
+
+        return await interaction.channel.fetch_message(mensaje_referido.message_id)
+
+
+    async def _guardar_adjunto(self,
+                               interaction: Interaction,
+                               imagen: Attachment) -> Optional[EstadoGuardado]:
+        """
+        Guarda un adjunto, sin tenerlo entero en memoria, y encarga
+        su vista previa. Devuelve `None` si no se pudo guardar.
+        """
+
+        if imagen.size > TAMANIO_MAXIMO_IMAGEN:
+            return None
+
+        try:
+            ruta, estado = await guardar_contenido(
+                bloques_de_url(interaction.client.sesion_http, imagen.url),
+                unir_ruta(self.path, imagen.filename),
+                tamanio_maximo=TAMANIO_MAXIMO_IMAGEN
+            )
+        except (ClientError, ValueError):
+            return None
+
+        if estado != EstadoGuardado.REPETIDO:
+            interaction.client.imagenes.en_segundo_plano(ruta)
+
+        return estado
+
+
+    async def guardar_img(self, interaction: Interaction) -> None:
+        """
+        Deja de navegar y guarda todas las imágenes del mensaje a la vez.
+        """
+
+        mensaje = await self._mensaje_con_imagenes(interaction)
+        if mensaje is None:
+            return
+
+        imagenes = [adjunto for adjunto in mensaje.attachments if es_imagen(adjunto)]
+        if not imagenes:
+            return
+
+        await interaction.response.defer()
+        estados = await gather(*(self._guardar_adjunto(interaction, imagen)
+                                 for imagen in imagenes))
+
+        guardadas = sum(1 for estado in estados
+                        if estado in (EstadoGuardado.NUEVO, EstadoGuardado.ENLAZADO))
+        repetidas = estados.count(EstadoGuardado.REPETIDO)
+        fallidas = estados.count(None)
+
+        contenido = f'Guardado{"s" if guardadas != 1 else ""} `{guardadas}` en `{self.path}`'
+        if repetidas:
+            contenido += f', `{repetidas}` ya estaba{"n" if repetidas != 1 else ""}'
+        if fallidas:
+            contenido += f', `{fallidas}` no se {"pudieron" if fallidas != 1 else "pudo"} guardar'
+
+        await interaction.edit_original_response(content=f'{contenido}, Goshujin-Sama \U0001F44D',
+                                                 view=None)
 
 
 class SelectorCarpeta(View):
@@ -98,13 +179,16 @@ class SelectorCarpeta(View):
     def __init__(self,
                  ruta: str=get_imagenes_path(),
                  pagina: int=0,
-                 timeout: Optional[float]=120.0) -> None:
+                 timeout: Optional[float]=120.0,
+                 *,
+                 mensaje: Optional[Message]=None) -> None:
         """
         Inicializa una instancia de 'SelectorCarpeta'.
         """
         super().__init__(timeout=timeout)
         self.ruta: str = ruta
         self.pagina: int = pagina
+        self.mensaje: Optional[Message] = mensaje
 
         self.menu_carpetas: Optional[MenuCarpetas] = None
         self.refrescar_menu()
@@ -169,7 +253,9 @@ class SelectorCarpeta(View):
         desde = self.pagina * self.cantidad_elementos
         hasta = (self.pagina + 1) * self.cantidad_elementos
 
-        return MenuCarpetas(ruta=self.ruta, lista_rutas=self.carpetas[desde:hasta])
+        return MenuCarpetas(ruta=self.ruta,
+                            lista_rutas=self.carpetas[desde:hasta],
+                            mensaje=self.mensaje)
 
 
     def refrescar_menu(self) -> None:
@@ -4,6 +4,12 @@ Tests de BotShot
 
 import unittest
 
+from .archivos import *
+from .audio import *
+from .auxiliares import *
+from .botshot import *
+from .db import *
+from .imagenes import *
 from .juegos import *
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+"""
+Pruebas de archivos.
+"""
+
+from .test_contenido import *
+from .test_indice_archivos import *
+from .test_backups import *
+from .test_backups_incrementales import *
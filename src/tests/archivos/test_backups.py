@@ -0,0 +1,90 @@
+"""
+Módulo para tests de los backups de la DB.
+"""
+
+from sqlite3 import connect
+from unittest import TestCase
+from unittest.mock import patch
+from zipfile import ZipFile
+
+from src.main.archivos import backups
+from src.main.db import database
+
+from ..db.db_temporal import DBTemporal
+
+
+class TestBackups(DBTemporal, TestCase):
+    """
+    Tests para los backups de la DB.
+    """
+
+    def setUp(self) -> None:
+        """
+        Arma una carpeta para los backups de la DB temporal.
+        """
+
+        super().setUp()
+        self.carpeta = self.raiz / "backup" / "db"
+        self.carpeta.mkdir(parents=True)
+
+        for parche in (patch.object(backups, "get_backup_path", lambda: self.raiz / "backup"),
+                       patch.object(backups, "get_limite_backup_db", lambda: 3)):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+
+    def test_1_retencion_por_fecha(self) -> None:
+        """
+        Se borran los más viejos según la fecha del nombre, ignorando
+        los archivos que no son backups.
+        """
+
+        for nombre in ("db_2023-01-10_00-00-00.zip",
+                       "db_2022-12-31_23-59-59.zip",
+                       "db_2023-01-09_12-00-00.zip",
+                       "notas.txt"):
+            (self.carpeta / nombre).write_bytes(b"")
+
+        borrados = backups.aplicar_retencion(self.carpeta, 2)
+
+        self.assertEqual(borrados, ("db_2022-12-31_23-59-59.zip",))
+        self.assertEqual(sorted(ruta.name for ruta in self.carpeta.iterdir()),
+                         ["db_2023-01-09_12-00-00.zip", "db_2023-01-10_00-00-00.zip", "notas.txt"])
+
+
+    def test_2_backup_consistente(self) -> None:
+        """
+        El backup tiene una copia de la DB que se puede abrir, y
+        respeta el límite de backups.
+        """
+
+        database.insertar_datos_en_tabla("guilds",
+                                         llave_primaria_por_defecto=False,
+                                         valores=(1, "uno"))
+        for nombre in ("db_2020-01-01_00-00-00.zip", "db_2021-01-01_00-00-00.zip",
+                       "db_2022-01-01_00-00-00.zip"):
+            (self.carpeta / nombre).write_bytes(b"")
+
+        info = backups.hacer_backup_db()
+
+        self.assertGreater(info.tamanio, 0)
+        self.assertEqual(info.borrados, ("db_2020-01-01_00-00-00.zip",))
+
+        with ZipFile(info.ruta) as zf:
+            zf.extractall(self.raiz / "extraido")
+
+        with connect(self.raiz / "extraido" / "db.sqlite3") as con:
+            self.assertEqual(con.execute("SELECT * FROM guilds;").fetchall(), [(1, "uno")])
+
+
+    def test_3_sin_restos_si_falla(self) -> None:
+        """
+        Si falla la compresión, no queda el zip temporal a medio escribir.
+        """
+
+        # Sin instantánea, el zip ya está abierto cuando falla
+        with patch.object(backups, "instantanea_db", lambda destino: None):
+            with self.assertRaises(FileNotFoundError):
+                backups.hacer_backup_db()
+
+        self.assertEqual(list(self.carpeta.iterdir()), [])
@@ -0,0 +1,110 @@
+"""
+Módulo para tests de los backups incrementales de archivos.
+"""
+
+from os import utime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import sleep
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.main.archivos import backups_incrementales
+from src.main.archivos.backups_incrementales import *
+
+
+class TestBackupsIncrementales(TestCase):
+    """
+    Tests para el motor de backups incrementales.
+    """
+
+    def setUp(self) -> None:
+        """
+        Arma una carpeta con algunos archivos, y un almacén vacío.
+        """
+
+        self.dir_temp = TemporaryDirectory()
+        temp = Path(self.dir_temp.name)
+        self.raiz = temp / "sounds"
+        self.almacen = temp / "backup" / "sonidos"
+
+        for ruta, contenido in (("a.mp3", b"a" * 3000),
+                                ("bienvenida/1/b.mp3", b"b" * 10),
+                                ("bienvenida/2/copia.mp3", b"a" * 3000),
+                                (".oculto.tmp", b"temporal")):
+            archivo = self.raiz / ruta
+            archivo.parent.mkdir(parents=True, exist_ok=True)
+            archivo.write_bytes(contenido)
+
+        # Bloques chicos, para que los archivos ocupen varios
+        self.parche = patch.object(backups_incrementales, "TAMANIO_BLOQUE_BACKUP", 1024)
+        self.parche.start()
+
+
+    def tearDown(self) -> None:
+        """
+        Borra la carpeta temporal.
+        """
+
+        self.parche.stop()
+        self.dir_temp.cleanup()
+
+
+    def test_1_deduplica_bloques(self) -> None:
+        """
+        La primera vez se leen todos los archivos, pero los bloques
+        repetidos se guardan una sola vez.
+        """
+
+        resumen = hacer_backup_incremental(self.raiz, self.almacen)
+
+        self.assertEqual(resumen.archivos, 3)
+        self.assertEqual(resumen.cambiados, 3)
+        # 'a' * 1024 y 'a' * 952 de los dos archivos iguales, y 'b' * 10
+        self.assertEqual(resumen.bloques_nuevos, 3)
+
+
+    def test_2_solo_lee_lo_que_cambio(self) -> None:
+        """
+        La segunda vez sólo se leen los archivos nuevos o modificados,
+        y se restaura cada instantánea tal como estaba.
+        """
+
+        primera = hacer_backup_incremental(self.raiz, self.almacen).instantanea
+        sleep(1) # los nombres de las instantáneas van por segundo
+
+        modificado = self.raiz / "bienvenida" / "1" / "b.mp3"
+        modificado.write_bytes(b"c" * 20)
+        utime(modificado, ns=(0, 10**9))
+        (self.raiz / "nuevo.mp3").write_bytes(b"d" * 5)
+
+        resumen = hacer_backup_incremental(self.raiz, self.almacen)
+
+        self.assertEqual(resumen.archivos, 4)
+        self.assertEqual(resumen.cambiados, 2)
+        self.assertEqual(resumen.bytes_leidos, 25)
+
+        destino = Path(self.dir_temp.name) / "restaurado"
+        self.assertEqual(restaurar_instantanea(self.almacen, destino, primera), 3)
+        self.assertEqual((destino / "bienvenida" / "1" / "b.mp3").read_bytes(), b"b" * 10)
+        self.assertFalse((destino / "nuevo.mp3").exists())
+
+        self.assertEqual(restaurar_instantanea(self.almacen, destino, prefijo="bienvenida/1"), 1)
+        self.assertEqual((destino / "bienvenida" / "1" / "b.mp3").read_bytes(), b"c" * 20)
+
+
+    def test_3_retencion_poda_bloques(self) -> None:
+        """
+        Al borrar instantáneas viejas se borran los bloques que sólo
+        usaban esas.
+        """
+
+        hacer_backup_incremental(self.raiz, self.almacen)
+        sleep(1)
+
+        (self.raiz / "bienvenida" / "1" / "b.mp3").unlink()
+        resumen = hacer_backup_incremental(self.raiz, self.almacen, limite=1)
+
+        self.assertEqual(len(resumen.borradas), 1)
+        self.assertEqual(len(listar_instantaneas(self.almacen)), 1)
+        self.assertEqual(len(list((self.almacen / "bloques").glob("*/*"))), 2)
@@ -0,0 +1,201 @@
+"""
+Módulo para tests del guardado de archivos según su contenido.
+"""
+
+from asyncio import gather
+from hashlib import sha256
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import sleep
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from src.main.archivos import contenido
+from src.main.enums import EstadoGuardado
+
+
+async def bloques(*partes: bytes):
+    """
+    Entrega las partes como si llegaran de una descarga.
+    """
+
+    for parte in partes:
+        yield parte
+
+
+class TestContenido(IsolatedAsyncioTestCase):
+    """
+    Tests para el guardado sin repetidos.
+    """
+
+    def setUp(self) -> None:
+        """
+        Reemplaza el índice de la DB por uno en memoria.
+        """
+
+        self.dir_temp = TemporaryDirectory()
+        self.raiz = Path(self.dir_temp.name)
+        self.indice: dict[str, str] = {}
+
+        def por_hash(hash_contenido: str) -> list[str]:
+            return [ruta for ruta, hsh in self.indice.items() if hsh == hash_contenido]
+
+        for nombre, reemplazo in (("get_rutas_por_hash", por_hash),
+                                  ("registrar_contenido",
+                                   lambda hsh, ruta: self.indice.__setitem__(ruta, hsh)),
+                                  ("borrar_contenido",
+                                   lambda ruta: self.indice.pop(ruta, None)),
+                                  ("get_rutas_con_contenido", lambda: set(self.indice))):
+            parche = patch.object(contenido, nombre, reemplazo)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+
+    def tearDown(self) -> None:
+        """
+        Borra los archivos creados.
+        """
+
+        self.dir_temp.cleanup()
+
+
+    def archivos_en(self, carpeta: str) -> list[str]:
+        """
+        Lista los archivos de una carpeta, temporales incluidos.
+        """
+
+        return sorted(ruta.name for ruta in (self.raiz / carpeta).iterdir())
+
+
+    async def test_1_repetido_en_la_misma_carpeta(self) -> None:
+        """
+        El mismo contenido en la misma carpeta no se vuelve a guardar.
+        """
+
+        ruta, estado = await contenido.guardar_contenido(bloques(b"ho", b"la"),
+                                                         self.raiz / "a" / "meme.png")
+        self.assertEqual(estado, EstadoGuardado.NUEVO)
+        self.assertEqual(Path(ruta).read_bytes(), b"hola")
+
+        ruta_rep, estado = await contenido.guardar_contenido(bloques(b"hola"),
+                                                             self.raiz / "a" / "otro.png")
+        self.assertEqual(estado, EstadoGuardado.REPETIDO)
+        self.assertEqual(ruta_rep, ruta)
+        self.assertEqual(self.archivos_en("a"), ["meme.png"])
+
+
+    async def test_2_enlaza_entre_carpetas(self) -> None:
+        """
+        El mismo contenido en otra carpeta es un enlace al original.
+        """
+
+        ruta, _ = await contenido.guardar_contenido(bloques(b"hola"), self.raiz / "a" / "x.png")
+        ruta_b, estado = await contenido.guardar_contenido(bloques(b"hola"),
+                                                           self.raiz / "b" / "x.png")
+
+        self.assertEqual(estado, EstadoGuardado.ENLAZADO)
+        self.assertTrue(Path(ruta).samefile(ruta_b))
+        self.assertEqual(len(self.indice), 2)
+
+
+    async def test_3_olvida_copias_borradas(self) -> None:
+        """
+        Si la copia registrada ya no existe, se guarda como nuevo.
+        """
+
+        ruta, _ = await contenido.guardar_contenido(bloques(b"hola"), self.raiz / "a" / "x.png")
+        Path(ruta).unlink()
+
+        ruta, estado = await contenido.guardar_contenido(bloques(b"hola"),
+                                                         self.raiz / "a" / "x.png")
+
+        self.assertEqual(estado, EstadoGuardado.NUEVO)
+        self.assertEqual(list(self.indice), [ruta])
+
+
+    async def test_4_tamanio_maximo(self) -> None:
+        """
+        Si se pasa del tamaño máximo, no queda nada escrito.
+        """
+
+        with self.assertRaises(ValueError):
+            await contenido.guardar_contenido(bloques(b"ho", b"la"),
+                                              self.raiz / "a" / "x.png",
+                                              tamanio_maximo=3)
+
+        self.assertEqual(self.archivos_en("a"), [])
+        self.assertEqual(self.indice, {})
+
+
+    async def test_5_guardados_simultaneos(self) -> None:
+        """
+        Varios guardados a la vez con el mismo nombre no se pisan.
+        """
+
+        repite_nombre = contenido.repite_nombre
+
+        def repite_nombre_lento(ruta: Path) -> Path:
+            # Agranda el hueco entre elegir el nombre y ocuparlo
+            ruta_libre = repite_nombre(ruta)
+            sleep(0.005)
+            return ruta_libre
+
+        cantidad = 30
+        with patch.object(contenido, "repite_nombre", repite_nombre_lento):
+            resultados = await gather(*(contenido.guardar_contenido(bloques(f"img {i}".encode()),
+                                                                    self.raiz / "a" / "image.png")
+                                        for i in range(cantidad)))
+
+        rutas = [ruta for ruta, _ in resultados]
+        self.assertEqual(len(set(rutas)), cantidad)
+        self.assertEqual(len(self.archivos_en("a")), cantidad)
+        self.assertEqual(sorted(Path(ruta).read_bytes() for ruta in rutas),
+                         sorted(f"img {i}".encode() for i in range(cantidad)))
+
+
+    async def test_6_escribe_de_a_lotes(self) -> None:
+        """
+        Los bloques se escriben juntos de a lotes, y el hash y el
+        contenido quedan iguales que escribiéndolos de a uno.
+        """
+
+        partes = [bytes([numero]) * contenido.TAMANIO_BLOQUE_GUARDADO for numero in range(40)]
+        lotes: list[int] = []
+        volcar = contenido._volcar
+
+        def anotar_lote(arch, hasheador, lote) -> None:
+            lotes.append(len(lote))
+            volcar(arch, hasheador, lote)
+
+        with patch.object(contenido, "_volcar", anotar_lote):
+            ruta, _ = await contenido.guardar_contenido(bloques(*partes),
+                                                        self.raiz / "a" / "largo.bin")
+
+        self.assertEqual(Path(ruta).read_bytes(), b"".join(partes))
+        self.assertEqual(lotes, [contenido.TAMANIO_LOTE_ESCRITURA] * 2 +
+                                [len(partes) * contenido.TAMANIO_BLOQUE_GUARDADO -
+                                 2 * contenido.TAMANIO_LOTE_ESCRITURA])
+        self.assertEqual(list(self.indice.values()), [sha256(b"".join(partes)).hexdigest()])
+
+
+    async def test_7_indexa_los_ya_guardados(self) -> None:
+        """
+        Los archivos guardados antes del índice se registran, y los
+        nuevos con el mismo contenido ya no se repiten.
+        """
+
+        (self.raiz / "a").mkdir()
+        (self.raiz / "a" / "viejo.png").write_bytes(b"hola")
+        (self.raiz / "a" / ".viejo.png.tmp").write_bytes(b"a medias")
+        ruta, _ = await contenido.guardar_contenido(bloques(b"chau"), self.raiz / "a" / "x.png")
+
+        self.assertEqual(contenido.indexar_existentes(self.raiz), 1)
+        self.assertEqual(self.indice[(self.raiz / "a" / "viejo.png").as_posix()],
+                         sha256(b"hola").hexdigest())
+        self.assertEqual(self.indice[ruta], sha256(b"chau").hexdigest())
+        self.assertEqual(contenido.indexar_existentes(self.raiz), 0)
+
+        ruta_rep, estado = await contenido.guardar_contenido(bloques(b"hola"),
+                                                             self.raiz / "a" / "nuevo.png")
+        self.assertEqual(estado, EstadoGuardado.REPETIDO)
+        self.assertEqual(Path(ruta_rep).name, "viejo.png")
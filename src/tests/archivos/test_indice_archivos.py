@@ -0,0 +1,96 @@
+"""
+Módulo para tests del índice de archivos.
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from src.main.archivos import IndiceArchivos
+
+
+class TestIndiceArchivos(TestCase):
+    """
+    Tests para el índice en memoria de archivos.
+    """
+
+    def setUp(self) -> None:
+        """
+        Arma una carpeta con algunos sonidos.
+        """
+
+        self.dir_temp = TemporaryDirectory()
+        self.raiz = Path(self.dir_temp.name)
+
+        for ruta in ("bienvenida/1/hola.mp3",
+                     "bienvenida/2/chau.mp3",
+                     "risa_fuerte.mp3",
+                     "carcajada.ogg",
+                     ".oculto.mp3"):
+            archivo = self.raiz / ruta
+            archivo.parent.mkdir(parents=True, exist_ok=True)
+            archivo.write_bytes(b"")
+
+        self.indice = IndiceArchivos(self.raiz)
+        self.indice.cargar()
+
+
+    def tearDown(self) -> None:
+        """
+        Borra la carpeta temporal.
+        """
+
+        self.dir_temp.cleanup()
+
+
+    def nombres(self, rutas: list[str]) -> list[str]:
+        """
+        Se queda con los nombres de las rutas.
+        """
+
+        return [Path(ruta).name for ruta in rutas]
+
+
+    def test_1_carga_sin_ocultos(self) -> None:
+        """
+        Se indexan todos los archivos menos los ocultos.
+        """
+
+        self.assertEqual(len(self.indice), 4)
+
+
+    def test_2_ordena_por_coincidencia(self) -> None:
+        """
+        Primero los nombres que empiezan con la consulta, después los
+        que la contienen, y al final los que tienen sus letras en orden.
+        """
+
+        self.assertEqual(self.nombres(self.indice.buscar("ca")),
+                         ["carcajada.ogg", "chau.mp3"])
+        self.assertEqual(self.nombres(self.indice.buscar("RISA")), ["risa_fuerte.mp3"])
+        self.assertEqual(self.nombres(self.indice.buscar("rsft")), ["risa_fuerte.mp3"])
+
+
+    def test_3_busca_bajo_carpeta(self) -> None:
+        """
+        Se pueden limitar los resultados a una subcarpeta.
+        """
+
+        bajo = self.raiz / "bienvenida" / "1"
+
+        self.assertEqual(self.nombres(self.indice.buscar("", bajo=bajo)), ["hola.mp3"])
+        self.assertEqual(self.indice.buscar("chau", bajo=bajo), [])
+
+
+    def test_4_agregar_y_quitar(self) -> None:
+        """
+        Los cambios avisados se ven sin volver a recorrer la carpeta.
+        """
+
+        nueva = self.raiz / "bienvenida" / "1" / "nuevo.mp3"
+        self.indice.agregar(nueva)
+
+        self.assertIn(nueva.as_posix(), self.indice.buscar("nue"))
+        self.assertTrue(self.indice.quitar(nueva))
+        self.assertFalse(self.indice.quitar(nueva))
+        self.assertEqual(self.indice.buscar("nue"), [])
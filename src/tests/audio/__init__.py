@@ -0,0 +1,14 @@
+"""
+Pruebas de audio.
+"""
+
+from .test_agrupador_ingresos import *
+from .test_bienvenidas import *
+from .test_cache_opus import *
+from .test_cola_audio import *
+from .test_pool_ffmpeg import *
+from .test_streaming import *
+from .test_sesiones_voz import *
+from .test_sondeo import *
+from .test_transcodificacion import *
+from .test_validacion import *
@@ -0,0 +1,88 @@
+"""
+Módulo para tests de la clase 'AgrupadorIngresos'.
+"""
+
+from asyncio import sleep
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase
+
+from src.main.audio.agrupador_ingresos import *
+
+
+class ObjetoConId:
+    """
+    Guild o miembro de mentira, que sólo tiene id.
+    """
+
+    def __init__(self, id_obj: int) -> None:
+        self.id = id_obj
+
+
+class TestAgrupadorIngresos(IsolatedAsyncioTestCase):
+    """
+    Tests para el agrupador de ingresos a canales de voz.
+    """
+
+    async def asyncSetUp(self) -> None:
+        """
+        Crea un agrupador que anota lo que entrega.
+        """
+
+        self.entregas: list[tuple[int, list[int]]] = []
+
+        async def al_vencer(guild: ObjetoConId, miembros: list[ObjetoConId]) -> None:
+            self.entregas.append((guild.id, [miembro.id for miembro in miembros]))
+
+        self.agrupador = AgrupadorIngresos(al_vencer, ventana=0.01, max_por_rafaga=2)
+
+
+    async def test_1_agrupa_rafagas_por_guild(self) -> None:
+        """
+        Los ingresos de una ráfaga se entregan juntos, sin repetir
+        miembros, separados por guild y acotados al máximo.
+        """
+
+        guild_a, guild_b = ObjetoConId(1), ObjetoConId(2)
+
+        for id_miembro in (10, 10, 11, 12):
+            self.agrupador.registrar(guild_a, ObjetoConId(id_miembro))
+        self.agrupador.registrar(guild_b, ObjetoConId(20))
+
+        await sleep(0.05)
+
+        self.assertCountEqual(self.entregas, [(1, [10, 11]), (2, [20])])
+
+
+    async def test_2_cancelar_descarta(self) -> None:
+        """
+        Al cancelar, nada de lo pendiente se entrega.
+        """
+
+        self.agrupador.registrar(ObjetoConId(1), ObjetoConId(10))
+        self.agrupador.cancelar()
+
+        await sleep(0.05)
+
+        self.assertEqual(self.entregas, [])
+
+
+    async def test_3_anota_si_falla(self) -> None:
+        """
+        Si la entrega falla, el error se anota en el log en vez de
+        perderse con la tarea.
+        """
+
+        errores = []
+
+        async def falla(_guild, _miembros) -> None:
+            raise OSError("sin ffmpeg")
+
+        agrupador = AgrupadorIngresos(falla,
+                                      ventana=0.01,
+                                      log=SimpleNamespace(error=errores.append))
+        agrupador.registrar(ObjetoConId(1), ObjetoConId(10))
+
+        await sleep(0.05)
+
+        self.assertEqual(len(errores), 1)
+        self.assertIn("sin ffmpeg", errores[0])
@@ -0,0 +1,65 @@
+"""
+Módulo para tests de la clase 'RegistroBienvenidas'.
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from src.main.audio.bienvenidas import *
+
+
+class TestRegistroBienvenidas(TestCase):
+    """
+    Tests para el registro de sonidos de bienvenida.
+    """
+
+    def setUp(self) -> None:
+        """
+        Arma una carpeta de bienvenidas de prueba.
+        """
+
+        self.dir_temp = TemporaryDirectory()
+        self.ruta = Path(self.dir_temp.name)
+
+        for ruta in ("123/hola.mp3", "123/chau.mp3", "generico/gen.mp3"):
+            (self.ruta / ruta).parent.mkdir(parents=True, exist_ok=True)
+            (self.ruta / ruta).touch()
+
+        self.registro = RegistroBienvenidas(self.ruta)
+        self.registro.cargar()
+
+
+    def tearDown(self) -> None:
+        """
+        Borra la carpeta de prueba.
+        """
+
+        self.dir_temp.cleanup()
+
+
+    def test_1_carga_por_miembro_y_genericos(self) -> None:
+        """
+        Cada carpeta numérica es de un miembro, y 'generico' es
+        el grupo para los que no tienen sonido propio.
+        """
+
+        self.assertEqual(len(self.registro), 3)
+        self.assertEqual(len(self.registro.sonidos_de(123)), 2)
+        self.assertIn(self.registro.sonido_para(123), self.registro.sonidos_de(123))
+        self.assertTrue(self.registro.sonido_para(456).endswith("gen.mp3"))
+
+
+    def test_2_agregar_y_quitar(self) -> None:
+        """
+        Agregar y quitar sonidos actualiza el índice sin recargarlo.
+        """
+
+        nuevo = (self.ruta / "456/nuevo.mp3").as_posix()
+        self.registro.agregar(456, nuevo)
+        self.assertEqual(self.registro.sonido_para(456), nuevo)
+
+        self.assertTrue(self.registro.quitar(nuevo))
+        self.assertFalse(self.registro.quitar(nuevo))
+        self.assertEqual(self.registro.sonidos_de(456), ())
+        self.assertTrue(self.registro.sonido_para(456).endswith("gen.mp3"))
@@ -0,0 +1,164 @@
+"""
+Módulo para tests del caché de sonidos en Opus.
+"""
+
+from asyncio import gather
+from io import BytesIO
+from os import utime
+from pathlib import Path
+from struct import pack
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from src.main.audio import cache_opus
+from src.main.audio.cache_opus import *
+
+
+def pagina_ogg(*paquetes: bytes) -> bytes:
+    """
+    Arma una página Ogg con paquetes cortos (de menos de 255 bytes).
+    """
+
+    encabezado = pack("<xBQIIIB", 0, 0, 1, 0, 0, len(paquetes))
+    return b"OggS" + encabezado + bytes(map(len, paquetes)) + b"".join(paquetes)
+
+
+class TestCacheOpus(IsolatedAsyncioTestCase):
+    """
+    Tests para el caché de sonidos transcodificados.
+    """
+
+    def setUp(self) -> None:
+        """
+        Arma una carpeta con sonidos, y hace que "transcodificar" sea
+        armar un Ogg con el contenido del sonido como único paquete de audio.
+        """
+
+        self.dir_temp = TemporaryDirectory()
+        self.raiz = Path(self.dir_temp.name)
+        self.transcodificados: list[str] = []
+
+        def transcodificar(ruta_origen, ruta_destino, filtros=None) -> None:
+            self.transcodificados.append(Path(ruta_origen).name)
+            Path(ruta_destino).parent.mkdir(parents=True, exist_ok=True)
+            Path(ruta_destino).write_bytes(pagina_ogg(b"OpusHead",
+                                                      b"OpusTags",
+                                                      Path(ruta_origen).read_bytes()))
+
+        for nombre, reemplazo in (("transcodificar_a_opus", transcodificar),
+                                  ("get_sonido_opus", lambda ruta: None)):
+            parche = patch.object(cache_opus, nombre, reemplazo)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+
+    def tearDown(self) -> None:
+        """
+        Borra los archivos creados.
+        """
+
+        self.dir_temp.cleanup()
+
+
+    def sonido(self, nombre: str, contenido: bytes) -> Path:
+        """
+        Crea un sonido en la carpeta temporal.
+        """
+
+        ruta = self.raiz / "sonidos" / nombre
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_bytes(contenido)
+
+        return ruta
+
+
+    def test_1_leer_paquetes(self) -> None:
+        """
+        Se leen los paquetes de audio, sin los de encabezado.
+        """
+
+        ogg = pagina_ogg(b"OpusHead", b"OpusTags", b"uno", b"dos")
+
+        self.assertEqual(list(leer_paquetes_opus(BytesIO(ogg))), [b"uno", b"dos"])
+
+
+    def test_2_clave_cambia_con_el_archivo(self) -> None:
+        """
+        Si el sonido cambia de tamaño o de fecha, le toca otro archivo
+        en el caché.
+        """
+
+        cache = CacheOpus(self.raiz / "cache")
+        ruta = self.sonido("a.mp3", b"aaaa")
+        original = cache.ruta_cacheada(ruta)
+
+        self.assertEqual(cache.ruta_cacheada(ruta), original)
+
+        utime(ruta, ns=(0, 1_000_000_000))
+        por_fecha = cache.ruta_cacheada(ruta)
+        self.assertNotEqual(por_fecha, original)
+
+        ruta.write_bytes(b"aaaaa")
+        utime(ruta, ns=(0, 1_000_000_000))
+        self.assertNotIn(cache.ruta_cacheada(ruta), (original, por_fecha))
+
+
+    async def test_3_transcodifica_una_vez(self) -> None:
+        """
+        Pedidos simultáneos del mismo sonido lo transcodifican una sola
+        vez, y se vuelve a transcodificar si el sonido cambia.
+        """
+
+        cache = CacheOpus(self.raiz / "cache")
+        ruta = self.sonido("a.mp3", b"aaaa")
+
+        rutas_ogg = await gather(*(cache.asegurar(ruta) for _ in range(3)))
+        await cache.asegurar(ruta)
+        self.assertEqual(len(set(rutas_ogg)), 1)
+        self.assertEqual(self.transcodificados, ["a.mp3"])
+
+        ruta.write_bytes(b"otro")
+        utime(ruta, ns=(0, 1_000_000_000))
+        self.assertNotEqual(await cache.asegurar(ruta), rutas_ogg[0])
+        self.assertEqual(self.transcodificados, ["a.mp3", "a.mp3"])
+
+
+    async def test_4_desaloja_el_menos_usado(self) -> None:
+        """
+        La memoria se mantiene bajo el límite, desalojando los sonidos
+        usados menos recientemente.
+        """
+
+        cache = CacheOpus(self.raiz / "cache", max_bytes=10)
+        rutas = {nombre: self.sonido(f"{nombre}.mp3", nombre.encode() * 4) for nombre in "abc"}
+
+        await cache.pista(rutas["a"])
+        await cache.pista(rutas["b"])
+        await cache.pista(rutas["a"])
+        pista_c = await cache.pista(rutas["c"])
+
+        self.assertEqual(cache.bytes_en_memoria, 8)
+        en_memoria = [cache.ruta_cacheada(rutas[nombre]).name in cache._memoria
+                      for nombre in "abc"]
+        self.assertEqual(en_memoria, [True, False, True])
+
+        fuente = await pista_c.tomar_fuente()
+        self.assertTrue(fuente.is_opus())
+        self.assertEqual((fuente.read(), fuente.read()), (b"cccc", b""))
+
+
+    async def test_5_grandes_desde_disco(self) -> None:
+        """
+        Los sonidos más grandes que el máximo por entrada se leen del
+        disco en vez de guardarse en memoria.
+        """
+
+        cache = CacheOpus(self.raiz / "cache", max_bytes_entrada=16)
+        pista = await cache.pista(self.sonido("largo.mp3", b"x" * 64))
+
+        self.assertEqual(cache.bytes_en_memoria, 0)
+
+        fuente = await pista.tomar_fuente()
+        self.assertEqual(fuente.read(), b"x" * 64)
+        fuente.cleanup()
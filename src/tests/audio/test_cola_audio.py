@@ -0,0 +1,206 @@
+"""
+Módulo para tests de la clase 'ColaAudio'.
+"""
+
+from asyncio import Event, sleep
+from unittest import IsolatedAsyncioTestCase
+
+from src.main.audio.cola_audio import *
+from src.main.enums import ModoBucle
+
+
+class FuenteFalsa:
+    """
+    Fuente de audio que sólo recuerda si fue liberada.
+    """
+
+    def __init__(self, nombre: str) -> None:
+        self.nombre = nombre
+        self.liberada = False
+
+    def cleanup(self) -> None:
+        self.liberada = True
+
+
+class ClienteVozFalso:
+    """
+    Cliente de voz que guarda lo que se le pidió reproducir.
+    """
+
+    def __init__(self) -> None:
+        self.reproducidas: list[str] = []
+        self.after = None
+
+    def is_connected(self) -> bool:
+        return True
+
+    def play(self, fuente: FuenteFalsa, after=None) -> None:
+        self.reproducidas.append(fuente.nombre)
+        self.after = after
+
+    def stop(self) -> None:
+        if self.after is not None:
+            after, self.after = self.after, None
+            after(None)
+
+
+class GuildFalso:
+    """
+    Guild con un cliente de voz falso.
+    """
+
+    name = "guild"
+
+    def __init__(self) -> None:
+        self.voice_client = ClienteVozFalso()
+
+
+class TestColaAudio(IsolatedAsyncioTestCase):
+    """
+    Tests para la cola de reproducción.
+    """
+
+    async def asyncSetUp(self) -> None:
+        """
+        Crea una cola nueva.
+        """
+
+        self.guild = GuildFalso()
+        self.cola = ColaAudio(self.guild)
+        self.creadas: list[FuenteFalsa] = []
+
+
+    def pista(self, titulo: str) -> Pista:
+        """
+        Crea una pista que registra cada fuente que genera.
+        """
+
+        def crear() -> FuenteFalsa:
+            fuente = FuenteFalsa(titulo)
+            self.creadas.append(fuente)
+            return fuente
+
+        return Pista(titulo, crear)
+
+
+    @staticmethod
+    async def esperar() -> None:
+        """
+        Deja correr las tareas pendientes del loop.
+        """
+
+        for _ in range(5):
+            await sleep(0)
+
+
+    async def terminar_actual(self) -> None:
+        """
+        Simula que la pista actual terminó de sonar.
+        """
+
+        self.guild.voice_client.stop()
+        await self.esperar()
+
+
+    async def test_1_encolar_reproduce_y_precarga(self) -> None:
+        """
+        La primera pista suena al instante, y la segunda queda
+        precargada esperando.
+        """
+
+        a, b = self.pista("a"), self.pista("b")
+
+        self.assertEqual(self.cola.encolar(a), 0)
+        self.assertEqual(self.cola.encolar(b), 1)
+        await self.esperar()
+        self.assertEqual(self.guild.voice_client.reproducidas, ["a"])
+        self.assertTrue(b.precargada)
+
+        await self.terminar_actual()
+        self.assertEqual(self.guild.voice_client.reproducidas, ["a", "b"])
+        self.assertEqual(self.cola.listar(), [])
+
+
+    async def test_2_bucle_de_pista_repite(self) -> None:
+        """
+        En bucle de pista, la misma pista vuelve a sonar, salvo
+        que se la salte.
+        """
+
+        self.cola.modo_bucle = ModoBucle.PISTA
+        self.cola.encolar(self.pista("a"))
+        self.cola.encolar(self.pista("b"))
+        await self.esperar()
+
+        await self.terminar_actual()
+        self.assertEqual(self.guild.voice_client.reproducidas, ["a", "a"])
+
+        self.cola.saltar()
+        await self.esperar()
+        self.assertEqual(self.guild.voice_client.reproducidas, ["a", "a", "b"])
+
+
+    async def test_3_bucle_de_cola_reencola(self) -> None:
+        """
+        En bucle de cola, la pista terminada vuelve al final.
+        """
+
+        self.cola.modo_bucle = ModoBucle.COLA
+        self.cola.encolar(self.pista("a"))
+        self.cola.encolar(self.pista("b"))
+        await self.esperar()
+
+        await self.terminar_actual()
+        self.assertEqual(self.cola.listar(), ["a"])
+
+
+    async def test_4_limpiar_libera_precargadas(self) -> None:
+        """
+        Al limpiar la cola, las fuentes precargadas se liberan.
+        """
+
+        self.cola.encolar(self.pista("a"))
+        self.cola.encolar(self.pista("b"))
+        await self.esperar()
+
+        self.assertEqual(self.cola.limpiar(), 1)
+        await self.esperar()
+        self.assertTrue(all(fuente.liberada for fuente in self.creadas if fuente.nombre == "b"))
+        self.assertEqual(len(self.cola), 0)
+
+
+    async def test_5_detener_ignora_callbacks_viejos(self) -> None:
+        """
+        Una vez detenida, el aviso de la pista cortada no
+        arranca ninguna otra.
+        """
+
+        self.cola.encolar(self.pista("a"))
+        self.cola.encolar(self.pista("b"))
+        await self.esperar()
+        self.cola.detener()
+        await self.esperar()
+
+        self.assertFalse(self.cola.ocupada)
+        self.assertEqual(self.guild.voice_client.reproducidas, ["a"])
+
+
+    async def test_6_fuentes_asincronicas(self) -> None:
+        """
+        Si crear la fuente requiere esperar, la pista suena
+        recién cuando la fuente está lista.
+        """
+
+        listo = Event()
+
+        async def crear() -> FuenteFalsa:
+            await listo.wait()
+            return FuenteFalsa("lenta")
+
+        self.cola.encolar(Pista("lenta", crear))
+        await self.esperar()
+        self.assertEqual(self.guild.voice_client.reproducidas, [])
+
+        listo.set()
+        await self.esperar()
+        self.assertEqual(self.guild.voice_client.reproducidas, ["lenta"])
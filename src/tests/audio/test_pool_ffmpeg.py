@@ -0,0 +1,142 @@
+"""
+Módulo para tests del pool de procesos de FFmpeg.
+"""
+
+from asyncio import create_task, sleep, wait_for
+from pathlib import Path
+from subprocess import DEVNULL, PIPE, Popen
+from tempfile import TemporaryDirectory
+from time import sleep as sleep_bloqueante
+from typing import Optional
+from unittest import IsolatedAsyncioTestCase
+
+from src.main.audio.pool_ffmpeg import *
+
+
+class PoolFalso(PoolFFmpeg):
+    """
+    Pool que en vez de FFmpeg lanza 'cat', que devuelve la entrada tal
+    cual, y anota los procesos que lanzó.
+    """
+
+    def __init__(self, *args, demora: float=0.0, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.demora = demora
+        self.lanzados: list[Popen] = []
+        self.rutas: list[Optional[str]] = []
+
+
+    def _lanzar(self, ruta: Optional[str]=None) -> Popen:
+        sleep_bloqueante(self.demora)
+        self.rutas.append(ruta)
+
+        if ruta is None:
+            proceso = Popen(("cat",), stdin=PIPE, stdout=PIPE, stderr=DEVNULL)
+        else:
+            proceso = Popen(("cat", ruta), stdin=DEVNULL, stdout=PIPE, stderr=DEVNULL)
+
+        self.lanzados.append(proceso)
+        return proceso
+
+
+class TestPoolFFmpeg(IsolatedAsyncioTestCase):
+    """
+    Tests para el pool de procesos precalentados.
+    """
+
+    async def esperar_procesos(self, pool: PoolFalso, cantidad: int) -> None:
+        """
+        Espera a que el pool haya lanzado tantos procesos, y que
+        todos hayan terminado.
+        """
+
+        for _ in range(200):
+            if (len(pool.lanzados) >= cantidad
+                and all(proceso.poll() is not None for proceso in pool.lanzados)):
+                return
+            await sleep(0.01)
+
+        self.fail("Los procesos no terminaron.")
+
+
+    async def test_1_precargadas_no_ocupan_lugar(self) -> None:
+        """
+        Las fuentes ocupan lugar recién al reservarlas para sonar, y
+        al liberarlas lo devuelven.
+        """
+
+        pool = PoolFalso(precalentados=0, max_procesos=1)
+        await pool.iniciar()
+
+        primera = await pool.fuente(b"a" * OpusEncoder.FRAME_SIZE)
+        segunda = await pool.fuente(b"b" * OpusEncoder.FRAME_SIZE)
+        self.assertEqual(pool.en_uso, 0)
+
+        await primera.reservar()
+        self.assertEqual(pool.en_uso, 1)
+        self.assertEqual(primera.read(), b"a" * OpusEncoder.FRAME_SIZE)
+
+        esperando = create_task(segunda.reservar())
+        await sleep(0.01)
+        self.assertFalse(esperando.done())
+
+        primera.cleanup()
+        await wait_for(esperando, 1)
+        self.assertEqual(pool.en_uso, 1)
+
+        segunda.cleanup()
+        await sleep(0)
+        self.assertEqual(pool.en_uso, 0)
+        pool.cerrar()
+
+
+    async def test_2_rutas_sin_pipe(self) -> None:
+        """
+        Las rutas se le pasan directamente al proceso, sin precalentar.
+        """
+
+        with TemporaryDirectory() as carpeta:
+            ruta = Path(carpeta) / "sonido.m4a"
+            ruta.write_bytes(b"c" * OpusEncoder.FRAME_SIZE)
+
+            pool = PoolFalso(precalentados=0)
+            await pool.iniciar()
+            fuente = await pool.fuente(ruta)
+
+            self.assertEqual(pool.rutas, [str(ruta)])
+            self.assertEqual(fuente.read(), b"c" * OpusEncoder.FRAME_SIZE)
+            fuente.cleanup()
+            pool.cerrar()
+
+
+    async def test_3_cancelar_mientras_lanza(self) -> None:
+        """
+        Si se cancela el pedido mientras se lanza el proceso, el proceso
+        se mata igual en vez de quedar perdido.
+        """
+
+        pool = PoolFalso(precalentados=0, demora=0.05)
+        await pool.iniciar()
+
+        pedido = create_task(pool.fuente(b"hola"))
+        await sleep(0.01)
+        pedido.cancel()
+
+        await self.esperar_procesos(pool, 1)
+        self.assertEqual(pool.en_uso, 0)
+
+
+    async def test_4_cerrar_mata_los_que_se_lanzan(self) -> None:
+        """
+        Al cerrar se matan los precalentados, incluso los que todavía
+        se estaban lanzando.
+        """
+
+        pool = PoolFalso(precalentados=2, demora=0.05)
+        await pool.iniciar()
+        await sleep(0.01)
+
+        pool.cerrar()
+
+        await self.esperar_procesos(pool, 2)
+        self.assertEqual(pool.libres, 0)
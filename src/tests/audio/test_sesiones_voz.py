@@ -0,0 +1,128 @@
+"""
+Módulo para tests de la clase 'GestorVoz'.
+"""
+
+from unittest import IsolatedAsyncioTestCase
+
+from src.main.audio.sesiones_voz import *
+
+
+class GuildFalso:
+    """
+    Guild de mentira, con su propio cliente de voz.
+    """
+
+    def __init__(self, id_guild: int) -> None:
+        self.id = id_guild
+        self.name = f"guild {id_guild}"
+        self.voice_client = None
+
+
+class CanalFalso:
+    """
+    Canal de voz de mentira.
+    """
+
+    def __init__(self, guild: GuildFalso, cliente: "ClienteFalso") -> None:
+        self.guild = guild
+        self.cliente = cliente
+        self.conexiones = 0
+
+
+    async def connect(self) -> "ClienteVozFalso":
+        self.conexiones += 1
+        cl_voz = ClienteVozFalso(self, self.cliente)
+        self.guild.voice_client = cl_voz
+        self.cliente.voice_clients.append(cl_voz)
+        return cl_voz
+
+
+class ClienteVozFalso:
+    """
+    Cliente de voz de mentira.
+    """
+
+    def __init__(self, canal: CanalFalso, cliente: "ClienteFalso") -> None:
+        self.channel = canal
+        self.guild = canal.guild
+        self.cliente = cliente
+        self.sonando = False
+
+
+    def is_connected(self) -> bool:
+        return self in self.cliente.voice_clients
+
+
+    def is_playing(self) -> bool:
+        return self.sonando
+
+
+    async def move_to(self, canal: CanalFalso) -> None:
+        self.channel = canal
+
+
+    async def disconnect(self, force: bool=False) -> None:
+        self.cliente.voice_clients.remove(self)
+        self.guild.voice_client = None
+
+
+class ClienteFalso:
+    """
+    Bot de mentira, que sólo lleva la cuenta de sus conexiones.
+    """
+
+    def __init__(self) -> None:
+        self.voice_clients: list[ClienteVozFalso] = []
+
+
+class TestGestorVoz(IsolatedAsyncioTestCase):
+    """
+    Tests para el gestor de conexiones de voz.
+    """
+
+    def setUp(self) -> None:
+        """
+        Crea un gestor sobre un bot de mentira.
+        """
+
+        self.cliente = ClienteFalso()
+        self.desconectados: list[int] = []
+        self.gestor = GestorVoz(self.cliente,
+                                ventana_inactividad=0,
+                                al_desconectar=lambda guild: self.desconectados.append(guild.id))
+
+
+    async def test_1_cambiar_de_canal_mueve_la_conexion(self) -> None:
+        """
+        Cambiar de canal en el mismo guild no abre otra conexión.
+        """
+
+        guild = GuildFalso(1)
+        canal_a = CanalFalso(guild, self.cliente)
+        canal_b = CanalFalso(guild, self.cliente)
+
+        cl_voz = await self.gestor.conectar(canal_a)
+        movido = await self.gestor.conectar(canal_b)
+
+        self.assertIs(cl_voz, movido)
+        self.assertIs(movido.channel, canal_b)
+        self.assertEqual(canal_a.conexiones + canal_b.conexiones, 1)
+        self.assertEqual(self.gestor.conexiones, 1)
+
+
+    async def test_2_desconecta_solo_las_inactivas(self) -> None:
+        """
+        Se cierran las conexiones sin reproducir, no las que suenan.
+        """
+
+        inactiva = await self.gestor.conectar(CanalFalso(GuildFalso(1), self.cliente))
+        sonando = await self.gestor.conectar(CanalFalso(GuildFalso(2), self.cliente))
+        sonando.sonando = True
+
+        self.assertEqual(self.gestor.estadisticas(),
+                         {"conexiones": 2, "reproduciendo": 1, "inactivas": 1})
+
+        self.assertEqual(await self.gestor.revisar(), 1)
+        self.assertFalse(inactiva.is_connected())
+        self.assertTrue(sonando.is_connected())
+        self.assertEqual(self.desconectados, [1])
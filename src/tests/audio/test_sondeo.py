@@ -0,0 +1,85 @@
+"""
+Módulo para tests del sondeo de audios.
+"""
+
+from asyncio import CancelledError, create_task, gather, sleep
+from unittest import IsolatedAsyncioTestCase
+
+from src.main.audio.sondeo import *
+from src.main.audio.sondeo import _parsear_salida
+
+
+class SondeoContado(SondeoAudio):
+    """
+    Sondeo que no lanza ffprobe, sino que cuenta las veces
+    que lo hubiera lanzado.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.lanzados = 0
+
+
+    async def _ejecutar_ffprobe(self, entrada, tamanio):
+        self.lanzados += 1
+        await sleep(0.01)
+        return InfoAudio(tamanio, 3.0, True)
+
+
+class TestSondeo(IsolatedAsyncioTestCase):
+    """
+    Tests para el servicio de sondeo.
+    """
+
+    def test_1_parsear_salida(self) -> None:
+        """
+        Se leen la duración, el tamaño y si hay algún stream de audio.
+        """
+
+        salida = (b'{"streams": [{"codec_type": "video"}, {"codec_type": "audio"}],' +
+                  b' "format": {"duration": "2.500000", "size": "1234"}}')
+
+        self.assertEqual(_parsear_salida(salida, None), InfoAudio(1234, 2.5, True))
+        self.assertEqual(_parsear_salida(b"basura", 10), InfoAudio(10, None, False))
+
+
+    async def test_2_cachea_por_clave(self) -> None:
+        """
+        Sondeos con la misma clave, aunque sean simultáneos, lanzan
+        ffprobe una sola vez.
+        """
+
+        sondeo = SondeoContado(max_cacheados=1)
+
+        await gather(*(sondeo.sondear("a", "clave-a") for _ in range(3)))
+        await sondeo.sondear("otra ruta", "clave-a")
+        self.assertEqual(sondeo.lanzados, 1)
+
+        await sondeo.sondear("b", "clave-b")
+        await sondeo.sondear("a", "clave-a")
+        self.assertEqual(sondeo.lanzados, 3)
+        self.assertEqual(len(sondeo), 1)
+
+
+    async def test_3_cancelar_a_uno_que_espera(self) -> None:
+        """
+        Cancelar a uno de los que esperan un sondeo en curso no se lo
+        cancela a quien lo lanzó ni a los demás.
+        """
+
+        sondeo = SondeoContado()
+
+        lanzador = create_task(sondeo.sondear("a", "clave-a"))
+        await sleep(0)
+        cancelado = create_task(sondeo.sondear("a", "clave-a"))
+        otro = create_task(sondeo.sondear("a", "clave-a"))
+        await sleep(0)
+        cancelado.cancel()
+
+        with self.assertRaises(CancelledError):
+            await cancelado
+
+        self.assertEqual(await lanzador, InfoAudio(None, 3.0, True))
+        self.assertEqual(await otro, InfoAudio(None, 3.0, True))
+        self.assertEqual(sondeo.lanzados, 1)
+
@@ -0,0 +1,112 @@
+"""
+Módulo para tests de la clase 'DescargaStreaming'.
+"""
+
+from asyncio import Event, sleep, to_thread
+from unittest import IsolatedAsyncioTestCase
+
+from src.main.audio.streaming import *
+
+
+class ContenidoFalso:
+    """
+    Cuerpo de respuesta de mentira, que entrega bloques fijos.
+    """
+
+    def __init__(self, bloques: list[bytes], trabar: Event) -> None:
+        self.bloques = bloques
+        self.trabar = trabar
+        self.entregados = 0
+
+
+    async def iter_chunked(self, _tamanio: int):
+        for bloque in self.bloques:
+            self.entregados += 1
+            yield bloque
+
+        # Simula una conexión que nunca termina
+        await self.trabar.wait()
+
+
+class RespuestaFalsa:
+    """
+    Respuesta HTTP de mentira.
+    """
+
+    def __init__(self, contenido: ContenidoFalso) -> None:
+        self.content = contenido
+        self.content_length = None
+
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+    async def __aenter__(self) -> "RespuestaFalsa":
+        return self
+
+
+    async def __aexit__(self, *_args) -> None:
+        pass
+
+
+class SesionFalsa:
+    """
+    Sesión HTTP de mentira, que siempre devuelve el mismo contenido.
+    """
+
+    def __init__(self, contenido: ContenidoFalso) -> None:
+        self.contenido = contenido
+
+
+    def get(self, _url: str) -> RespuestaFalsa:
+        return RespuestaFalsa(self.contenido)
+
+
+class TestDescargaStreaming(IsolatedAsyncioTestCase):
+    """
+    Tests para la descarga por streaming.
+    """
+
+    async def test_1_buffer_acotado(self) -> None:
+        """
+        Si nadie consume, la descarga no llena más que el buffer.
+        """
+
+        contenido = ContenidoFalso([b"x"] * 10, Event())
+        descarga = DescargaStreaming(SesionFalsa(contenido), "url", max_bloques=3)
+        descarga.iniciar()
+
+        await sleep(0.1)
+
+        self.assertLessEqual(contenido.entregados, 4)
+        descarga.cancelar()
+
+
+    async def test_2_cancelar_corta_el_iterador(self) -> None:
+        """
+        Al cancelar la descarga, quien itera deja de esperar bloques.
+        """
+
+        contenido = ContenidoFalso([b"a", b"b"], Event())
+        descarga = DescargaStreaming(SesionFalsa(contenido), "url")
+        descarga.iniciar()
+
+        await sleep(0.05)
+        descarga.cancelar()
+
+        self.assertEqual(await to_thread(lambda: b"".join(descarga)), b"ab")
+
+
+    async def test_3_corta_al_superar_el_maximo(self) -> None:
+        """
+        Aunque no se sepa de antemano cuánto pesa, la descarga se corta
+        al superar el tamaño máximo.
+        """
+
+        contenido = ContenidoFalso([b"x" * 4] * 10, Event())
+        descarga = DescargaStreaming(SesionFalsa(contenido), "url", tamanio_maximo=10)
+        descarga.iniciar()
+
+        self.assertEqual(await to_thread(lambda: b"".join(descarga)), b"x" * 8)
+        self.assertEqual(contenido.entregados, 3)
@@ -0,0 +1,131 @@
+"""
+Módulo para tests de la transcodificación de sonidos subidos.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from subprocess import CalledProcessError
+from tempfile import TemporaryDirectory
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from src.main.audio import cache_opus, transcodificacion
+from src.main.audio.transcodificacion import *
+
+
+class TestTranscodificacion(IsolatedAsyncioTestCase):
+    """
+    Tests para el transcodificador de sonidos subidos.
+    """
+
+    def setUp(self) -> None:
+        """
+        Arma una carpeta temporal y anota los sonidos que se registran
+        en vez de guardarlos en la DB.
+        """
+
+        self.dir_temp = TemporaryDirectory()
+        self.raiz = Path(self.dir_temp.name)
+        self.registrados: list[tuple[str, str, int]] = []
+
+        parche = patch.object(transcodificacion,
+                              "registrar_sonido",
+                              lambda *args: self.registrados.append(args))
+        parche.start()
+        self.addCleanup(parche.stop)
+
+
+    def tearDown(self) -> None:
+        """
+        Borra los archivos creados.
+        """
+
+        self.dir_temp.cleanup()
+
+
+    def transcodificador(self) -> TranscodificadorSonidos:
+        """
+        Crea un transcodificador que trabaja en hilos, para que los
+        reemplazos de los tests lleguen a los trabajadores.
+        """
+
+        pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(pool.shutdown)
+
+        return TranscodificadorSonidos(self.raiz / "opus", pool=pool)
+
+
+    def test_1_ruta_destino(self) -> None:
+        """
+        Cada sonido tiene un destino propio, aunque se llame igual
+        que otro en otra carpeta.
+        """
+
+        transcodificador = TranscodificadorSonidos(self.raiz / "opus")
+        destino = transcodificador.ruta_destino("sonidos/a/hola.mp3")
+
+        self.assertEqual(destino.parent, self.raiz / "opus")
+        self.assertTrue(destino.name.startswith("hola_"))
+        self.assertEqual(destino.suffix, ".ogg")
+        self.assertEqual(transcodificador.ruta_destino("sonidos/a/hola.mp3"), destino)
+        self.assertNotEqual(transcodificador.ruta_destino("sonidos/b/hola.mp3"), destino)
+
+
+    def test_2_argumentos_ffmpeg(self) -> None:
+        """
+        Se transcodifica a Opus con el filtro pedido, escribiendo en un
+        temporal que recién al final se mueve a su lugar.
+        """
+
+        llamadas = []
+
+        def ffmpeg_falso(args, **kwargs) -> None:
+            llamadas.append(args)
+            Path(args[-1]).write_bytes(b"ogg")
+
+        destino = self.raiz / "opus" / "hola.ogg"
+
+        with patch.object(cache_opus, "run", ffmpeg_falso):
+            cache_opus.transcodificar_a_opus("hola.mp3", destino, FILTRO_NORMALIZACION)
+
+        args = llamadas[0]
+        self.assertEqual(args[args.index("-i") + 1], "hola.mp3")
+        self.assertEqual(args[args.index("-af") + 1], FILTRO_NORMALIZACION)
+        self.assertEqual(args[args.index("-c:a") + 1], "libopus")
+        self.assertEqual(args[-1], f"{destino}.tmp")
+        self.assertEqual(destino.read_bytes(), b"ogg")
+        self.assertFalse(Path(f"{destino}.tmp").exists())
+
+
+    async def test_3_registra_al_terminar(self) -> None:
+        """
+        Un sonido transcodificado se registra en la DB con su usuario.
+        """
+
+        def transcodificar(ruta_origen, ruta_destino, filtros) -> None:
+            Path(ruta_destino).parent.mkdir(parents=True, exist_ok=True)
+            Path(ruta_destino).write_bytes(b"ogg")
+
+        transcodificador = self.transcodificador()
+
+        with patch.object(transcodificacion, "transcodificar_a_opus", transcodificar):
+            destino = await transcodificador.en_segundo_plano("sonidos/hola.mp3", 7)
+
+        self.assertEqual(destino, transcodificador.ruta_destino("sonidos/hola.mp3"))
+        self.assertEqual(self.registrados, [("sonidos/hola.mp3", destino.as_posix(), 7)])
+
+
+    async def test_4_no_registra_si_falla(self) -> None:
+        """
+        Si FFmpeg falla, no se registra nada.
+        """
+
+        def transcodificar(ruta_origen, ruta_destino, filtros) -> None:
+            raise CalledProcessError(1, "ffmpeg")
+
+        transcodificador = self.transcodificador()
+
+        with patch.object(transcodificacion, "transcodificar_a_opus", transcodificar):
+            self.assertIsNone(await transcodificador.procesar("sonidos/roto.mp3", 7))
+
+        self.assertEqual(self.registrados, [])
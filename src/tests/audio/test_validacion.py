@@ -0,0 +1,76 @@
+"""
+Módulo para tests de la validación de audios.
+"""
+
+from unittest import TestCase
+
+from src.main.audio.sondeo import InfoAudio
+from src.main.audio.validacion import *
+from src.main.enums import RestriccionesSonido
+
+
+class TestValidacion(TestCase):
+    """
+    Tests para las restricciones de los audios.
+    """
+
+    @staticmethod
+    def restricciones(resultado: Restricciones) -> list[RestriccionesSonido]:
+        """
+        Se queda con las restricciones, sin los mensajes.
+        """
+
+        return [restr for restr, _ in resultado]
+
+
+    def test_1_tamanio(self) -> None:
+        """
+        El tamaño se compara contra el máximo, incluido.
+        """
+
+        self.assertEqual(analizar_tamanio_audio(TAMANIO_MAXIMO_AUDIO), [])
+        self.assertEqual(self.restricciones(analizar_tamanio_audio(TAMANIO_MAXIMO_AUDIO + 1)),
+                         [RestriccionesSonido.MUY_PESADO])
+        self.assertEqual(self.restricciones(analizar_tamanio_audio(11, tamanio_maximo=10)),
+                         [RestriccionesSonido.MUY_PESADO])
+
+
+    def test_2_restricciones(self) -> None:
+        """
+        Los audios muy pesados se rechazan sin mirar lo demás.
+        """
+
+        pesado = analizar_info_audio(InfoAudio(TAMANIO_MAXIMO_AUDIO + 1, None, False))
+        largo = analizar_info_audio(InfoAudio(1, DURACION_MAXIMA_AUDIO + 1, True))
+        roto = analizar_info_audio(InfoAudio(1, None, False))
+
+        self.assertEqual(self.restricciones(pesado), [RestriccionesSonido.MUY_PESADO])
+        self.assertEqual(self.restricciones(largo), [RestriccionesSonido.DEMASIADO_LARGO])
+        self.assertEqual(self.restricciones(roto), [RestriccionesSonido.NO_ES_AUDIO])
+        self.assertEqual(analizar_info_audio(InfoAudio(1, 2.0, True)), [])
+
+
+    def test_3_datos_desconocidos(self) -> None:
+        """
+        Si no se sabe el tamaño o la duración, no se rechaza por eso.
+        """
+
+        self.assertEqual(analizar_info_audio(InfoAudio(None, None, True)), [])
+        self.assertEqual(self.restricciones(analizar_info_audio(InfoAudio(None, None, False))),
+                         [RestriccionesSonido.NO_ES_AUDIO])
+
+
+    def test_4_limites_de_reproduccion(self) -> None:
+        """
+        Con los límites de reproducción se aceptan audios que no se
+        podrían guardar.
+        """
+
+        info = InfoAudio(TAMANIO_MAXIMO_AUDIO * 2, DURACION_MAXIMA_AUDIO * 10, True)
+
+        self.assertEqual(self.restricciones(analizar_info_audio(info)),
+                         [RestriccionesSonido.MUY_PESADO])
+        self.assertEqual(analizar_info_audio(info,
+                                             tamanio_maximo=TAMANIO_MAXIMO_REPRODUCCION,
+                                             duracion_maxima=DURACION_MAXIMA_REPRODUCCION),
+                         [])
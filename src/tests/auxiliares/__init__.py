@@ -0,0 +1,8 @@
+"""
+Pruebas de auxiliares.
+"""
+
+from .test_indice_nombres import *
+from .test_medicion_carga import *
+from .test_presupuesto_latencia import *
+from .test_planificador import *
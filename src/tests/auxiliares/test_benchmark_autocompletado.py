@@ -0,0 +1,144 @@
+"""
+Módulo para medir los autocompletados contra guilds sintéticos.
+
+Usa pytest-benchmark, que está en 'requirements-dev.txt', así que sólo
+corre con pytest y si está instalado:
+
+    python -m pip install -r requirements-dev.txt
+    python -m pytest src/tests/auxiliares/test_benchmark_autocompletado.py
+
+No se registra en el '__init__' del paquete para que unittest lo ignore.
+"""
+
+from asyncio import new_event_loop
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# pylint: disable=wrong-import-position
+from discord import ChannelType
+
+from src.main.archivos import IndiceArchivos
+from src.main.auxiliares import IndicesGuilds, autocompletado
+from src.main.db import database, insertar_datos_en_tabla, transaccion
+
+TAMANIOS: tuple[int, ...] = (10, 1_000, 100_000)
+CONSULTAS: tuple[str, ...] = ("", "us", "usuario_42")
+
+
+def guild_sintetico(tamanio: int) -> SimpleNamespace:
+    """
+    Arma un guild con 'tamanio' miembros y canales.
+    """
+
+    miembros = [SimpleNamespace(id=num,
+                                name=f"usuario_{num}",
+                                nick=(f"apodo {num}" if num % 3 == 0 else None),
+                                display_name=f"usuario_{num}")
+                for num in range(tamanio)]
+    canales = [SimpleNamespace(id=num,
+                               name=f"canal-{num}",
+                               type=(ChannelType.voice if num % 2 else ChannelType.text))
+               for num in range(tamanio)]
+
+    return SimpleNamespace(id=tamanio, members=miembros, channels=canales)
+
+
+def indice_sintetico(tamanio: int) -> IndiceArchivos:
+    """
+    Arma un índice de 'tamanio' sonidos, sin tocar el disco.
+    """
+
+    indice = IndiceArchivos("sounds")
+
+    for num in range(tamanio):
+        carpeta = f"bienvenida/{num % 100}" if num % 2 else "varios"
+        indice.agregar(f"sounds/{carpeta}/usuario_{num}.mp3")
+
+    return indice
+
+
+def llenar_db(guild: SimpleNamespace, tamanio: int) -> None:
+    """
+    Llena las tablas que consultan los autocompletados con 'tamanio'
+    filas cada una.
+
+    Inserta directamente, sin los chequeos de repetidos de los atajos,
+    que con tablas grandes tardarían mucho más que las mediciones.
+    """
+
+    with transaccion():
+        for num in range(tamanio):
+            insertar_datos_en_tabla(tabla="canales_escuchables",
+                                    llave_primaria_por_defecto=False,
+                                    valores=(num, guild.id, f"canal-{num}"))
+            insertar_datos_en_tabla(tabla="carpetas_recomendadas",
+                                    valores=(f"usuario_{num}", "usuario", num))
+            insertar_datos_en_tabla(tabla="usuarios_autorizados",
+                                    llave_primaria_por_defecto=False,
+                                    valores=(num, f"usuario_{num}", num % 10000))
+
+
+@pytest.fixture(scope="module", params=TAMANIOS, ids=lambda tamanio: f"{tamanio}")
+def interaccion(request) -> SimpleNamespace:
+    """
+    Interacción de mentira, con un guild y un índice de sonidos sintéticos
+    del tamaño dado, y con una DB temporal con tablas del mismo tamaño.
+    """
+
+    tamanio = request.param
+    guild = guild_sintetico(tamanio)
+    cliente = SimpleNamespace(indices_nombres=IndicesGuilds(),
+                              indice_sonidos=indice_sintetico(tamanio))
+
+    # Los índices se arman antes de medir, como pasaría en el bot
+    cliente.indices_nombres.miembros(guild)
+    cliente.indices_nombres.canales(guild)
+
+    with TemporaryDirectory() as carpeta:
+        ruta_db = (Path(carpeta) / "db.sqlite3").as_posix()
+        database.crear_nueva_db(ruta_db)
+
+        with patch.object(database, "DEFAULT_DB", ruta_db):
+            llenar_db(guild, tamanio)
+
+            yield SimpleNamespace(guild=guild,
+                                  guild_id=guild.id,
+                                  user=SimpleNamespace(id=1),
+                                  client=cliente)
+
+
+@pytest.fixture(scope="module")
+def loop():
+    """
+    Loop de eventos compartido por todas las mediciones.
+    """
+
+    loop_eventos = new_event_loop()
+    yield loop_eventos
+    loop_eventos.close()
+
+
+@pytest.mark.parametrize("consulta", CONSULTAS)
+@pytest.mark.parametrize("handler", (autocompletado.autocompletado_todos_canales,
+                                     autocompletado.autocompletado_canales_voz,
+                                     autocompletado.autocompletado_canales_escuchados,
+                                     autocompletado.autocompletado_recomendaciones_carpetas,
+                                     autocompletado.autocompletado_miembros_guild,
+                                     autocompletado.autocompletado_usuarios_autorizados,
+                                     autocompletado.autocompletado_archivos_audio,
+                                     autocompletado.autocompletado_sonidos_usuario),
+                         ids=lambda handler: handler.__name__)
+def test_autocompletado(benchmark, loop, interaccion, handler, consulta) -> None:
+    """
+    Mide un autocompletado con una consulta dada.
+    """
+
+    sugerencias = benchmark(lambda: loop.run_until_complete(handler(interaccion, consulta)))
+
+    assert len(sugerencias) <= 25
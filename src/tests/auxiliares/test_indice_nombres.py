@@ -0,0 +1,132 @@
+"""
+Módulo para tests del índice de nombres.
+"""
+
+import unittest
+from types import SimpleNamespace
+
+from src.main.auxiliares.indice_nombres import *
+
+
+class TestIndiceNombres(unittest.TestCase):
+    """
+    Tests para el índice de nombres de autocompletado.
+    """
+
+    def setUp(self) -> None:
+        """
+        Arma un índice con algunos nombres.
+        """
+
+        self.indice = IndiceNombres()
+
+        for id_entrada, nombre, apodo in ((1, "Bonshot", None),
+                                          (2, "Shot", "El Bonsái"),
+                                          (3, "Ramón", "Monchi"),
+                                          (4, "bon", None)):
+            self.indice.agregar(id_entrada, apodo or nombre, (nombre, apodo))
+
+
+    def ids(self, consulta: str, **kwargs) -> list[int]:
+        """
+        Busca y devuelve sólo los ids encontrados.
+        """
+
+        return [entrada.id for entrada in self.indice.buscar(consulta, **kwargs)]
+
+
+    def test_1_ranking(self) -> None:
+        """
+        Primero lo exacto, después los que empiezan igual, después
+        las palabras que empiezan igual y al final lo que contiene.
+        """
+
+        self.assertEqual(self.ids("bon"), [4, 1, 2])
+        self.assertEqual(self.ids("shot"), [2, 1])
+
+
+    def test_2_normaliza_tildes(self) -> None:
+        """
+        Las búsquedas ignoran mayúsculas y tildes.
+        """
+
+        self.assertEqual(self.ids("BONSAI"), [2])
+        self.assertEqual(self.ids("ramon"), [3])
+        self.assertEqual(self.ids("mo"), [3])
+
+
+    def test_3_limite_y_filtro(self) -> None:
+        """
+        Se respeta el límite y el filtro, también sin consulta.
+        """
+
+        self.assertEqual(len(self.ids("", limite=2)), 2)
+        self.assertEqual(self.ids("bo", filtro=lambda entrada: entrada.id != 4), [1, 2])
+
+
+    def test_4_quitar_y_reemplazar(self) -> None:
+        """
+        Las entradas quitadas o renombradas no dejan rastros.
+        """
+
+        self.indice.agregar(4, "Zeta", ("Zeta",))
+        self.assertTrue(self.indice.quitar(1))
+
+        self.assertEqual(self.ids("bon"), [2])
+        self.assertEqual(self.ids("zet"), [4])
+        self.assertEqual(len(self.indice), 3)
+
+
+    def test_5_subcadenas_cortas(self) -> None:
+        """
+        Las consultas de uno o dos caracteres también encuentran lo que
+        los contiene en el medio, después de los inicios de palabras.
+        """
+
+        self.indice.agregar(5, "Fernando", ("Fernando",))
+        self.indice.agregar(6, "Carlos", ("Carlos",))
+
+        self.assertEqual(self.ids("er"), [5])
+        self.assertEqual(self.ids("lo"), [6])
+        self.assertEqual(self.ids("m"), [3])
+        self.assertEqual(self.ids("o"), [4, 6, 3, 1, 5, 2])
+
+
+    def test_6_corta_con_los_inicios(self) -> None:
+        """
+        Si los inicios de palabras llenan el límite, no se recorren las
+        entradas que sólo contienen la consulta.
+        """
+
+        for numero in range(100):
+            self.indice.agregar(100 + numero, f"zeta {numero}", (f"zeta {numero}",))
+            self.indice.agregar(300 + numero, f"aze {numero}", (f"aze {numero}",))
+
+        filtradas = []
+        self.ids("z", limite=5, filtro=lambda entrada: filtradas.append(entrada.id) or True)
+
+        self.assertTrue(all(id_entrada < 300 for id_entrada in filtradas))
+
+
+class TestIndicesGuilds(unittest.IsolatedAsyncioTestCase):
+    """
+    Tests para los índices de cada guild.
+    """
+
+    async def test_1_preparar_de_antemano(self) -> None:
+        """
+        Los índices se arman por adelantado, sin perder a quien se
+        haya ido mientras tanto.
+        """
+
+        miembros = [SimpleNamespace(id=numero, name=f"usuario_{numero}", nick=None,
+                                    display_name=f"usuario_{numero}")
+                    for numero in range(2500)]
+        presentes = {miembro.id: miembro for miembro in miembros[1:]}
+        guild = SimpleNamespace(id=1, members=miembros, channels=[], get_member=presentes.get)
+
+        indices = IndicesGuilds()
+        await indices.preparar(guild)
+
+        self.assertEqual(len(indices.miembros(guild)), 2499)
+        self.assertNotIn(0, indices.miembros(guild))
@@ -0,0 +1,43 @@
+"""
+Módulo para tests de la medición de carga de los cogs.
+"""
+
+from asyncio import create_task, sleep
+from unittest import IsolatedAsyncioTestCase
+
+from src.main.auxiliares.medicion_carga import *
+
+
+class TestMedicionCarga(IsolatedAsyncioTestCase):
+    """
+    Tests para las marcas de inicio del setup de los cogs.
+    """
+
+    async def test_1_marca_por_tarea(self) -> None:
+        """
+        Cada tarea anota sólo su propia marca, y sólo la primera vez.
+        """
+
+        async def cargar(demora: float) -> list:
+            marca = medir_carga()
+            await sleep(demora)
+            marcar_inicio_setup()
+            primera = marca[0]
+            marcar_inicio_setup()
+            return [primera, marca[0]]
+
+        lenta = create_task(cargar(0.02))
+        rapida = create_task(cargar(0.0))
+
+        (lenta_1, lenta_2), (rapida_1, rapida_2) = await lenta, await rapida
+
+        self.assertEqual((lenta_1, rapida_1), (lenta_2, rapida_2))
+        self.assertLess(rapida_1, lenta_1)
+
+
+    def test_2_sin_medicion_no_hace_nada(self) -> None:
+        """
+        Fuera de una carga medida, marcar no falla.
+        """
+
+        marcar_inicio_setup()
@@ -0,0 +1,182 @@
+"""
+Módulo para tests del planificador de tareas.
+"""
+
+from asyncio import Event, create_task, sleep, wait_for
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from src.main.auxiliares.planificador import *
+from src.main.db.atajos import get_ejecuciones_tarea, registrar_ejecucion_tarea
+
+from ..db.db_temporal import DBTemporal
+
+
+class TestProgramaciones(TestCase):
+    """
+    Tests para los intervalos y las expresiones de cron.
+    """
+
+    def test_1_intervalos(self) -> None:
+        """
+        Un intervalo cuenta desde la última ejecución, y si ya se pasó
+        la hora, toca ahora.
+        """
+
+        programacion = parsear_programacion("24h")
+        ahora = datetime(2024, 5, 10, 12, 0)
+
+        self.assertIsInstance(programacion, Intervalo)
+        self.assertEqual(str(programacion), "cada 24h")
+        self.assertEqual(programacion.siguiente(ahora), ahora)
+        self.assertEqual(programacion.siguiente(ahora, datetime(2024, 5, 10, 3, 0)),
+                         datetime(2024, 5, 11, 3, 0))
+        self.assertEqual(programacion.siguiente(ahora, datetime(2024, 5, 1)), ahora)
+
+
+    def test_2_cron(self) -> None:
+        """
+        Las expresiones de cron caen en el próximo minuto que coincide.
+        """
+
+        ahora = datetime(2024, 5, 10, 12, 0) # viernes
+
+        for expresion, esperada in (("0 5 * * *", datetime(2024, 5, 11, 5, 0)),
+                                    ("*/15 * * * *", datetime(2024, 5, 10, 12, 15)),
+                                    ("30 3 * * 0", datetime(2024, 5, 12, 3, 30)),
+                                    ("0 0 1 1-3 *", datetime(2025, 1, 1, 0, 0)),
+                                    ("0 0 29 2 *", datetime(2028, 2, 29, 0, 0)),
+                                    # con los dos días restringidos alcanza con uno
+                                    ("0 0 20 * 1", datetime(2024, 5, 13, 0, 0))):
+            with self.subTest(expresion=expresion):
+                self.assertEqual(parsear_programacion(expresion).siguiente(ahora), esperada)
+
+
+    def test_3_expresiones_invalidas(self) -> None:
+        """
+        Las programaciones mal escritas o imposibles levantan 'ValueError'.
+        """
+
+        for texto in ("", "24", "0 5 * *", "60 * * * *", "* * * * 8", "*/0 * * * *", "5-1 * * * *"):
+            with self.subTest(texto=texto):
+                with self.assertRaises(ValueError):
+                    parsear_programacion(texto)
+
+        with self.assertRaises(ValueError):
+            Cron("0 0 31 2 *").siguiente(datetime(2024, 1, 1))
+
+
+class TestPlanificador(DBTemporal, IsolatedAsyncioTestCase):
+    """
+    Tests para el planificador, sobre una DB nueva.
+    """
+
+    def setUp(self) -> None:
+        """
+        Crea un planificador sobre la DB temporal.
+        """
+
+        super().setUp()
+        self.planificador = Planificador()
+        self.addCleanup(self.planificador.cerrar)
+
+
+    async def test_1_historial(self) -> None:
+        """
+        Cada ejecución queda anotada, con su detalle o su error.
+        """
+
+        def falla() -> None:
+            raise OSError("sin espacio")
+
+        self.planificador.agregar(TareaProgramada("anda", lambda: 42, Intervalo(60)))
+        self.planificador.agregar(TareaProgramada("falla", falla, Intervalo(60)))
+
+        ejecucion = await self.planificador.ejecutar("anda")
+        await self.planificador.ejecutar("falla")
+
+        self.assertEqual((ejecucion.estado, ejecucion.detalle), (ESTADO_OK, "42"))
+        self.assertEqual([fila[2:] for fila in get_ejecuciones_tarea("anda")], [(ESTADO_OK, "42")])
+        self.assertEqual([fila[2:] for fila in get_ejecuciones_tarea("falla")],
+                         [(ESTADO_ERROR, "OSError('sin espacio')")])
+
+
+    async def test_2_sin_superposicion(self) -> None:
+        """
+        Si la tarea todavía está corriendo, no se vuelve a correr.
+        """
+
+        liberar = Event()
+        corridas = []
+
+        async def lenta() -> None:
+            corridas.append(1)
+            await liberar.wait()
+
+        self.planificador.agregar(TareaProgramada("lenta", lenta, Intervalo(60)))
+        primera = create_task(self.planificador.ejecutar("lenta"))
+        await sleep(0)
+
+        self.assertIsNone(await self.planificador.ejecutar("lenta"))
+        liberar.set()
+        self.assertIsNotNone(await primera)
+        self.assertEqual(len(corridas), 1)
+
+
+    async def test_3_retoma_el_historial(self) -> None:
+        """
+        Al arrancar, una tarea con intervalo espera desde su última
+        ejecución anotada, en vez de correr de nuevo.
+        """
+
+        registrar_ejecucion_tarea("diaria", datetime.now().isoformat(timespec="seconds"),
+                                  1.5, ESTADO_OK, "")
+        corridas = []
+        tarea = TareaProgramada("diaria", lambda: corridas.append(1), parsear_programacion("1d"))
+
+        self.planificador.agregar(tarea)
+        self.planificador.iniciar()
+        await sleep(0.1)
+
+        self.assertEqual(corridas, [])
+        self.assertEqual(tarea.ultima.duracion, 1.5)
+        self.assertGreater((tarea.proxima - datetime.now()).total_seconds(), 86000)
+
+
+    async def test_4_historial_acotado(self) -> None:
+        """
+        Sólo se conservan las últimas ejecuciones de cada tarea.
+        """
+
+        registrar_ejecucion_tarea("otra", "2024-01-01T00:00:00", 0.0, ESTADO_OK, "otra")
+
+        for numero in range(5):
+            registrar_ejecucion_tarea("tarea", f"2024-01-0{numero + 1}T00:00:00",
+                                      0.0, ESTADO_OK, str(numero), conservar=3)
+
+        self.assertEqual([detalle for *_, detalle in get_ejecuciones_tarea("tarea")],
+                         ["4", "3", "2"])
+        self.assertEqual([detalle for *_, detalle in get_ejecuciones_tarea("otra")], ["otra"])
+
+
+    async def test_5_historial_roto(self) -> None:
+        """
+        Si el historial no se puede leer, se avisa y la tarea corre
+        igual, como si nunca hubiera corrido.
+        """
+
+        registrar_ejecucion_tarea("rota", "ayer", 1.0, ESTADO_OK, "")
+        errores = []
+        corrio = Event()
+
+        async def tarea() -> None:
+            corrio.set()
+
+        self.planificador.log = SimpleNamespace(error=errores.append, info=lambda _: None)
+        self.planificador.agregar(TareaProgramada("rota", tarea, parsear_programacion("1d")))
+        self.planificador.iniciar()
+
+        await wait_for(corrio.wait(), 1)
+        self.assertEqual(len(errores), 1)
+        self.assertIn("historial", errores[0])
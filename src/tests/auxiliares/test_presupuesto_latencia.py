@@ -0,0 +1,96 @@
+"""
+Módulo para tests del presupuesto de latencia de los autocompletados.
+"""
+
+from asyncio import sleep
+from types import SimpleNamespace
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from discord.app_commands import Choice
+
+from src.main.auxiliares.presupuesto_latencia import *
+
+
+def interaccion_falsa(id_guild: int=1, id_usuario: int=2) -> SimpleNamespace:
+    """
+    Arma una interacción de mentira, con sólo lo que se usa.
+    """
+
+    return SimpleNamespace(guild_id=id_guild, user=SimpleNamespace(id=id_usuario))
+
+
+class TestHistogramaLatencias(TestCase):
+    """
+    Tests para el histograma de latencias.
+    """
+
+    def test_1_percentiles(self) -> None:
+        """
+        Los percentiles caen en el límite de su cubeta.
+        """
+
+        histograma = HistogramaLatencias(limites=(0.01, 0.1, 1.0))
+
+        for segundos in (0.005,) * 90 + (0.05,) * 9 + (2.0,):
+            histograma.registrar(segundos, excedido=(segundos > 1.0))
+
+        resumen = histograma.resumen()
+
+        self.assertEqual(histograma.cubetas, [90, 9, 0, 1])
+        self.assertEqual(resumen["llamadas"], 100)
+        self.assertEqual(resumen["p50"], 0.01)
+        self.assertEqual(resumen["p95"], 0.1)
+        self.assertEqual(resumen["maximo"], 2.0)
+        self.assertEqual(resumen["excedidos"], 1)
+
+
+class TestPresupuestoLatencia(IsolatedAsyncioTestCase):
+    """
+    Tests para el decorador de presupuesto de latencia.
+    """
+
+    async def test_1_dentro_del_presupuesto(self) -> None:
+        """
+        Si termina a tiempo, devuelve lo calculado y lo registra.
+        """
+
+        @presupuesto_latencia(1.0, nombre="test_rapido")
+        async def rapido(_interaccion, current: str) -> list[Choice[str]]:
+            return [Choice(name=current, value=current)]
+
+        sugerencias = await rapido(interaccion_falsa(), "hola")
+
+        self.assertEqual([sug.name for sug in sugerencias], ["hola"])
+        self.assertEqual(HISTOGRAMAS["test_rapido"].cantidad, 1)
+        self.assertEqual(HISTOGRAMAS["test_rapido"].excedidos, 0)
+
+
+    async def test_2_excedido_usa_lo_cacheado(self) -> None:
+        """
+        Si se pasa del presupuesto, contesta con lo último sugerido para
+        una búsqueda que empiece igual, filtrado por la consulta actual.
+        """
+
+        demora = 0.0
+
+        @presupuesto_latencia(0.05, nombre="test_lento")
+        async def lento(_interaccion, _current: str) -> list[Choice[str]]:
+            await sleep(demora)
+            return [Choice(name=nombre, value=nombre) for nombre in ("bonshot", "bonsai", "ramon")]
+
+        interaccion = interaccion_falsa()
+        await lento(interaccion, "")
+        await sleep(0)
+
+        demora = 0.2
+        parciales = await lento(interaccion, "bons")
+
+        self.assertEqual([sug.name for sug in parciales], ["bonshot", "bonsai"])
+        self.assertEqual(HISTOGRAMAS["test_lento"].excedidos, 1)
+        self.assertEqual(await lento(interaccion_falsa(id_guild=3), "bons"), [])
+
+        # El cálculo sigue, y queda guardado para la próxima
+        await sleep(0.3)
+        demora = 1.0
+        completas = await lento(interaccion, "bons")
+        self.assertEqual(len(completas), 3)
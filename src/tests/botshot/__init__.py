@@ -0,0 +1,5 @@
+"""
+Pruebas del bot.
+"""
+
+from .test_cargador_cogs import *
@@ -0,0 +1,136 @@
+"""
+Módulo para tests del descubrimiento y la carga de cogs.
+"""
+
+from os import utime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from discord.app_commands import command as appcommand
+
+from src.main.botshot import cargador_cogs
+from src.main.botshot.cargador_cogs import *
+
+
+@appcommand(name="suma", description="Suma.")
+async def suma(_interaccion, x: int, y: int) -> None:
+    """
+    Comando de barra de prueba.
+    """
+
+
+@appcommand(name="resta", description="Resta.")
+async def resta(_interaccion, x: int, y: int) -> None:
+    """
+    Otro comando de barra de prueba.
+    """
+
+
+def cog_falso(*comandos) -> SimpleNamespace:
+    """
+    Arma un cog de mentira, con sólo lo que se usa.
+    """
+
+    return SimpleNamespace(get_app_commands=lambda: list(comandos),
+                           get_commands=lambda: [SimpleNamespace(name="texto", aliases=["txt"])])
+
+
+class TestCargadorCogs(TestCase):
+    """
+    Tests para el caché de cogs.
+    """
+
+    def setUp(self) -> None:
+        """
+        Arma una carpeta de cogs de mentira.
+        """
+
+        self.dir_temp = TemporaryDirectory()
+        self.raiz = Path(self.dir_temp.name) / "cogs"
+        (self.raiz / "comandos").mkdir(parents=True)
+
+        (self.raiz / "__init__.py").write_text("")
+        (self.raiz / "cog_abc.py").write_text("")
+        (self.raiz / "comandos" / "normal.py").write_text("ALGO = 1\n")
+        (self.raiz / "comandos" / "lento.py").write_text("CARGA_DIFERIDA: bool = True\n")
+
+        self.ruta_cache = Path(self.dir_temp.name) / "cache" / "cogs.json"
+        self.raiz_str = self.raiz.as_posix()
+
+
+    def tearDown(self) -> None:
+        """
+        Borra la carpeta temporal.
+        """
+
+        self.dir_temp.cleanup()
+
+
+    def _extension(self, nombre: str) -> str:
+        """
+        Devuelve el nombre de extensión de un cog de la carpeta.
+        """
+
+        return f"{self.raiz_str}/comandos/{nombre}".replace("/", ".")
+
+
+    def test_1_descubre_y_detecta_diferidos(self) -> None:
+        """
+        Se encuentran los cogs (sin los '__init__' ni los '_abc'), y se
+        sabe cuáles son diferidos sin importarlos.
+        """
+
+        cogs = {info.extension: info for info in CacheCogs(self.raiz, self.ruta_cache).descubrir()}
+
+        self.assertEqual(set(cogs), {self._extension("normal"), self._extension("lento")})
+        self.assertFalse(cogs[self._extension("normal")].diferido)
+        self.assertTrue(cogs[self._extension("lento")].diferido)
+        self.assertFalse(declara_carga_diferida(self.raiz / "cog_abc.py"))
+
+
+    def test_2_reusa_el_cache(self) -> None:
+        """
+        Lo anotado se reusa sin volver a leer los archivos, salvo los
+        que cambiaron.
+        """
+
+        cache = CacheCogs(self.raiz, self.ruta_cache)
+        cache.descubrir()
+        cache.anotar(self._extension("lento"), [cog_falso(suma)])
+        cache.anotar(self._extension("normal"), [cog_falso(resta)])
+        cache.guardar()
+
+        with patch.object(cargador_cogs, "declara_carga_diferida") as declara:
+            cogs = {info.extension: info for info in CacheCogs(self.raiz, self.ruta_cache).descubrir()}
+            declara.assert_not_called()
+
+        self.assertEqual(cogs[self._extension("lento")].comandos, ("suma", "texto", "txt"))
+
+        utime(self.raiz / "comandos" / "lento.py", ns=(0, 10**9))
+        cogs = {info.extension: info for info in CacheCogs(self.raiz, self.ruta_cache).descubrir()}
+
+        self.assertIsNone(cogs[self._extension("lento")].hash_arbol)
+        self.assertIsNotNone(cogs[self._extension("normal")].hash_arbol)
+
+
+    def test_3_hash_del_arbol(self) -> None:
+        """
+        El hash del árbol sólo cambia si cambian los comandos de barra.
+        """
+
+        cache = CacheCogs(self.raiz, self.ruta_cache)
+        cache.descubrir()
+        cache.anotar(self._extension("normal"), [cog_falso(suma, resta)])
+        original = cache.hash_arbol()
+
+        cache.anotar(self._extension("normal"), [cog_falso(resta, suma)])
+        self.assertEqual(cache.hash_arbol(), original)
+
+        cache.anotar(self._extension("normal"), [cog_falso(suma)])
+        self.assertNotEqual(cache.hash_arbol(), original)
+
+        cache.olvidar(self._extension("normal"))
+        self.assertIsNone(cache.cogs[self._extension("normal")].hash_arbol)
@@ -0,0 +1,7 @@
+"""
+Pruebas de la DB.
+"""
+
+from .test_database import *
+from .test_sacar_db import *
+from .test_mantenimiento import *
@@ -0,0 +1,42 @@
+"""
+Módulo con la base de los tests que usan una DB temporal.
+"""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from src.main.db import database
+
+
+class DBTemporal:
+    """
+    Mixin para casos de test que crea una DB nueva en una carpeta
+    temporal, y la usa en vez de la de BotShot mientras dura cada test.
+
+    Va antes del caso de test en las bases:
+
+    ```python
+    class TestAlgo(DBTemporal, TestCase):
+        ...
+    ```
+    """
+
+    def setUp(self) -> None:
+        """
+        Crea la DB temporal y la usa en vez de la de BotShot. Al
+        terminar el test vuelve a la de BotShot y borra la carpeta.
+        """
+
+        super().setUp()
+
+        self.dir_temp = TemporaryDirectory()
+        self.addCleanup(self.dir_temp.cleanup)
+
+        self.raiz = Path(self.dir_temp.name)
+        self.ruta_db = (self.raiz / "db.sqlite3").as_posix()
+        database.crear_nueva_db(self.ruta_db)
+
+        parche = patch.object(database, "DEFAULT_DB", self.ruta_db)
+        parche.start()
+        self.addCleanup(parche.stop)
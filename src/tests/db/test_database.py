@@ -0,0 +1,79 @@
+"""
+Módulo para tests de las transacciones de la DB.
+"""
+
+from unittest import TestCase
+
+from src.main.db import database
+from src.main.db.atajos import actualizar_guild, get_prefijo_guild
+
+from .db_temporal import DBTemporal
+
+
+class TestTransaccion(DBTemporal, TestCase):
+    """
+    Tests para agrupar operaciones en una transacción.
+    """
+
+    def setUp(self) -> None:
+        """
+        Agrega el prefijo por defecto a la DB temporal.
+        """
+
+        super().setUp()
+        database.insertar_datos_en_tabla("propiedades",
+                                         valores=("prefijo_default", "!"))
+
+
+    def guilds(self) -> list[tuple[int, str]]:
+        """
+        Devuelve los guilds guardados.
+        """
+
+        return database.sacar_datos_de_tabla("guilds", ordenar_por=("id",))
+
+
+    def test_1_confirma_todo_junto(self) -> None:
+        """
+        Las operaciones de adentro se ven entre sí, y quedan al salir.
+        """
+
+        with database.transaccion():
+            database.insertar_datos_en_tabla("guilds",
+                                             llave_primaria_por_defecto=False,
+                                             valores=(1, "uno"))
+            self.assertTrue(database.existe_dato_en_tabla("guilds", id=1))
+
+            with database.transaccion():
+                database.actualizar_dato_de_tabla("guilds", nombre_col="nombre", valor="it's", id=1)
+
+        self.assertEqual(self.guilds(), [(1, "it's")])
+
+
+    def test_2_deshace_todo_si_falla(self) -> None:
+        """
+        Si algo falla adentro, no queda nada de lo hecho.
+        """
+
+        with self.assertRaises(RuntimeError):
+            with database.transaccion():
+                database.insertar_datos_en_tabla("guilds",
+                                                 llave_primaria_por_defecto=False,
+                                                 valores=(1, "uno"))
+                raise RuntimeError("falla a mitad de camino")
+
+        self.assertEqual(self.guilds(), [])
+
+
+    def test_3_actualizar_guild(self) -> None:
+        """
+        Un guild nuevo queda con el prefijo por defecto, y al actualizarlo
+        no se tocan los demás.
+        """
+
+        self.assertFalse(actualizar_guild(1, "uno"))
+        self.assertFalse(actualizar_guild(2, "dos"))
+        self.assertTrue(actualizar_guild(1, "UNO"))
+
+        self.assertEqual(self.guilds(), [(1, "UNO"), (2, "dos")])
+        self.assertEqual(get_prefijo_guild(2), "!")
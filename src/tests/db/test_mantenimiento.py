@@ -0,0 +1,89 @@
+"""
+Módulo para tests del mantenimiento de la DB.
+"""
+
+from contextlib import closing
+from pathlib import Path
+from sqlite3 import connect
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from src.main.db import database
+from src.main.db.mantenimiento import *
+
+
+class TestMantenimiento(TestCase):
+    """
+    Tests para el mantenimiento, sobre una DB nueva con mucho borrado.
+    """
+
+    def setUp(self) -> None:
+        """
+        Crea una DB temporal, la llena y después borra casi todo.
+        """
+
+        self.dir_temp = TemporaryDirectory()
+        self.ruta_db = (Path(self.dir_temp.name) / "db.sqlite3").as_posix()
+        database.crear_nueva_db(self.ruta_db)
+
+        with closing(connect(self.ruta_db)) as con, con:
+            con.executemany("INSERT INTO carpetas_recomendadas VALUES (NULL, ?, 'alguien', 1);",
+                            ((f"carpeta_{numero}" * 20,) for numero in range(2000)))
+            con.execute("DELETE FROM carpetas_recomendadas WHERE id > 10;")
+
+
+    def tearDown(self) -> None:
+        """
+        Borra la DB temporal.
+        """
+
+        self.dir_temp.cleanup()
+
+
+    def test_1_devuelve_paginas_libres(self) -> None:
+        """
+        Con 'auto_vacuum' incremental puesto por las migraciones, las
+        páginas libres se devuelven y el archivo se achica.
+        """
+
+        info = mantener_db(self.ruta_db)
+
+        self.assertTrue(info.integra)
+        self.assertGreater(info.antes.paginas_libres, 0)
+        self.assertEqual(info.despues.paginas_libres, 0)
+        self.assertGreater(info.paginas_liberadas, 0)
+        self.assertLess(info.despues.tamanio, info.antes.tamanio)
+        self.assertIsNone(info.checkpoint)
+
+        with closing(connect(self.ruta_db)) as con:
+            self.assertTrue(con.execute("SELECT count(*) FROM sqlite_stat1;").fetchone()[0])
+
+
+    def test_2_vacuum_acotado(self) -> None:
+        """
+        Se puede pedir que sólo se devuelvan algunas páginas por vez.
+        """
+
+        info = mantener_db(self.ruta_db, paginas_vacuum=5)
+
+        self.assertEqual(info.paginas_liberadas, 5)
+        self.assertGreater(info.despues.paginas_libres, 0)
+
+
+    def test_3_checkpoint_con_wal(self) -> None:
+        """
+        Si la DB usa WAL, se vuelca y se trunca.
+        """
+
+        with closing(connect(self.ruta_db)) as con:
+            con.execute("PRAGMA journal_mode = WAL;")
+            con.execute("INSERT INTO guilds VALUES (1, 'guild');")
+            con.commit()
+
+            info = mantener_db(self.ruta_db)
+            # El WAL se borra recién al cerrarse la última conexión
+            tamanio_wal = Path(f"{self.ruta_db}-wal").stat().st_size
+
+        self.assertTrue(info.integra)
+        self.assertEqual(info.checkpoint[0], 0)
+        self.assertEqual(tamanio_wal, 0)
@@ -0,0 +1,140 @@
+"""
+Módulo para tests de los atajos que sacan datos de la DB.
+"""
+
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.main.db import database
+from src.main.db.atajos import (actualizar_canal_escuchado, borrar_sonido,
+                                get_canales_escuchados, get_sonido_opus,
+                                get_usuarios_autorizados, registrar_sonido,
+                                registrar_usuario_autorizado)
+
+from .db_temporal import DBTemporal
+
+
+class TestSacarDB(DBTemporal, TestCase):
+    """
+    Tests para los atajos de lectura, sobre una DB nueva.
+    """
+
+    def test_1_canales_agrupados_por_guild(self) -> None:
+        """
+        Los canales se agrupan por guild, en tuplas.
+        """
+
+        for id_canal, id_guild, nombre in ((1, 10, "general"),
+                                           (2, 10, "Gaming"),
+                                           (3, 20, "general"),
+                                           (4, 10, "100%_real")):
+            actualizar_canal_escuchado(id_canal, nombre, id_guild)
+
+        canales = get_canales_escuchados()
+
+        self.assertEqual(canales, {10: ((4, "100%_real"), (2, "Gaming"), (1, "general")),
+                                   20: ((3, "general"),)})
+
+
+    def test_2_canales_filtrados(self) -> None:
+        """
+        Se puede filtrar por guild y por prefijo del nombre, sin
+        distinguir mayúsculas y tomando los comodines literales.
+        """
+
+        for id_canal, id_guild, nombre in ((1, 10, "general"),
+                                           (2, 10, "Gaming"),
+                                           (3, 20, "general"),
+                                           (4, 10, "100%_real")):
+            actualizar_canal_escuchado(id_canal, nombre, id_guild)
+
+        self.assertEqual(get_canales_escuchados(id_guild=10, prefijo="GA"), {10: ((2, "Gaming"),)})
+        self.assertEqual(get_canales_escuchados(prefijo="gen"), {10: ((1, "general"),),
+                                                                 20: ((3, "general"),)})
+        self.assertEqual(get_canales_escuchados(prefijo="100%_"), {10: ((4, "100%_real"),)})
+        self.assertEqual(get_canales_escuchados(prefijo="1_"), {})
+        self.assertEqual(get_canales_escuchados(id_guild=30), {})
+
+
+    def test_3_sacar_datos_filtrados(self) -> None:
+        """
+        La DB proyecta, filtra, ordena y limita las filas.
+        """
+
+        for id_usuario, nombre in ((1, "Bonshot"), (2, "ramon"), (3, "BONSAI"), (4, "bon_100%")):
+            registrar_usuario_autorizado(nombre, 0, id_usuario)
+
+        self.assertEqual(database.sacar_datos_de_tabla("usuarios_autorizados",
+                                                       columnas=("nombre",),
+                                                       empieza_con={"nombre": "bon"},
+                                                       ordenar_por=("id DESC",),
+                                                       limite=2),
+                         [("bon_100%",), ("BONSAI",)])
+        self.assertEqual(database.sacar_datos_de_tabla("usuarios_autorizados",
+                                                       columnas=("id",),
+                                                       contiene={"nombre": "N_1"},
+                                                       id=4),
+                         [(4,)])
+        self.assertEqual(list(get_usuarios_autorizados(contiene="AM")), [(2, "ramon", 0)])
+        self.assertEqual(len(list(get_usuarios_autorizados(limite=3))), 3)
+
+
+    def test_4_iterar_de_a_lotes(self) -> None:
+        """
+        Las filas se entregan de a una, trayéndolas de a lotes, y la
+        conexión se abre recién al pedir la primera.
+        """
+
+        for id_usuario in range(1, 11):
+            registrar_usuario_autorizado(f"usuario{id_usuario}", 0, id_usuario)
+
+        with patch.object(database, "DEFAULT_DB", "/no/existe/db.sqlite3"):
+            # Si se conectara acá, fallaría
+            filas = database.iterar_datos_de_tabla("usuarios_autorizados",
+                                                   columnas=("id",),
+                                                   ordenar_por=("id",),
+                                                   tamanio_lote=3)
+
+        self.assertEqual(next(filas), (1,))
+        self.assertEqual([id_usuario for id_usuario, in filas], list(range(2, 11)))
+
+
+    def test_5_condiciones_con_comillas(self) -> None:
+        """
+        Los valores de las condiciones se pasan como parámetros, así que
+        las comillas y las barras no rompen ni cambian la consulta.
+        """
+
+        rutas = ("sounds/it's \"bad\".mp3", "sounds\\win\\audio.mp3")
+
+        for ruta in rutas:
+            registrar_sonido(ruta, f"{ruta}.opus", 1)
+
+        for ruta in rutas:
+            self.assertEqual(get_sonido_opus(ruta), f"{ruta}.opus")
+
+        database.actualizar_dato_de_tabla("sonidos",
+                                          nombre_col="ruta_opus",
+                                          valor="otro.opus",
+                                          ruta=rutas[0])
+        self.assertEqual(get_sonido_opus(rutas[0]), "otro.opus")
+
+        borrar_sonido(rutas[0])
+        self.assertIsNone(get_sonido_opus(rutas[0]))
+        self.assertEqual(get_sonido_opus(rutas[1]), f"{rutas[1]}.opus")
+
+
+    def test_6_filtros_con_acentos(self) -> None:
+        """
+        Los filtros de texto no distinguen mayúsculas acentuadas ni la 'ñ'.
+        """
+
+        for id_canal, nombre in ((1, "Ñoquis"), (2, "ÁRBOLES"), (3, "arboles")):
+            actualizar_canal_escuchado(id_canal, nombre, 10)
+
+        self.assertEqual(get_canales_escuchados(prefijo="ñoq"), {10: ((1, "Ñoquis"),)})
+        self.assertEqual(get_canales_escuchados(prefijo="árbo"), {10: ((2, "ÁRBOLES"),)})
+        self.assertEqual(database.sacar_datos_de_tabla("canales_escuchables",
+                                                       columnas=("id",),
+                                                       contiene={"nombre": "OQUI"}),
+                         [(1,)])
@@ -0,0 +1,6 @@
+"""
+Pruebas de imágenes.
+"""
+
+from .test_hash_perceptual import *
+from .test_vistas_previas import *
@@ -0,0 +1,58 @@
+"""
+Módulo para tests del índice de hashes perceptuales.
+"""
+
+import unittest
+
+from src.main.imagenes.hash_perceptual import *
+
+
+class TestHashPerceptual(unittest.TestCase):
+    """
+    Tests para el cálculo y el índice de hashes perceptuales.
+    """
+
+    def test_1_dhash(self) -> None:
+        """
+        Cada bit compara un píxel con el de su derecha.
+        """
+
+        # Filas que siempre bajan: todos los bits en 1
+        bajando = list(range(9, 0, -1)) * 8
+        subiendo = list(range(9)) * 8
+
+        self.assertEqual(calcular_dhash(bajando), (1 << 64) - 1)
+        self.assertEqual(calcular_dhash(subiendo), 0)
+
+
+    def test_2_encuentra_casi_iguales(self) -> None:
+        """
+        Se encuentran los hashes a poca distancia, y no los lejanos.
+        """
+
+        indice = IndicePerceptual()
+        base = 0x0123456789ABCDEF
+
+        indice.agregar("igual.png", base)
+        indice.agregar("casi.png", base ^ 0b101)
+        indice.agregar("otra.png", ~base & ((1 << 64) - 1))
+
+        self.assertEqual(indice.similares(base),
+                         [("igual.png", 0), ("casi.png", 2)])
+
+
+    def test_3_quitar(self) -> None:
+        """
+        Las imágenes quitadas o reemplazadas dejan de aparecer.
+        """
+
+        indice = IndicePerceptual()
+        indice.agregar("a.png", 0)
+        indice.agregar("a.png", 0xFFFF)
+        indice.agregar("b.png", 0)
+
+        self.assertEqual(indice.similares(0), [("b.png", 0)])
+        self.assertTrue(indice.quitar("b.png"))
+        self.assertFalse(indice.quitar("b.png"))
+        self.assertEqual(indice.similares(0), [])
+        self.assertEqual(len(indice), 1)
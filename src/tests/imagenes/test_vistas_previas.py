@@ -0,0 +1,108 @@
+"""
+Módulo para tests de las vistas previas de las imágenes.
+"""
+
+from pathlib import Path
+from unittest import IsolatedAsyncioTestCase, skipUnless
+
+from src.main.db.atajos import get_imagenes_procesadas
+from src.main.imagenes.vistas_previas import *
+
+from ..db.db_temporal import DBTemporal
+
+if PILLOW_DISPONIBLE:
+    from PIL import Image
+
+
+@skipUnless(PILLOW_DISPONIBLE, "Pillow no está instalado.")
+class TestVistasPrevias(DBTemporal, IsolatedAsyncioTestCase):
+    """
+    Tests para el procesador de imágenes.
+    """
+
+    def setUp(self) -> None:
+        """
+        Arma una carpeta para las imágenes, y un procesador que las
+        anota en la DB temporal.
+        """
+
+        super().setUp()
+        self.imagenes = self.raiz / "imagenes"
+        self.imagenes.mkdir()
+
+        self.procesador = ProcesadorImagenes(self.raiz / "vistas", max_procesos=1)
+        self.addCleanup(self.procesador.cerrar)
+
+
+    def imagen(self, nombre: str, cuadros: int=1) -> Path:
+        """
+        Crea una imagen grande, animada si tiene más de un cuadro.
+        """
+
+        ruta = self.imagenes / nombre
+        colores = [Image.new("RGB", (1024, 768), (40 * i, 100, 200)) for i in range(cuadros)]
+        colores[0].save(ruta, save_all=cuadros > 1, append_images=colores[1:])
+
+        return ruta
+
+
+    async def test_1_genera_vista_previa(self) -> None:
+        """
+        La vista previa es un JPEG reducido, y queda registrada en la DB.
+        """
+
+        ruta = self.imagen("foto.png")
+
+        self.assertEqual(await self.procesador.escanear(self.imagenes), 1)
+
+        vista_previa = self.procesador.vista_previa(ruta)
+        self.assertIsNotNone(vista_previa)
+        with Image.open(vista_previa) as vista:
+            self.assertEqual(vista.format, "JPEG")
+            self.assertEqual(max(vista.size), LADO_VISTA_PREVIA)
+
+        self.assertEqual([fila[:2] for fila in get_imagenes_procesadas()],
+                         [(ruta.as_posix(), vista_previa)])
+
+        # Ya procesada, no se vuelve a procesar
+        self.assertEqual(await self.procesador.escanear(self.imagenes), 0)
+
+
+    async def test_2_animadas_sin_vista_previa(self) -> None:
+        """
+        Las imágenes animadas no tienen vista previa, para que se
+        manden originales.
+        """
+
+        ruta = self.imagen("animada.gif", cuadros=3)
+
+        self.assertEqual(await self.procesador.escanear(self.imagenes), 1)
+        self.assertIsNone(self.procesador.vista_previa(ruta))
+        self.assertEqual(list(self.procesador.directorio.iterdir()), [])
+        self.assertEqual(len(self.procesador.indice), 1)
+
+
+    async def test_3_olvida_las_borradas(self) -> None:
+        """
+        Las imágenes que ya no existen se sacan de la DB y del índice,
+        tanto al cargar como al escanear.
+        """
+
+        primera = self.imagen("primera.png")
+        segunda = self.imagen("segunda.png")
+        await self.procesador.escanear(self.imagenes)
+        vista_primera = Path(self.procesador.vista_previa(primera))
+
+        primera.unlink()
+        await self.procesador.escanear(self.imagenes)
+
+        self.assertFalse(vista_primera.exists())
+        self.assertEqual([fila[0] for fila in get_imagenes_procesadas()], [segunda.as_posix()])
+
+        segunda.unlink()
+        otro = ProcesadorImagenes(self.procesador.directorio)
+        otro.cargar()
+
+        self.assertIsNone(otro.vista_previa(segunda))
+        self.assertEqual(len(otro.indice), 0)
+        self.assertEqual(list(get_imagenes_procesadas()), [])